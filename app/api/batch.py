@@ -0,0 +1,344 @@
+from fastapi import APIRouter, UploadFile, File, Form
+from fastapi.responses import JSONResponse
+from typing import List, Optional
+import asyncio
+import hashlib
+import os
+import uuid
+import zipfile
+
+from app.core.config import (
+    UPLOAD_DIR,
+    MAX_UPLOAD_MB,
+    MAX_UPLOAD_BYTES,
+    MAX_BATCH_MB,
+    MAX_BATCH_BYTES,
+    MAX_BATCH_FILES,
+    MAX_BATCH_PARALLEL
+)
+from app.core.logger import logger
+from app.core.workers import run_cpu, run_disk, upload_gate
+
+from app.api.upload import (
+    UPLOAD_CHUNK,
+    PDF_MAGIC,
+    UploadRejected,
+    save_upload,
+    company_field,
+    find_duplicate,
+    with_company
+)
+from app.services import janitor, result_store
+from app.services.statement_store import company_name
+from app.services.excel_service import export_batch_excel, result_data
+from app.services.pipeline import run_pipeline, pipeline_version
+
+
+router = APIRouter()
+
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+
+ZIP_MAGIC = b"PK\x03\x04"
+
+
+def batch_error(status_code, message):
+
+    return JSONResponse(
+        status_code=status_code,
+        content={
+            "status": "error",
+            "message": message
+        }
+    )
+
+
+# ---------------- INTAKE ----------------
+
+async def save_batch_file(file, batch_id):
+    """
+    Save one part of the batch. Returns [(filename, pdf_path, hash)], several
+    for a zip. Raises UploadRejected for content that is neither.
+    """
+
+    head = await file.read(len(ZIP_MAGIC))
+
+    await file.seek(0)
+
+
+    if head != ZIP_MAGIC:
+
+        pdf_path = f"{UPLOAD_DIR}/{uuid.uuid4()}.pdf"
+
+        content_hash = await save_upload(file, pdf_path)
+
+        return [(file.filename, pdf_path, content_hash)]
+
+
+    zip_path = f"{UPLOAD_DIR}/{batch_id}.zip"
+
+    await save_upload(file, zip_path, magic=ZIP_MAGIC, limit_mb=MAX_BATCH_MB)
+
+    try:
+        return await run_disk(unpack_zip, zip_path)
+    finally:
+        os.remove(zip_path)
+
+
+def unpack_zip(zip_path):
+    """
+    PDFs inside a zip, copied out one by one with the same size cap as
+    single uploads. Sizes are counted while copying, not trusted from the
+    zip directory.
+    """
+
+    docs = []
+
+    total = 0
+
+
+    try:
+        archive = zipfile.ZipFile(zip_path)
+    except zipfile.BadZipFile:
+        raise UploadRejected(400, "Corrupt zip archive")
+
+
+    with archive:
+
+        for info in archive.infolist():
+
+            name = os.path.basename(info.filename)
+
+            # Folders and macOS resource forks
+            if info.is_dir() or not name or info.filename.startswith("__MACOSX/"):
+                continue
+
+            if not name.lower().endswith(".pdf"):
+                logger.info(f"Skipping non-PDF zip member {info.filename}")
+                continue
+
+            if len(docs) >= MAX_BATCH_FILES:
+                _remove_all(docs)
+                raise UploadRejected(413, f"Batches are limited to {MAX_BATCH_FILES} documents")
+
+
+            pdf_path = f"{UPLOAD_DIR}/{uuid.uuid4()}.pdf"
+
+            digest = hashlib.sha256()
+
+            size = 0
+
+            with archive.open(info) as src, open(pdf_path, "wb") as dst:
+
+                for chunk in iter(lambda: src.read(UPLOAD_CHUNK), b""):
+
+                    if size == 0 and PDF_MAGIC not in chunk[:1024]:
+                        break
+
+                    size += len(chunk)
+                    total += len(chunk)
+
+                    if size > MAX_UPLOAD_BYTES or total > MAX_BATCH_BYTES:
+
+                        dst.close()
+
+                        _remove_all(docs + [(name, pdf_path, None)])
+
+                        if size > MAX_UPLOAD_BYTES:
+                            raise UploadRejected(413, f"{name} exceeds the {MAX_UPLOAD_MB} MB limit")
+
+                        raise UploadRejected(413, f"Zip contents exceed the {MAX_BATCH_MB} MB limit")
+
+                    digest.update(chunk)
+
+                    dst.write(chunk)
+
+
+            if size == 0:
+
+                logger.info(f"Skipping {info.filename}: not a PDF")
+
+                os.remove(pdf_path)
+
+                continue
+
+
+            docs.append((name, pdf_path, digest.hexdigest()))
+
+
+    return docs
+
+
+def _remove_all(docs):
+
+    for _, pdf_path, _ in docs:
+        if os.path.exists(pdf_path):
+            os.remove(pdf_path)
+
+
+# ---------------- PROCESSING ----------------
+
+async def process_document(filename, pdf_path, content_hash, force, slots, company=None):
+
+    entry = {
+        "company": company or company_name(filename),
+        "filename": filename
+    }
+
+
+    prior = None if force else await find_duplicate(content_hash, pdf_path)
+
+    if prior:
+        result = prior
+
+    else:
+
+        file_id = os.path.splitext(os.path.basename(pdf_path))[0]
+
+        async with slots:
+
+            logger.info(f"Batch document started: {filename}")
+
+            try:
+                result = await run_pipeline(pdf_path, file_id)
+
+            except Exception as e:
+
+                logger.exception(f"Batch document failed: {filename}")
+
+                result = {"status": "error", "message": str(e)}
+
+
+        if result.get("status") == "success":
+
+            with_company(result, company)
+
+            await run_disk(
+                result_store.save_result,
+                content_hash, pipeline_version(), file_id, filename, result
+            )
+
+
+    entry["result"] = result
+
+    return entry
+
+
+def summary_rows(entries):
+
+    documents = []
+
+    for e in entries:
+
+        result = e["result"]
+
+        ok = result.get("status") == "success"
+
+        documents.append({
+            "company": e["company"],
+            "filename": e["filename"],
+            "status": result.get("status", "error"),
+            "message": "cached" if result.get("cached") else result.get("message", ""),
+            "data": result_data(result) if ok else None
+        })
+
+    return documents
+
+
+# ---------------- API ----------------
+
+@router.post("/batch")
+async def batch(
+    files: List[UploadFile] = File(...),
+    force: bool = False,
+    company: Optional[str] = Form(None)
+):
+    """
+    Several PDFs (or zips of PDFs) in one request. Documents run side by
+    side and the response links one workbook: a summary sheet plus a
+    sheet per company. company, if given, names the company of every
+    document (e.g. several years of one company's reports).
+    """
+
+    company = company_field(company)
+
+    batch_id = str(uuid.uuid4())
+
+    logger.info(f"Batch {batch_id}: {len(files)} files received")
+
+
+    # ---------- Save Everything First ----------
+
+    docs = []
+    rejected = []
+
+    for file in files:
+
+        try:
+            docs += await save_batch_file(file, batch_id)
+
+        except UploadRejected as e:
+
+            rejected.append({
+                "filename": file.filename,
+                "status": "error",
+                "message": e.message
+            })
+
+
+        if len(docs) > MAX_BATCH_FILES:
+
+            _remove_all(docs)
+
+            return batch_error(413, f"Batches are limited to {MAX_BATCH_FILES} documents")
+
+
+    if not docs:
+        return batch_error(400, "No PDF documents in the batch")
+
+
+    # ---------- Processing ----------
+
+    # The whole batch holds the one upload slot UploadGuard admitted it to
+    slots = asyncio.Semaphore(MAX_BATCH_PARALLEL)
+
+    # Documents wait their turn on disk; the janitor must keep them
+    with janitor.hold(*(path for _, path, _ in docs)):
+
+        async with upload_gate:
+
+            entries = await asyncio.gather(*(
+                process_document(name, path, content_hash, force, slots, company)
+                for name, path, content_hash in docs
+            ))
+
+
+    # ---------- Workbook ----------
+
+    skipped = [
+        {"company": company or company_name(r["filename"]), **r, "data": None}
+        for r in rejected
+    ]
+
+    await run_cpu(export_batch_excel, summary_rows(entries) + skipped, batch_id)
+
+    logger.info(f"Batch {batch_id} finished")
+
+
+    return {
+        "status": "success",
+        "batch_id": batch_id,
+        "download": f"/outputs/{batch_id}.xlsx",
+        "documents": [
+            {
+                "filename": e["filename"],
+                "company": e["company"],
+                "status": e["result"].get("status"),
+                "file_id": e["result"].get("file_id"),
+                "download": e["result"].get("download"),
+                "cached": e["result"].get("cached", False),
+                "message": e["result"].get("message")
+            }
+            for e in entries
+        ] + rejected
+    }
@@ -0,0 +1,201 @@
+from fastapi import APIRouter, UploadFile, File, Form
+from fastapi.responses import JSONResponse
+from functools import partial
+from typing import Optional
+import asyncio
+import uuid
+import os
+
+from app.core.config import UPLOAD_DIR
+from app.core.logger import logger
+from app.core.workers import job_slots, run_disk
+
+from app.api.upload import UploadRejected, company_field, save_upload, find_duplicate, with_company
+from app.services import job_store, result_store
+from app.services.pipeline import run_pipeline, pipeline_version
+
+
+router = APIRouter()
+
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+
+# Keep strong refs so running jobs are not garbage collected
+_tasks = set()
+
+
+# ---------------- RUNNER ----------------
+
+async def run_job(job_id, pdf_path, filename=None, content_hash=None, company=None):
+
+    async with job_slots:
+
+        logger.info(f"Job {job_id} started")
+
+        try:
+
+            result = await run_pipeline(
+                pdf_path,
+                job_id,
+                progress=partial(job_store.set_stage, job_id)
+            )
+
+        except Exception as e:
+
+            logger.exception(f"Job {job_id} failed")
+
+            await run_disk(job_store.fail_job, job_id, str(e))
+
+            return
+
+
+    if result.get("status") != "success":
+
+        await run_disk(job_store.fail_job, job_id, result.get("message", "Extraction failed"))
+
+        return
+
+
+    with_company(result, company)
+
+    await run_disk(job_store.finish_job, job_id, result)
+
+
+    # Remember the result for future duplicate uploads
+    if content_hash is None:
+        content_hash = await run_disk(result_store.hash_file, pdf_path)
+
+    await run_disk(
+        result_store.save_result,
+        content_hash, pipeline_version(), job_id, filename, result
+    )
+
+    logger.info(f"Job {job_id} finished")
+
+
+def schedule_job(job_id, pdf_path, filename=None, content_hash=None, company=None):
+
+    task = asyncio.create_task(run_job(job_id, pdf_path, filename, content_hash, company))
+
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+def resume_jobs():
+    """
+    Re-queue jobs left unfinished by a previous worker (called at startup).
+    """
+
+    pending = job_store.unfinished_jobs()
+
+    for job_id, pdf_path, filename, company in pending:
+
+        if not os.path.exists(pdf_path):
+
+            job_store.fail_job(job_id, "Uploaded file no longer available")
+
+            continue
+
+        schedule_job(job_id, pdf_path, filename, company=company)
+
+
+    if pending:
+        logger.info(f"Resumed {len(pending)} unfinished jobs")
+
+
+# ---------------- API ----------------
+
+def not_found(job_id):
+
+    return JSONResponse(
+        status_code=404,
+        content={
+            "status": "error",
+            "message": f"Unknown job: {job_id}"
+        }
+    )
+
+
+@router.post("/jobs")
+async def create_job(
+    file: UploadFile = File(...),
+    force: bool = False,
+    company: Optional[str] = Form(None)
+):
+
+    job_id = str(uuid.uuid4())
+
+    company = company_field(company)
+
+    pdf_path = f"{UPLOAD_DIR}/{job_id}.pdf"
+
+    logger.info(f"Queueing job {job_id} for {file.filename}")
+
+    try:
+        content_hash = await save_upload(file, pdf_path)
+    except UploadRejected as e:
+        return e.response()
+
+    await run_disk(job_store.create_job, job_id, file.filename, pdf_path, company)
+
+
+    # Same PDF seen before: the job is done on arrival
+    prior = None if force else await find_duplicate(content_hash, pdf_path)
+
+    if prior:
+        await run_disk(job_store.finish_job, job_id, prior)
+
+    else:
+        schedule_job(job_id, pdf_path, file.filename, content_hash, company)
+
+
+    return JSONResponse(
+        status_code=202,
+        content={
+            "status": "done" if prior else "queued",
+            "job_id": job_id,
+            "status_url": f"/jobs/{job_id}",
+            "result_url": f"/jobs/{job_id}/result"
+        }
+    )
+
+
+@router.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+
+    row = await run_disk(job_store.get_job, job_id)
+
+    if row is None:
+        return not_found(job_id)
+
+    return job_store.describe(row)
+
+
+@router.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+
+    row = await run_disk(job_store.get_job, job_id)
+
+    if row is None:
+        return not_found(job_id)
+
+
+    # A failed extraction is a finished job: same payload as /upload gives
+    if row["status"] == "error":
+
+        return {
+            "status": "error",
+            "message": row["error"]
+        }
+
+
+    if row["status"] != "done":
+
+        # Not ready yet - hand back the current status instead
+        return JSONResponse(
+            status_code=409,
+            content=job_store.describe(row)
+        )
+
+
+    return await run_disk(job_store.get_result, job_id)
@@ -0,0 +1,63 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core import metrics, startup
+from app.core.workers import upload_gate
+from app.services import janitor
+
+
+router = APIRouter()
+
+
+metrics.Gauge(
+    "finance_uploads_admitted",
+    "Uploads running or waiting for a worker slot",
+    lambda: upload_gate.admitted
+)
+
+metrics.Gauge(
+    "finance_uploads_queued",
+    "Uploads waiting for a worker slot",
+    lambda: upload_gate.queued
+)
+
+metrics.Gauge(
+    "finance_storage_upload_bytes",
+    "Bytes in uploads/ after the last janitor sweep",
+    lambda: janitor.usage["uploads"]
+)
+
+metrics.Gauge(
+    "finance_storage_output_bytes",
+    "Bytes in outputs/ after the last janitor sweep",
+    lambda: janitor.usage["outputs"]
+)
+
+metrics.Gauge(
+    "finance_startup_import_seconds",
+    "Time to import the app at process start",
+    lambda: startup.report["import_seconds"] or 0
+)
+
+metrics.Gauge(
+    "finance_startup_ready_seconds",
+    "Time from app import to the end of startup (lifespan)",
+    lambda: startup.report["ready_seconds"] or 0
+)
+
+metrics.Gauge(
+    "finance_warmup_seconds",
+    "Background import of the stage dependencies after startup",
+    lambda: startup.report["warmup_seconds"] or 0
+)
+
+
+# ---------------- API ----------------
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+
+    return PlainTextResponse(
+        metrics.render(),
+        media_type="text/plain; version=0.0.4"
+    )
@@ -0,0 +1,108 @@
+import asyncio
+import os
+import re
+
+from fastapi import APIRouter
+from fastapi.responses import FileResponse, JSONResponse
+
+from app.core.config import OUTPUT_DIR
+from app.core.logger import logger
+from app.core import timing
+from app.core.workers import run_cpu, run_disk
+from app.services import job_store, result_store
+from app.services.excel_service import XLSX_MEDIA_TYPE, export_excel, result_data
+
+
+router = APIRouter()
+
+
+FILE_ID_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+
+# Workbooks being built, so concurrent first downloads share one export
+_building = {}
+
+
+# ---------------- HELPERS ----------------
+
+def stored_result(file_id):
+    """
+    Successful result for this id: the result store (uploads, batches),
+    then the job store.
+    """
+
+    result = result_store.find_by_file_id(file_id)
+
+    if result is None:
+        result = job_store.get_result(file_id)
+
+    if result is None or result.get("status") != "success":
+        return None
+
+    return result
+
+
+async def build_workbook(file_id, result):
+
+    task = _building.get(file_id)
+
+    if task is None:
+
+        logger.info(f"Building workbook {file_id} on first download")
+
+        task = asyncio.ensure_future(
+            run_cpu(export_excel, result_data(result), file_id)
+        )
+
+        _building[file_id] = task
+
+        task.add_done_callback(lambda _: _building.pop(file_id, None))
+
+
+    await asyncio.shield(task)
+
+
+def not_found():
+
+    return JSONResponse(
+        status_code=404,
+        content={
+            "status": "error",
+            "message": "No such workbook"
+        }
+    )
+
+
+# ---------------- API ----------------
+
+@router.get("/outputs/{file_id}.xlsx")
+async def download_excel(file_id: str):
+    """
+    Statement workbook, generated from the stored result the first time it
+    is asked for and served from disk after that.
+    """
+
+    path = f"{OUTPUT_DIR}/{file_id}.xlsx"
+
+    if not FILE_ID_RE.match(file_id):
+        return not_found()
+
+
+    if not os.path.exists(path):
+
+        result = await run_disk(stored_result, file_id)
+
+        if result is None:
+            return not_found()
+
+        with timing.collect(), timing.timed("excel"):
+            await build_workbook(file_id, result)
+
+
+    # Last use, for the janitor's LRU order
+    try:
+        os.utime(path)
+    except OSError:
+        return not_found()
+
+    return FileResponse(path, media_type=XLSX_MEDIA_TYPE, filename=f"{file_id}.xlsx")
@@ -0,0 +1,96 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import JSONResponse
+
+from app.core.mapping import CANONICAL_ROWS
+from app.core.workers import run_disk
+from app.services import statement_store
+
+
+router = APIRouter(prefix="/statements")
+
+
+def bad_request(message):
+
+    return JSONResponse(
+        status_code=400,
+        content={
+            "status": "error",
+            "message": message
+        }
+    )
+
+
+def unknown_rows(rows):
+
+    return [r for r in rows if r not in CANONICAL_ROWS]
+
+
+# ---------------- API ----------------
+
+@router.get("/rows")
+def canonical_rows():
+    """
+    Row names the queries accept (CANONICAL_ROWS).
+    """
+
+    return {"status": "success", "rows": list(CANONICAL_ROWS)}
+
+
+@router.get("/companies")
+async def companies():
+
+    return {
+        "status": "success",
+        "companies": await run_disk(statement_store.list_companies)
+    }
+
+
+@router.get("/series")
+async def series(company: str, row: str = Query("revenue")):
+    """
+    Time series for one company: /statements/series?company=Acme&row=revenue,net profit
+    """
+
+    rows = [r.strip().lower() for r in row.split(",") if r.strip()]
+
+    bad = unknown_rows(rows)
+
+    if bad:
+        return bad_request(f"Unknown rows: {', '.join(bad)}")
+
+
+    found = await run_disk(statement_store.time_series, company, rows)
+
+    if not any(found.values()):
+
+        return JSONResponse(
+            status_code=404,
+            content={
+                "status": "error",
+                "message": f"No statements for {company}"
+            }
+        )
+
+
+    return {"status": "success", "company": company, "series": found}
+
+
+@router.get("/cross-section")
+async def cross_section(row: str = "revenue", year: int = None):
+    """
+    One row across companies: /statements/cross-section?row=revenue&year=2024
+    Without year, each company's latest year.
+    """
+
+    row = row.strip().lower()
+
+    if unknown_rows([row]):
+        return bad_request(f"Unknown row: {row}")
+
+
+    return {
+        "status": "success",
+        "row": row,
+        "year": year,
+        "companies": await run_disk(statement_store.cross_section, row, year)
+    }
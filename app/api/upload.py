@@ -1,16 +1,18 @@
-from fastapi import APIRouter, UploadFile, File
+from fastapi import APIRouter, UploadFile, File, Form
+from typing import Optional
+from fastapi.responses import JSONResponse
+import hashlib
 import uuid
 import os
-import re
 
-from app.core.config import UPLOAD_DIR, OUTPUT_DIR
+from app.core.config import UPLOAD_DIR, OUTPUT_DIR, MAX_UPLOAD_MB
 from app.core.logger import logger
+from app.core.metrics import DOCUMENTS
+from app.core import timing
+from app.core.workers import run_disk, upload_gate
 
-from app.services.pdf_service import extract_text
-from app.services.table_service import extract_tables
-from app.services.llm_service import parse_with_llm
-from app.services.validator import validate_data
-from app.services.excel_service import export_excel
+from app.services import janitor, result_store
+from app.services.pipeline import run_pipeline, pipeline_version
 
 
 router = APIRouter()
@@ -19,382 +21,209 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 
-# ---------------- FILTER CONFIG ----------------
-
-CORE_KEYWORDS = [
-    "revenue",
-    "income",
-    "expense",
-    "cost",
-    "depreciation",
-    "amortisation",
-    "finance",
-    "interest",
-    "ebitda",
-    "profit",
-    "tax",
-    "eps",
-    "earning",
-    "margin"
-]
-
-
-CASHFLOW_WORDS = [
-    "repayment",
-    "lease liability",
-    "cash equivalent",
-    "interest paid",
-    "dividend paid",
-    "net cash",
-    "operating activities",
-    "investing activities",
-    "financing activities"
-]
-
-
-JUNK_WORDS = [
-    "gate", "sofa", "pna", "sss", "atom", "reofsiutian"
-]
+UPLOAD_CHUNK = 1024 * 1024
 
 
-# ---------------- HELPERS ----------------
-
-def is_valid_year(y: str) -> bool:
-
-    y = y.strip()
-
-    # 2024
-    if re.match(r"^20\d{2}$", y):
-        return True
-
-    # 31/12/2025
-    if re.match(r"^\d{2}/\d{2}/20\d{2}$", y):
-        return True
-
-    return False
-
-
-def sort_year(y):
-
-    if y.isdigit():
-        return int(y)
-
-    if "/" in y:
-        return int(y.split("/")[-1])
-
-    return 0
-
-
-def is_useful_row(name: str) -> bool:
-
-    if not name:
-        return False
-
-
-    n = name.lower().strip()
-
-
-    # Too short = OCR junk
-    if len(n) < 5:
-        return False
+# PDF header must appear within the first 1024 bytes
+PDF_MAGIC = b"%PDF-"
 
 
-    # ---------- Must contain core keyword ----------
+class UploadRejected(Exception):
 
-    CORE = [
-        "revenue",
-        "income",
-        "expense",
-        "cost",
-        "depreciation",
-        "amortisation",
-        "finance",
-        "interest",
-        "ebitda",
-        "profit",
-        "tax",
-        "earning",
-        "eps",
-        "margin"
-    ]
+    def __init__(self, status_code, message):
 
-    if not any(k in n for k in CORE):
-        return False
+        super().__init__(message)
 
+        self.status_code = status_code
+        self.message = message
 
-    # ---------- Remove footnotes / adjustments ----------
 
-    BLOCK = [
-        "allowance",
-        "gain on",
-        "loss on",
-        "merger",
-        "disposal",
-        "exceptional",
-        "adjustment",
-        "share of",
-        "non controlling",
-        "minority",
-        "segment",
-        "reclassified",
-        "write down",
-        "impairment",
-        "provision",
-        "fair value",
-        "derivative",
-        "lease charge",
-        "one time",
-        "extraordinary"
-    ]
+    def response(self):
 
-    if any(b in n for b in BLOCK):
-        return False
+        return JSONResponse(
+            status_code=self.status_code,
+            content={
+                "status": "error",
+                "message": self.message
+            }
+        )
 
 
-    # ---------- Remove balance-sheet items ----------
-
-    BALANCE_SHEET = [
-        "asset",
-        "liability",
-        "equity",
-        "borrowings",
-        "receivable",
-        "payable",
-        "inventory",
-        "capital",
-        "goodwill"
-    ]
-
-    if any(b in n for b in BALANCE_SHEET):
-        return False
-
-
-    return True
-
-
-
-# ---------------- API ----------------
-
-@router.post("/upload")
-async def upload(file: UploadFile = File(...)):
-
-    logger.info("Upload started")
-
-    file_id = str(uuid.uuid4())
-
-    pdf_path = f"{UPLOAD_DIR}/{file_id}.pdf"
-
-    logger.info(f"Saving file: {file.filename}")
-
-    with open(pdf_path, "wb") as f:
-        f.write(await file.read())
-
-    logger.info("File saved")
-
-
-    # ---------- Try Table Extraction ----------
-
-    tables = extract_tables(pdf_path)
-
-    text = ""
-
-
-    if tables:
-
-        logger.info("Using Camelot extracted tables")
-
-        for df in tables:
-            text += df.to_csv(index=False)
-            text += "\n\n"
-
-
-    # ---------- OCR / Native Fallback ----------
-
-    else:
-
-        logger.info("No tables found. Using OCR/Text extraction")
-
-        chunks = extract_text(pdf_path)
-
-        if chunks:
-            text = "\n\n".join(chunks)
-
-
-    if not text.strip():
-
-        logger.error("No usable text extracted")
-
-        return {
-            "status": "error",
-            "message": "Could not extract content from PDF"
-        }
-
-
-    logger.info(f"Total extracted text length: {len(text)}")
-
-
-    # ---------- Chunk for LLM ----------
+# ---------------- HELPERS ----------------
 
-    MAX_CHUNK = 3500
+async def save_upload(file, path, magic=PDF_MAGIC, limit_mb=MAX_UPLOAD_MB):
+    """
+    Copy the upload (already spooled by Starlette; UploadGuard has capped
+    the request size) to its path in fixed-size chunks, hashing as we go.
+    Rejects non-PDF content on the first chunk and enforces the per-file
+    size cap. Returns the sha256 hex digest of the content.
+    """
 
-    chunks = [
-        text[i:i + MAX_CHUNK]
-        for i in range(0, len(text), MAX_CHUNK)
-    ]
+    limit = limit_mb * 1024 * 1024
 
-    logger.info(f"Split into {len(chunks)} LLM chunks")
+    with timing.timed("upload_save"):
+        return await _save_upload(file, path, magic, limit, limit_mb)
 
 
-    # ---------- Aggregate Results ----------
+async def _save_upload(file, path, magic, limit, limit_mb):
 
-    row_map = {}
-    all_years = set()
+    digest = hashlib.sha256()
 
-    currency = "UNKNOWN"
-    unit = "UNKNOWN"
+    size = 0
 
+    try:
 
-    for i, chunk in enumerate(chunks):
+        with open(path, "wb") as f:
 
-        if len(chunk.strip()) < 200:
-            continue
+            while True:
 
-        logger.info(f"Processing LLM chunk {i+1}/{len(chunks)}")
+                chunk = await file.read(UPLOAD_CHUNK)
 
-        result = parse_with_llm(chunk)
+                if not chunk:
+                    break
 
-        if not result:
-            continue
 
+                if size == 0 and magic not in chunk[:1024]:
+                    raise UploadRejected(415, "Only PDF files are supported")
 
-        # -------- Metadata --------
 
-        currency = result.get("currency", currency)
-        unit = result.get("unit", unit)
+                size += len(chunk)
 
+                if size > limit:
+                    raise UploadRejected(413, f"File exceeds the {limit_mb} MB limit")
 
-        # -------- Years --------
 
-        for y in result.get("years", []):
+                digest.update(chunk)
 
-            y = str(y).strip()
+                await run_disk(f.write, chunk)
 
-            if is_valid_year(y):
-                all_years.add(y)
 
+        if size == 0:
+            raise UploadRejected(400, "Empty upload")
 
-        # -------- Rows --------
+    except UploadRejected as e:
 
-        for r in result.get("rows", []):
+        logger.warning(f"Upload rejected: {e.message}")
 
-            name = r.get("name", "").strip()
+        os.remove(path)
 
-            if not name:
-                continue
+        raise
 
 
-            lname = name.lower()
+    return digest.hexdigest()
 
 
-            # Remove cashflow rows
-            if any(w in lname for w in CASHFLOW_WORDS):
-                continue
+async def find_duplicate(content_hash, pdf_path):
+    """
+    Prior result for the same bytes + pipeline version. The freshly saved
+    copy is removed when we can reuse the earlier run.
+    """
 
+    prior = await run_disk(result_store.find_result, content_hash, pipeline_version())
 
-            # Keep only income-statement rows
-            if not is_useful_row(name):
-                continue
+    if prior is None:
+        return None
 
 
-            key = lname
+    logger.info(f"Duplicate upload; reusing result {prior['file_id']}")
 
+    DOCUMENTS.inc(status="cached")
 
-            if key not in row_map:
+    await run_disk(os.remove, pdf_path)
 
-                row_map[key] = {
-                    "name": name,
-                    "values": {}
-                }
+    # Timings belong to the earlier run, not this request
+    prior.pop("timings", None)
 
+    return {**prior, "cached": True}
 
-            for year, val in r.get("values", {}).items():
 
-                year = str(year).strip()
+def company_field(company):
+    """
+    The optional company form field, whitespace collapsed; None if blank.
+    """
 
-                if is_valid_year(year):
+    return " ".join((company or "").split()) or None
 
-                    row_map[key]["values"][year] = val
 
+def with_company(result, company):
+    """
+    Record the company named at upload in the result, where the statement
+    index (and a rebuild of it) reads it from.
+    """
 
-    # ---------- Limit to Last 7 Years ----------
+    if company:
+        result["company"] = company
 
-    sorted_years = sorted(list(all_years), key=sort_year)
+    return result
 
-    if len(sorted_years) > 7:
-        sorted_years = sorted_years[-7:]
 
+# ---------------- API ----------------
 
-    logger.info(f"Final years used: {sorted_years}")
+@router.post("/upload")
+async def upload(
+    file: UploadFile = File(...),
+    force: bool = False,
+    company: Optional[str] = Form(None)
+):
 
+    # One timer for the request, so the breakdown includes the file save
+    with timing.collect():
+        return await _upload(file, force, company_field(company))
 
-    # ---------- Filter Row Values ----------
 
-    for row in row_map.values():
+async def _upload(file, force, company=None):
 
-        filtered = {}
+    logger.info("Upload started")
 
-        for y in sorted_years:
-            filtered[y] = row["values"].get(y, "MISSING")
+    file_id = str(uuid.uuid4())
 
-        row["values"] = filtered
+    pdf_path = f"{UPLOAD_DIR}/{file_id}.pdf"
 
+    # Kept by the janitor until the request is done with it
+    with janitor.hold(pdf_path):
+        return await process_upload(file, force, file_id, pdf_path, company)
 
-    all_years = set(sorted_years)
 
+async def process_upload(file, force, file_id, pdf_path, company=None):
 
-    # ---------- Remove Empty Rows ----------
+    logger.info(f"Saving file: {file.filename}")
 
-    cleaned_rows = []
+    try:
+        content_hash = await save_upload(file, pdf_path)
+    except UploadRejected as e:
+        return e.response()
 
-    for row in row_map.values():
+    logger.info("File saved")
 
-        if any(v != "MISSING" for v in row["values"].values()):
-            cleaned_rows.append(row)
 
+    # ---------- Same PDF seen before? ----------
 
-    row_map = {
-        r["name"].lower(): r for r in cleaned_rows
-    }
+    if not force:
 
+        prior = await find_duplicate(content_hash, pdf_path)
 
-    # ---------- Final Object ----------
+        if prior:
+            return prior
 
-    raw = {
-        "currency": currency,
-        "unit": unit,
-        "years": sorted(list(all_years), key=sort_year),
-        "rows": list(row_map.values())
-    }
 
+    # ---------- Processing ----------
 
-    logger.info("Validating extracted data")
+    # Admitted by UploadGuard before the body was read
+    if upload_gate.queued:
+        logger.info(f"Upload queued ({upload_gate.queued} waiting)")
 
-    data = validate_data(raw)
+    async with upload_gate:
+        result = await run_pipeline(pdf_path, file_id)
 
 
-    # ---------- Export Excel ----------
+    if result.get("status") == "success":
 
-    excel_path = export_excel(data, file_id)
+        with_company(result, company)
 
-    logger.info("Excel generated successfully")
+        await run_disk(
+            result_store.save_result,
+            content_hash, pipeline_version(), file_id, file.filename, result
+        )
 
 
-    return {
-        "status": "success",
-        "file_id": file_id,
-        "currency": data.currency,
-        "unit": data.unit,
-        "years": data.years,
-        "rows": data.rows,
-        "download": f"/outputs/{file_id}.xlsx"
-    }
+    return result
@@ -0,0 +1,252 @@
+"""
+Bulk converter: the /upload pipeline over a directory of PDFs, no HTTP.
+
+    python -m app.cli reports/ [--manifest manifest.jsonl] [--workers 4]
+                               [--recursive] [--force]
+
+One document per worker process. Every finished document is appended to
+a JSONL manifest (status, workbook, timings); re-running the same command
+skips documents the manifest already has as successful, so an interrupted
+run resumes where it stopped.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+from app.core.config import LLM_RPM, LLM_TPM, OUTPUT_DIR
+from app.core.logger import logger
+from app.services import result_store, statement_store
+from app.services.excel_service import export_excel, result_data
+from app.services.pipeline import run_pipeline, pipeline_version
+
+
+DEFAULT_MANIFEST = "manifest.jsonl"
+
+
+# ---------------- MANIFEST ----------------
+
+def load_manifest(path):
+    """
+    Latest manifest record per file.
+    """
+
+    done = {}
+
+    if not os.path.exists(path):
+        return done
+
+    with open(path, encoding="utf-8") as f:
+
+        for line in f:
+
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue   # half-written line from a killed run
+
+            done[record["file"]] = record
+
+    return done
+
+
+def find_pdfs(root, recursive=False):
+
+    if not recursive:
+
+        return sorted(
+            os.path.join(root, name) for name in os.listdir(root)
+            if name.lower().endswith(".pdf")
+        )
+
+    return sorted(
+        os.path.join(folder, name)
+        for folder, _, names in os.walk(root)
+        for name in names
+        if name.lower().endswith(".pdf")
+    )
+
+
+# ---------------- WORKER ----------------
+
+def convert_one(pdf_path, force=False):
+    """
+    Run one PDF through the pipeline; returns its manifest record.
+    """
+
+    started = time.perf_counter()
+
+    record = {
+        "file": pdf_path,
+        "sha256": result_store.hash_file(pdf_path)
+    }
+
+
+    prior = None if force else result_store.find_result(record["sha256"], pipeline_version())
+
+    if prior:
+
+        prior.pop("timings", None)
+
+        result = {**prior, "cached": True}
+
+    else:
+
+        file_id = str(uuid.uuid4())
+
+        try:
+            result = asyncio.run(run_pipeline(pdf_path, file_id))
+
+        except Exception as e:
+            logger.exception(f"Conversion failed: {pdf_path}")
+            result = {"status": "error", "message": str(e)}
+
+
+        if result.get("status") == "success":
+
+            result_store.save_result(
+                record["sha256"], pipeline_version(), file_id,
+                os.path.basename(pdf_path), result
+            )
+
+
+    # No download route here: write the workbook now
+    if result.get("status") == "success":
+        export_workbook(result)
+
+
+    record.update({
+        "status": result.get("status", "error"),
+        "file_id": result.get("file_id"),
+        "xlsx": result.get("download", "").lstrip("/") or None,
+        "cached": result.get("cached", False),
+        "rows": len(result.get("rows", [])),
+        "message": result.get("message"),
+        "seconds": round(time.perf_counter() - started, 3),
+        "stages": result.get("timings", {}).get("stages", {}),
+        "llm_usage": result.get("llm_usage"),
+        "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds")
+    })
+
+    return record
+
+
+def export_workbook(result):
+
+    path = f"{OUTPUT_DIR}/{result['file_id']}.xlsx"
+
+    if not os.path.exists(path):
+        export_excel(result_data(result), result["file_id"])
+
+
+# ---------------- MAIN ----------------
+
+def worker_env(workers):
+    """
+    Environment for worker processes: CPU stages and OCR stay inside the
+    worker, and the provider's rate limit is split between workers.
+    """
+
+    return {
+        "INLINE_CPU": "1",
+        "LLM_RPM": str(max(1, LLM_RPM // workers)),
+        "LLM_TPM": str(max(1, LLM_TPM // workers))
+    }
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__.split("\n\n")[0])
+
+    parser.add_argument("directory")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument("--recursive", action="store_true")
+    parser.add_argument("--force", action="store_true", help="ignore earlier results and reprocess")
+
+    args = parser.parse_args(argv)
+
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"not a directory: {args.directory}")
+
+
+    result_store.init_db()
+    statement_store.init_db()
+
+    pdfs = find_pdfs(args.directory, args.recursive)
+
+    previous = {} if args.force else load_manifest(args.manifest)
+
+    todo = [
+        p for p in pdfs
+        if previous.get(p, {}).get("status") != "success"
+    ]
+
+    print(f"{len(pdfs)} PDFs, {len(pdfs) - len(todo)} already converted, {len(todo)} to go")
+
+    if not todo:
+        return 0
+
+
+    workers = max(1, min(args.workers, len(todo)))
+
+    # Spawned (not forked) workers read their config from this environment
+    os.environ.update(worker_env(workers))
+
+    started = time.monotonic()
+
+    failed = 0
+
+
+    with open(args.manifest, "a", encoding="utf-8") as manifest, \
+         ProcessPoolExecutor(
+             max_workers=workers,
+             mp_context=multiprocessing.get_context("spawn")
+         ) as pool:
+
+        futures = {pool.submit(convert_one, p, args.force): p for p in todo}
+
+        for n, future in enumerate(as_completed(futures), start=1):
+
+            pdf_path = futures[future]
+
+            try:
+                record = future.result()
+
+            except Exception as e:
+                # The worker process itself died (e.g. out of memory)
+                record = {"file": pdf_path, "status": "error", "message": repr(e)}
+
+
+            manifest.write(json.dumps(record) + "\n")
+            manifest.flush()
+
+
+            if record["status"] != "success":
+                failed += 1
+
+            print(
+                f"[{n}/{len(todo)}] {record['status']:<7} "
+                f"{record.get('seconds', 0):>7.1f}s  {pdf_path}"
+            )
+
+
+    elapsed = time.monotonic() - started
+
+    print(
+        f"Done in {elapsed:.1f}s: {len(todo) - failed} converted, {failed} failed "
+        f"({len(todo) / elapsed * 60:.1f} docs/min). Manifest: {args.manifest}"
+    )
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,4 +8,141 @@ GROQ_KEY = os.getenv("GROQ_API_KEY")
 UPLOAD_DIR = "uploads"
 OUTPUT_DIR = "outputs"
 
+# Local state (job store etc.) - kept out of the public /outputs mount
+DATA_DIR = os.getenv("DATA_DIR", "data")
+JOBS_DB = os.path.join(DATA_DIR, "jobs.db")
+RESULTS_DB = os.path.join(DATA_DIR, "results.db")
+
+# Extracted statements by company / period / canonical row, for queries
+STATEMENTS_DB = os.path.join(DATA_DIR, "statements.db")
+
 MAX_TEXT_LENGTH = 50000
+
+# Largest PDF accepted by /upload and /jobs
+MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", 50))
+MAX_UPLOAD_BYTES = MAX_UPLOAD_MB * 1024 * 1024
+
+# POST /batch: whole request (all files or the zip) and document count
+MAX_BATCH_MB = int(os.getenv("MAX_BATCH_MB", 500))
+MAX_BATCH_BYTES = MAX_BATCH_MB * 1024 * 1024
+MAX_BATCH_FILES = int(os.getenv("MAX_BATCH_FILES", 50))
+
+LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.1-8b-instant")
+
+# "groq", "openai" (any OpenAI-compatible server: llama.cpp, vLLM ...)
+# or "stub" (replays recorded answers; offline tests and load tests)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
+
+# OpenAI-compatible server, for LLM_BACKEND=openai
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "http://localhost:8080/v1")
+LLM_API_KEY = os.getenv("LLM_API_KEY", "")
+
+# Recorded answers for the stub; LLM_RECORD=1 appends real answers to it
+LLM_STUB_FILE = os.getenv("LLM_STUB_FILE", os.path.join(DATA_DIR, "llm_stub.jsonl"))
+LLM_RECORD = os.getenv("LLM_RECORD", "0") == "1"
+
+# Token budget per LLM chunk (whole lines / tables are packed up to this)
+LLM_CHUNK_TOKENS = int(os.getenv("LLM_CHUNK_TOKENS", 1500))
+
+# Skip the LLM when the rule extractor is at least this confident (0-1)
+RULES_MIN_CONFIDENCE = float(os.getenv("RULES_MIN_CONFIDENCE", 0.8))
+
+# Camelot only reads the income-statement pages found by the heading scan
+# (plus continuation pages), at most this many, most numeric first
+TABLE_MAX_PAGES = int(os.getenv("TABLE_MAX_PAGES", 4))
+
+
+# ---------------- Workers ----------------
+
+# Processes for CPU-bound stages (Camelot, OCR, Excel)
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", max(1, (os.cpu_count() or 2) - 1)))
+
+# Run CPU stages in the calling process instead (set by the bulk CLI,
+# whose workers are already one process per document)
+INLINE_CPU = os.getenv("INLINE_CPU", "0") == "1"
+
+# Pages of one document (OCR, Camelot) in the CPU pool at once; the
+# rest wait so other documents' stages are not starved
+PAGE_WORKERS = int(os.getenv("PAGE_WORKERS", CPU_WORKERS))
+
+# Tesseract binary: a command on PATH or a full path. Windows installs are
+# usually not on PATH, hence the default there
+TESSERACT_CMD = os.getenv(
+    "TESSERACT_CMD",
+    r"C:\Program Files\Tesseract-OCR\tesseract.exe" if os.name == "nt" else "tesseract"
+)
+
+# Threads for blocking LLM calls
+LLM_WORKERS = int(os.getenv("LLM_WORKERS", 4))
+
+# Threads for file I/O (saving uploads, hashing, unpacking zips, the
+# janitor, SQLite), kept apart so disk work never waits behind LLM calls
+DISK_WORKERS = int(os.getenv("DISK_WORKERS", 2))
+
+# Uploads processed at once / allowed to wait before we answer 429
+MAX_ACTIVE_UPLOADS = int(os.getenv("MAX_ACTIVE_UPLOADS", 2))
+MAX_QUEUED_UPLOADS = int(os.getenv("MAX_QUEUED_UPLOADS", 4))
+
+# Background jobs (POST /jobs) processed at once; the rest wait in SQLite.
+# Separate from the upload slots so queued jobs never hold up an upload
+MAX_ACTIVE_JOBS = int(os.getenv("MAX_ACTIVE_JOBS", 2))
+
+# Documents of one batch processed side by side (the batch holds one
+# upload slot; stages still share the CPU pool and the LLM rate limit)
+MAX_BATCH_PARALLEL = int(os.getenv("MAX_BATCH_PARALLEL", 4))
+
+
+# ---------------- LLM Rate Limits ----------------
+
+# Provider budgets (Groq free tier defaults)
+LLM_RPM = int(os.getenv("LLM_RPM", 30))
+LLM_TPM = int(os.getenv("LLM_TPM", 6000))
+
+# Completion tokens reserved per call on top of the prompt estimate
+LLM_OUTPUT_TOKENS = int(os.getenv("LLM_OUTPUT_TOKENS", 800))
+
+# Response format requested from the provider: "json_schema" (constrained
+# to FinancialData), "json_object" (plain JSON mode) or "text"
+LLM_OUTPUT_MODE = os.getenv("LLM_OUTPUT_MODE", "json_object")
+
+# Stream completions and parse rows as they arrive (Groq calls in JSON mode
+# are never streamed: Groq does not support it)
+LLM_STREAM = os.getenv("LLM_STREAM", "1") == "1"
+
+# Retries on 429 with exponential backoff
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 4))
+LLM_BACKOFF_SECONDS = float(os.getenv("LLM_BACKOFF_SECONDS", 2))
+
+
+# ---------------- Startup ----------------
+
+# Import the stage dependencies (PyMuPDF, Camelot, OpenCV, Tesseract,
+# openpyxl) in the background once the server is up, so the first upload
+# does not pay for them. Off: each stage imports on first use.
+WARMUP = os.getenv("WARMUP", "1") == "1"
+WARMUP_DELAY_SECONDS = float(os.getenv("WARMUP_DELAY_SECONDS", 1))
+
+
+# ---------------- Retention ----------------
+
+# Uploaded PDFs are only needed while a document is processed
+UPLOAD_TTL_HOURS = float(os.getenv("UPLOAD_TTL_HOURS", 24))
+
+# Workbooks untouched this long are removed (statement workbooks are
+# rebuilt from the stored result on the next download)
+OUTPUT_TTL_HOURS = float(os.getenv("OUTPUT_TTL_HOURS", 24 * 7))
+
+# uploads/ + outputs/ together; least recently used files go first
+STORAGE_QUOTA_MB = float(os.getenv("STORAGE_QUOTA_MB", 2048))
+
+# Files younger than this are never removed (saved but not yet picked up)
+RETENTION_GRACE_MINUTES = float(os.getenv("RETENTION_GRACE_MINUTES", 10))
+
+JANITOR_INTERVAL_SECONDS = float(os.getenv("JANITOR_INTERVAL_SECONDS", 600))
+
+
+# ---------------- LLM Cache ----------------
+
+LLM_CACHE_DB = os.path.join(DATA_DIR, "llm_cache.db")
+LLM_CACHE_TTL_DAYS = float(os.getenv("LLM_CACHE_TTL_DAYS", 30))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", 200))
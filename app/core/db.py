@@ -0,0 +1,23 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+
+
+@contextmanager
+def connect(path):
+    """
+    Short-lived SQLite connection: commits on success, always closes.
+    Cheap enough to open per call from the event loop, threads or pool processes.
+    """
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=30)
+
+    conn.row_factory = sqlite3.Row
+
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
@@ -0,0 +1,191 @@
+import json
+
+
+CLOSERS = {"{": "}", "[": "]"}
+
+SCALAR_CHARS = set("0123456789.-+eEtruefalsn")
+
+
+# ---------------- INCREMENTAL PARSER ----------------
+
+class IncrementalJSONParser:
+    """
+    Consumes a JSON object as it streams in.
+
+    feed(text) returns (index, element) for each element of `array_key`
+    (the statement "rows") completed by that piece, so callers can use rows before the response
+    ends. result() parses the whole text, repairing a truncated or garbled
+    tail by cutting back to the last complete value and closing what is
+    still open.
+    """
+
+    def __init__(self, array_key="rows"):
+
+        self.array_key = array_key
+
+        self.pos = 0            # chars scanned so far
+        self.started = False    # seen the opening "{"
+        self.closed = False     # object ended (or broke); ignore the rest
+        self.end = None         # end of a properly closed object
+        self.repaired = False   # result() had to cut / close the tail
+
+        self.stack = []         # open containers, "{" / "["
+        self.in_string = False
+        self.escape = False
+
+        self.last_string = None  # most recent string, to spot the key
+        self.string_start = None
+
+        self.array_depth = None  # depth of the array we stream from
+        self.item_start = None
+        self.item_index = 0
+
+        # (cut position, stack at that point) after each complete value
+        self.cuts = []
+
+        self.text = ""
+
+
+    def feed(self, piece):
+
+        self.text += piece
+
+        items = []
+
+        if self.closed:
+            return items
+
+        text = self.text
+
+
+        for i in range(self.pos, len(text)):
+
+            ch = text[i]
+
+
+            if not self.started:
+
+                # Skip prose / markdown fences before the object
+                if ch == "{":
+                    self.started = True
+                    self.start = i
+                    self.stack.append("{")
+
+                continue
+
+
+            if self.in_string:
+
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    self.last_string = text[self.string_start + 1:i]
+                    self._complete(i + 1)
+
+                continue
+
+
+            if ch == '"':
+                self.in_string = True
+                self.string_start = i
+
+            elif ch in CLOSERS:
+
+                if ch == "[" and self.last_string == self.array_key \
+                   and len(self.stack) == 1 and self.array_depth is None:
+                    self.array_depth = 2
+
+                self.stack.append(ch)
+
+                if self.array_depth is not None and len(self.stack) == self.array_depth + 1 \
+                   and self.stack[self.array_depth - 1] == "[":
+                    self.item_start = i
+
+            elif ch in "}]":
+
+                if not self.stack or CLOSERS[self.stack[-1]] != ch:
+                    # Mismatched bracket: nothing after this is trustworthy
+                    self.closed = True
+                    return items
+
+                self.stack.pop()
+
+
+                if self.item_start is not None and len(self.stack) == self.array_depth:
+
+                    try:
+                        items.append((self.item_index, json.loads(text[self.item_start:i + 1])))
+                    except ValueError:
+                        pass
+
+                    self.item_index += 1
+
+                    self.item_start = None
+
+
+                if self.array_depth is not None and len(self.stack) < self.array_depth:
+                    self.array_depth = -1   # array closed; stream nothing more
+
+
+                self._complete(i + 1)
+
+                if not self.stack:
+                    self.closed = True
+                    self.end = i + 1
+                    return items
+
+            elif ch in ", \n\r\t" and text[i - 1] in SCALAR_CHARS:
+                # A number / true / false / null just ended
+                self._complete(i)
+
+
+        self.pos = len(text)
+
+        return items
+
+
+    def _complete(self, end):
+
+        if self.stack:
+            self.cuts.append((end, tuple(self.stack)))
+
+
+    def result(self):
+        """
+        The parsed object, repaired when needed; None if nothing usable.
+        """
+
+        if not self.started:
+            return None
+
+        body = self.text[self.start:self.end]
+
+        try:
+            return json.loads(body)
+        except ValueError:
+            pass
+
+
+        # Only cut right after a complete value that sits in a container,
+        # latest first; the tail after it is dropped and brackets closed
+        for end, stack in reversed(self.cuts):
+
+            head = self.text[self.start:end].rstrip()
+
+            closing = "".join(CLOSERS[c] for c in reversed(stack))
+
+            try:
+                parsed = json.loads(head + closing)
+            except ValueError:
+                continue
+
+            if isinstance(parsed, dict):
+                self.repaired = True
+                return parsed
+
+
+        return None
+
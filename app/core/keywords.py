@@ -0,0 +1,173 @@
+import re
+
+
+# ---------------- TRIE REGEX ----------------
+
+def trie_regex(words):
+    """
+    One alternation for many literals with common prefixes factored out
+    ("cost", "costs", "cost of" -> cost(?:s| of)?), which Python's re
+    matches far faster than a flat a|b|c list. Longer words win at a position.
+    """
+
+    trie = {}
+
+    for w in words:
+
+        node = trie
+
+        for ch in w:
+            node = node.setdefault(ch, {})
+
+        node[""] = True
+
+
+    def build(node):
+
+        end = "" in node
+
+        branches = [
+            re.escape(ch) + build(child)
+            for ch, child in sorted(node.items())
+            if ch != ""
+        ]
+
+        if not branches:
+            return ""
+
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+        return f"(?:{body})?" if end else body
+
+
+    return build(trie)
+
+
+# ---------------- INDEX ----------------
+
+class KeywordIndex:
+    """
+    Several keyword vocabularies compiled once into a single pattern.
+
+    classify(line) scans the line once and returns every vocabulary with a
+    keyword in it - the same answer as `any(k in line for k in vocab)` per
+    vocabulary. Text is expected lowercase, like the vocabularies.
+    """
+
+    def __init__(self, vocabularies, word_boundary=False):
+
+        self.vocabularies = {
+            tag: [w.lower() for w in words]
+            for tag, words in vocabularies.items()
+        }
+
+        self.word_boundary = word_boundary
+
+        words = sorted({w for ws in self.vocabularies.values() for w in ws})
+
+        b = r"\b" if word_boundary else ""
+
+        self._pattern = re.compile(f"{b}(?:{trie_regex(words)}){b}")
+
+
+        owners = {}
+
+        for tag, ws in self.vocabularies.items():
+            for w in ws:
+                owners.setdefault(w, set()).add(tag)
+
+
+        # A match reports the longest keyword at its position; keywords
+        # inside it are present too, so it carries their tags as well
+        self._tags = {
+            w: frozenset(
+                t for p, tags in owners.items() if self._inside(p, w) for t in tags
+            )
+            for w in words
+        }
+
+
+        # Matches whose tail could start another keyword ("net cash" /
+        # "cash equivalent"): resume scanning inside them, not after
+        self._overlapping = {
+            w for w in words
+            if any(
+                k.startswith(w[j:]) and len(k) > len(w) - j
+                for j in range(1, len(w))
+                for k in words
+            )
+        }
+
+
+    def _inside(self, p, w):
+
+        start = w.find(p)
+
+        while start != -1:
+
+            end = start + len(p)
+
+            if not self.word_boundary:
+                return True
+
+            # With word boundaries "cost" is not inside "costs"
+            if (start == 0 or not _is_word(w[start - 1])) and \
+               (end == len(w) or not _is_word(w[end])):
+                return True
+
+            start = w.find(p, start + 1)
+
+        return False
+
+
+    def findall(self, text):
+        """
+        Longest keyword at each match position, scanning left to right.
+        """
+
+        found = []
+
+        pos = 0
+
+        search = self._pattern.search
+
+        while True:
+
+            m = search(text, pos)
+
+            if m is None:
+                return found
+
+            w = m.group()
+
+            found.append(w)
+
+            pos = m.start() + 1 if w in self._overlapping else m.end()
+
+
+    def search(self, text):
+
+        return self._pattern.search(text) is not None
+
+
+    def classify(self, text):
+
+        found = set()
+
+        for w in self.findall(text):
+            found |= self._tags[w]
+
+        return found
+
+
+    def longest(self, text):
+        """
+        Longest keyword anywhere in text, or None.
+        """
+
+        return max(self.findall(text), key=len, default=None)
+
+
+def _is_word(ch):
+
+    return ch.isalnum() or ch == "_"
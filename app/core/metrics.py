@@ -0,0 +1,213 @@
+import threading
+
+
+# Stage durations span a few ms (rules) to minutes (full OCR)
+STAGE_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1, 2.5, 5, 10, 30, 60, 120, 300
+)
+
+
+# ---------------- METRIC TYPES ----------------
+
+class Metric:
+    """
+    Minimal Prometheus metric: one series per label combination, rendered
+    in the text exposition format by render().
+    """
+
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+        self.series = {}
+
+        self.lock = threading.Lock()
+
+        REGISTRY.append(self)
+
+
+    def key(self, labels):
+
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+
+    def label_text(self, key, extra=()):
+
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+
+        if not pairs:
+            return ""
+
+        body = ",".join(f'{n}="{escape(v)}"' for n, v in pairs)
+
+        return "{" + body + "}"
+
+
+    def header(self):
+
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} {self.kind}"
+        ]
+
+
+class Counter(Metric):
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+
+        key = self.key(labels)
+
+        with self.lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+
+    def render(self):
+
+        with self.lock:
+            items = sorted(self.series.items())
+
+        return self.header() + [
+            f"{self.name}{self.label_text(k)} {v}" for k, v in items
+        ]
+
+
+class Histogram(Metric):
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=STAGE_BUCKETS):
+
+        super().__init__(name, help, labelnames)
+
+        self.buckets = tuple(sorted(buckets))
+
+
+    def observe(self, value, **labels):
+
+        key = self.key(labels)
+
+        with self.lock:
+
+            series = self.series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+
+            series[1] += value
+            series[2] += 1
+
+
+    def render(self):
+
+        lines = self.header()
+
+        with self.lock:
+            items = [(k, (list(c), t, n)) for k, (c, t, n) in sorted(self.series.items())]
+
+
+        for key, (counts, total, n) in items:
+
+            for bound, c in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{self.label_text(key, [('le', bound)])} {c}")
+
+            lines.append(f"{self.name}_bucket{self.label_text(key, [('le', '+Inf')])} {n}")
+            lines.append(f"{self.name}_sum{self.label_text(key)} {round(total, 6)}")
+            lines.append(f"{self.name}_count{self.label_text(key)} {n}")
+
+        return lines
+
+
+class Gauge(Metric):
+    """
+    Read at scrape time from a callback.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, help, fn):
+
+        super().__init__(name, help)
+
+        self.fn = fn
+
+
+    def render(self):
+
+        return self.header() + [f"{self.name} {self.fn()}"]
+
+
+def escape(value):
+
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# ---------------- REGISTRY ----------------
+
+REGISTRY = []
+
+
+def render():
+
+    lines = []
+
+    for metric in REGISTRY:
+        lines += metric.render()
+
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = Histogram(
+    "finance_stage_seconds",
+    "Time spent in each pipeline stage",
+    ["stage"]
+)
+
+DOCUMENTS = Counter(
+    "finance_documents_total",
+    "Documents processed, by outcome",
+    ["status"]
+)
+
+LLM_CALLS = Counter(
+    "finance_llm_calls_total",
+    "LLM completions, by outcome",
+    ["outcome"]
+)
+
+LLM_RETRIES = Counter(
+    "finance_llm_retries_total",
+    "LLM requests repeated, by reason",
+    ["reason"]
+)
+
+LLM_CACHE = Counter(
+    "finance_llm_cache_lookups_total",
+    "LLM response cache lookups, by result",
+    ["result"]
+)
+
+LLM_TOKENS = Counter(
+    "finance_llm_tokens_total",
+    "Tokens sent to / received from the LLM",
+    ["kind"]
+)
+
+STORAGE_RECLAIMED = Counter(
+    "finance_storage_reclaimed_bytes_total",
+    "Bytes removed from uploads/ and outputs/ by the janitor",
+    ["dir", "reason"]
+)
+
+STORAGE_REMOVED = Counter(
+    "finance_storage_files_removed_total",
+    "Files removed from uploads/ and outputs/ by the janitor",
+    ["dir", "reason"]
+)
@@ -0,0 +1,116 @@
+import threading
+import time
+
+
+# ---------------- TOKEN BUCKET ----------------
+
+class TokenBucket:
+    """
+    Classic token bucket refilled continuously at `per_minute` / 60 per second.
+    Not thread-safe on its own; RateLimiter guards it.
+    """
+
+    def __init__(self, per_minute):
+
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.fill_rate = per_minute / 60.0
+
+        self.updated = time.monotonic()
+
+
+    def refill(self, now):
+
+        elapsed = now - self.updated
+
+        self.level = min(self.capacity, self.level + elapsed * self.fill_rate)
+        self.updated = now
+
+
+    def wait_time(self, amount):
+
+        if self.level >= amount:
+            return 0.0
+
+        return (amount - self.level) / self.fill_rate
+
+
+    def take(self, amount):
+
+        # May go negative when reconciling actual usage
+        self.level -= amount
+
+
+# ---------------- LIMITER ----------------
+
+class RateLimiter:
+    """
+    Requests-per-minute + tokens-per-minute limiter shared by all LLM threads.
+    acquire() blocks the calling thread until both budgets allow the call.
+    """
+
+    def __init__(self, rpm, tpm):
+
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+
+        self.paused_until = 0.0
+
+        self._lock = threading.Lock()
+
+
+    def acquire(self, tokens=1):
+
+        # A single call larger than the bucket could never be admitted
+        tokens = min(tokens, self.tokens.capacity)
+
+        while True:
+
+            with self._lock:
+
+                now = time.monotonic()
+
+                self.requests.refill(now)
+                self.tokens.refill(now)
+
+                wait = max(
+                    self.paused_until - now,
+                    self.requests.wait_time(1),
+                    self.tokens.wait_time(tokens)
+                )
+
+                if wait <= 0:
+
+                    self.requests.take(1)
+                    self.tokens.take(tokens)
+
+                    return
+
+            time.sleep(wait)
+
+
+    def consume(self, tokens):
+        """
+        Charge extra tokens after the fact (actual usage above the estimate).
+        """
+
+        if tokens <= 0:
+            return
+
+        with self._lock:
+
+            self.tokens.refill(time.monotonic())
+            self.tokens.take(tokens)
+
+
+    def pause(self, seconds):
+        """
+        Stop admitting calls for `seconds` (provider returned 429).
+        """
+
+        with self._lock:
+
+            self.paused_until = max(
+                self.paused_until,
+                time.monotonic() + seconds
+            )
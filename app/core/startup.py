@@ -0,0 +1,196 @@
+"""
+Cold-start bookkeeping for the web process.
+
+The stage dependencies are imported lazily by the stages themselves, in
+the CPU pool workers; warmup() starts the pool in the background once the
+server is accepting requests, so the web process never loads them. The
+report says where startup time went.
+
+    python -m app.core.startup [--top 25]
+
+prints the import cost of `app.main` per module (python -X importtime).
+"""
+import argparse
+import asyncio
+import importlib
+import subprocess
+import sys
+import time
+
+# Imported first by app.main, so this is when the app started loading
+IMPORT_STARTED = time.perf_counter()
+
+from app.core.config import CPU_WORKERS, INLINE_CPU, WARMUP, WARMUP_DELAY_SECONDS
+from app.core.logger import logger
+
+
+# In pipeline order; each entry costs only what earlier ones did not load
+WARM_MODULES = [
+    "fitz",
+    "numpy",
+    "cv2",
+    "PIL.Image",
+    "pytesseract",
+    "camelot",
+    "openpyxl",
+    "httpx"
+]
+
+
+report = {
+    "import_seconds": None,
+    "ready_seconds": None,
+    "warmup_seconds": None,
+    "modules": {}
+}
+
+
+# ---------------- HELPERS ----------------
+
+def mark_imported():
+
+    report["import_seconds"] = round(time.perf_counter() - IMPORT_STARTED, 4)
+
+
+def mark_ready():
+
+    report["ready_seconds"] = round(time.perf_counter() - IMPORT_STARTED, 4)
+
+    logger.info(
+        f"Startup: app imported in {report['import_seconds']:.2f}s, "
+        f"ready in {report['ready_seconds']:.2f}s"
+    )
+
+
+def warm_imports(modules=WARM_MODULES):
+    """
+    Import each module; returns {module: seconds}. Run by each CPU pool
+    worker as it starts (workers._init_cpu_worker).
+    """
+
+    timings = {}
+
+    for name in modules:
+
+        start = time.perf_counter()
+
+        try:
+            importlib.import_module(name)
+
+        except ImportError as e:
+            logger.warning(f"Warmup: cannot import {name}: {e}")
+            continue
+
+        timings[name] = round(time.perf_counter() - start, 4)
+
+
+    return timings
+
+
+def worker_modules():
+    """
+    Import timings of the CPU pool worker this runs in.
+    """
+
+    return report["modules"]
+
+
+async def warmup():
+    """
+    Background task from main.lifespan: after the server is listening,
+    start the CPU pool, whose workers import the stage dependencies, so
+    the first upload finds them ready. With INLINE_CPU the stages run in
+    this process, so the imports happen here.
+    """
+
+    if not WARMUP:
+        return
+
+    from app.core.workers import run_cpu
+
+    await asyncio.sleep(WARMUP_DELAY_SECONDS)
+
+    start = time.perf_counter()
+
+    try:
+
+        if INLINE_CPU:
+            report["modules"] = await run_cpu(warm_imports)
+
+        else:
+            # One call per worker: the pool starts a process for each call
+            # that finds no idle one
+            timings = await asyncio.gather(*(run_cpu(worker_modules) for _ in range(CPU_WORKERS)))
+
+            report["modules"] = timings[0]
+
+    except Exception:
+        logger.exception("Warmup failed")
+        return
+
+
+    report["warmup_seconds"] = round(time.perf_counter() - start, 4)
+
+    breakdown = ", ".join(
+        f"{name} {seconds:.2f}s"
+        for name, seconds in sorted(report["modules"].items(), key=lambda kv: -kv[1])
+    )
+
+    logger.info(f"Warmup done in {report['warmup_seconds']:.2f}s ({breakdown})")
+
+
+# ---------------- IMPORT REPORT ----------------
+
+def import_costs(module="app.main"):
+    """
+    [(cumulative_us, self_us, module)] from a fresh interpreter importing
+    module under -X importtime.
+    """
+
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True
+    )
+
+    costs = []
+
+    for line in out.stderr.splitlines():
+
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+
+        costs.append((int(cumulative_us), int(self_us), name.rstrip()))
+
+
+    return costs
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(prog="python -m app.core.startup")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args(argv)
+
+    costs = import_costs(args.module)
+
+    if not costs:
+        print(f"Could not import {args.module}")
+        return 1
+
+
+    total = next((c for c, _, name in costs if name.strip() == args.module), max(costs)[0])
+
+    print(f"import {args.module}: {total / 1e6:.3f}s\n")
+    print(f"{'cumulative ms':>14}{'self ms':>10}  module")
+
+    for cumulative, own, name in sorted(costs, reverse=True)[:args.top]:
+        print(f"{cumulative / 1000:>14.1f}{own / 1000:>10.1f}  {name}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
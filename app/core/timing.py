@@ -0,0 +1,138 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from app.core.metrics import STAGE_SECONDS
+
+
+_current = contextvars.ContextVar("stage_timer", default=None)
+
+
+# ---------------- TIMER ----------------
+
+class StageTimer:
+    """
+    Monotonic stage timings for one document. Stages may repeat (one
+    record per OCR page / LLM call); summary() totals them per stage.
+    """
+
+    def __init__(self):
+
+        self.started = time.perf_counter()
+
+        self.records = []
+
+        self.lock = threading.Lock()
+
+
+    def add(self, stage, seconds):
+
+        with self.lock:
+            self.records.append((stage, seconds))
+
+
+    def extend(self, records):
+
+        with self.lock:
+            self.records.extend(records)
+
+
+    def summary(self):
+
+        stages = {}
+
+        with self.lock:
+            records = list(self.records)
+
+        for stage, seconds in records:
+
+            entry = stages.setdefault(stage, {"seconds": 0.0, "count": 0})
+
+            entry["seconds"] += seconds
+            entry["count"] += 1
+
+
+        for entry in stages.values():
+            entry["seconds"] = round(entry["seconds"], 4)
+
+        return {
+            "total_seconds": round(time.perf_counter() - self.started, 4),
+            "stages": stages
+        }
+
+
+# ---------------- HELPERS ----------------
+
+@contextmanager
+def collect():
+    """
+    Timer for the current request. Nested calls share the outer timer; the
+    outermost one feeds /metrics when it closes.
+    """
+
+    timer = _current.get()
+
+    if timer is not None:
+        yield timer
+        return
+
+
+    timer = StageTimer()
+
+    token = _current.set(timer)
+
+    try:
+        yield timer
+
+    finally:
+
+        _current.reset(token)
+
+        for stage, seconds in timer.records:
+            STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+def record(stage, seconds):
+
+    timer = _current.get()
+
+    if timer is not None:
+        timer.add(stage, seconds)
+
+
+@contextmanager
+def timed(stage):
+
+    start = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+def call_timed(fn, args, kwargs):
+    """
+    Run fn in a pool worker under a fresh timer and ship the records back
+    with the result (see workers.run_cpu).
+    """
+
+    timer = StageTimer()
+
+    token = _current.set(timer)
+
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        _current.reset(token)
+
+    return result, timer.records
+
+
+def merge(records):
+
+    timer = _current.get()
+
+    if timer is not None:
+        timer.extend(records)
@@ -0,0 +1,49 @@
+import re
+
+from app.core.logger import logger
+
+
+# Rough BPE shape when tiktoken is unavailable: words, 1-3 digit groups,
+# single punctuation marks
+TOKEN_RE = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+
+_encoding = None
+_loaded = False
+
+
+def _get_encoding():
+
+    global _encoding, _loaded
+
+    if not _loaded:
+
+        _loaded = True
+
+        try:
+            import tiktoken
+
+            # Llama 3 uses a tiktoken BPE close to cl100k in density
+            _encoding = tiktoken.get_encoding("cl100k_base")
+
+        except Exception as e:
+
+            logger.info(f"tiktoken unavailable ({e}); using regex token estimate")
+
+    return _encoding
+
+
+def count_tokens(text):
+    """
+    Token count for budgeting prompts: tiktoken when installed,
+    otherwise a regex estimate (within ~10% on statement text).
+    """
+
+    if not text:
+        return 0
+
+    enc = _get_encoding()
+
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+
+    return len(TOKEN_RE.findall(text))
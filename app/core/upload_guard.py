@@ -0,0 +1,149 @@
+from starlette.responses import JSONResponse
+
+from app.core.config import MAX_UPLOAD_MB, MAX_UPLOAD_BYTES, MAX_BATCH_MB, MAX_BATCH_BYTES
+from app.core.logger import logger
+from app.core.workers import upload_gate
+
+
+# Room for the multipart envelope around the file itself
+MULTIPART_SLACK = 64 * 1024
+
+
+# POST path -> (body limit in bytes, limit in MB for the message, admit).
+# Routes that admit take an upload slot before their body is read; jobs
+# queue instead.
+UPLOAD_ROUTES = {
+    "/upload": (MAX_UPLOAD_BYTES, MAX_UPLOAD_MB, True),
+    "/batch": (MAX_BATCH_BYTES, MAX_BATCH_MB, True),
+    "/jobs": (MAX_UPLOAD_BYTES, MAX_UPLOAD_MB, False)
+}
+
+
+def too_large(limit_mb):
+
+    return JSONResponse(
+        status_code=413,
+        content={
+            "status": "error",
+            "message": f"File exceeds the {limit_mb} MB limit"
+        }
+    )
+
+
+def busy_response():
+
+    return JSONResponse(
+        status_code=429,
+        headers={"Retry-After": "30"},
+        content={
+            "status": "error",
+            "message": "Server is busy processing other reports. Please retry shortly."
+        }
+    )
+
+
+class UploadGuard:
+    """
+    ASGI middleware for the upload routes, run before Starlette reads (and
+    spools) the multipart body:
+    - a saturated server answers 429 without taking the body; the slot
+      taken here is held until the response is sent
+    - a Content-Length over the limit is answered 413 straight away
+    - without one (chunked), bytes are counted as they arrive and the
+      request is cut off with 413 once past the limit
+    """
+
+    def __init__(self, app, routes=None):
+
+        self.app = app
+        self.routes = UPLOAD_ROUTES if routes is None else routes
+
+
+    async def __call__(self, scope, receive, send):
+
+        route = None
+
+        if scope["type"] == "http" and scope["method"] == "POST":
+            route = self.routes.get(scope["path"])
+
+        if route is None:
+            return await self.app(scope, receive, send)
+
+
+        limit, limit_mb, admit = route
+
+        limit += MULTIPART_SLACK
+
+
+        # ---------- Declared Size ----------
+
+        headers = dict(scope["headers"])
+
+        length = headers.get(b"content-length", b"").decode("latin-1")
+
+        if length.isdigit() and int(length) > limit:
+            return await too_large(limit_mb)(scope, receive, send)
+
+
+        # ---------- Admission ----------
+
+        if admit and not upload_gate.try_admit():
+
+            logger.warning(f"Upload rejected: worker pool saturated ({scope['path']})")
+
+            return await busy_response()(scope, receive, send)
+
+
+        # ---------- Streamed Size ----------
+
+        received = 0
+
+        rejected = False
+
+
+        async def limited_receive():
+
+            nonlocal received, rejected
+
+            if rejected:
+                return {"type": "http.disconnect"}
+
+            message = await receive()
+
+            if message["type"] == "http.request":
+
+                received += len(message.get("body", b""))
+
+                if received > limit:
+
+                    logger.warning(f"Upload rejected: body over {limit_mb} MB ({scope['path']})")
+
+                    rejected = True
+
+                    await too_large(limit_mb)(scope, receive, send)
+
+                    # The handler sees a client that went away
+                    return {"type": "http.disconnect"}
+
+            return message
+
+
+        async def guarded_send(message):
+
+            # Our 413 is the response; whatever the handler answers is dropped
+            if not rejected:
+                await send(message)
+
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+
+        except Exception:
+
+            if not rejected:
+                raise
+
+        finally:
+
+            if admit:
+                upload_gate.release()
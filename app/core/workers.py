@@ -0,0 +1,249 @@
+import asyncio
+import contextvars
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from app.core.config import (
+    CPU_WORKERS,
+    DISK_WORKERS,
+    INLINE_CPU,
+    LLM_WORKERS,
+    MAX_ACTIVE_JOBS,
+    MAX_ACTIVE_UPLOADS,
+    MAX_QUEUED_UPLOADS,
+    PAGE_WORKERS
+)
+from app.core.logger import logger
+from app.core import timing
+
+
+# ---------------- POOLS ----------------
+
+_cpu_pool = None
+_io_pool = None
+_disk_pool = None
+
+
+def _init_cpu_worker():
+
+    from app.core import startup
+
+    # One tesseract thread per process; the pool provides the parallelism
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+    startup.report["modules"] = startup.warm_imports()
+
+
+def get_cpu_pool():
+
+    global _cpu_pool
+
+    if _cpu_pool is None:
+
+        logger.info(f"Starting CPU pool with {CPU_WORKERS} workers")
+
+        # Spawned, not forked: a fork would copy the running server (event
+        # loop, thread pools, open sockets and SQLite handles). Each worker
+        # imports the stage modules when it starts.
+        _cpu_pool = ProcessPoolExecutor(
+            max_workers=CPU_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_cpu_worker
+        )
+
+    return _cpu_pool
+
+
+def get_disk_pool():
+
+    global _disk_pool
+
+    if _disk_pool is None:
+
+        logger.info(f"Starting disk thread pool with {DISK_WORKERS} workers")
+
+        _disk_pool = ThreadPoolExecutor(
+            max_workers=DISK_WORKERS,
+            thread_name_prefix="disk"
+        )
+
+    return _disk_pool
+
+
+def get_io_pool():
+
+    global _io_pool
+
+    if _io_pool is None:
+
+        logger.info(f"Starting LLM thread pool with {LLM_WORKERS} workers")
+
+        _io_pool = ThreadPoolExecutor(
+            max_workers=LLM_WORKERS,
+            thread_name_prefix="llm"
+        )
+
+    return _io_pool
+
+
+async def run_cpu(fn, *args, **kwargs):
+    """
+    Run a CPU-bound stage (Camelot, OCR, Excel) in the process pool.
+    fn and its arguments must be picklable. Stage timings recorded inside
+    the worker are added to the caller's timer.
+    """
+
+    loop = asyncio.get_running_loop()
+
+    # Already inside a worker process (CLI): no nested pool
+    pool = None if INLINE_CPU else get_cpu_pool()
+
+    result, records = await loop.run_in_executor(
+        pool,
+        partial(timing.call_timed, fn, args, kwargs)
+    )
+
+    timing.merge(records)
+
+    return result
+
+
+async def map_cpu(fn, calls, on_done=None):
+    """
+    run_cpu over the pages of one document: fn(*args) for each tuple in
+    calls, at most PAGE_WORKERS in the pool at once so other documents'
+    stages still get a turn (one at a time with INLINE_CPU: PyMuPDF is not
+    safe across threads). on_done(finished, total) is awaited after each
+    call. Results come back in call order.
+    """
+
+    slots = asyncio.Semaphore(1 if INLINE_CPU else max(1, PAGE_WORKERS))
+
+    finished = 0
+
+
+    async def one(args):
+
+        nonlocal finished
+
+        async with slots:
+            result = await run_cpu(fn, *args)
+
+        finished += 1
+
+        if on_done:
+            await on_done(finished, len(calls))
+
+        return result
+
+
+    return list(await asyncio.gather(*(one(args) for args in calls)))
+
+
+async def run_io(fn, *args, **kwargs):
+    """
+    Run a blocking LLM request in the thread pool.
+    The caller's context (its stage timer) goes along to the thread.
+    """
+
+    loop = asyncio.get_running_loop()
+
+    ctx = contextvars.copy_context()
+
+    return await loop.run_in_executor(
+        get_io_pool(),
+        partial(ctx.run, fn, *args, **kwargs)
+    )
+
+
+async def run_disk(fn, *args, **kwargs):
+    """
+    Like run_io, for file I/O and SQLite: its own threads, so saving an
+    upload or reading a job's status never queues behind LLM calls.
+    """
+
+    loop = asyncio.get_running_loop()
+
+    ctx = contextvars.copy_context()
+
+    return await loop.run_in_executor(
+        get_disk_pool(),
+        partial(ctx.run, fn, *args, **kwargs)
+    )
+
+
+def shutdown_workers():
+
+    global _cpu_pool, _io_pool, _disk_pool
+
+    if _cpu_pool is not None:
+        _cpu_pool.shutdown(wait=False, cancel_futures=True)
+        _cpu_pool = None
+
+    if _io_pool is not None:
+        _io_pool.shutdown(wait=False, cancel_futures=True)
+        _io_pool = None
+
+    if _disk_pool is not None:
+        _disk_pool.shutdown(wait=False, cancel_futures=True)
+        _disk_pool = None
+
+
+# ---------------- ADMISSION ----------------
+
+class AdmissionGate:
+    """
+    Bounds how many uploads run at once and how many may wait for a slot.
+    Callers that cannot be admitted should be answered with 429.
+    """
+
+    def __init__(self, max_active, max_queued):
+
+        self.max_active = max_active
+        self.max_admitted = max_active + max_queued
+
+        self.admitted = 0
+
+        self._slots = asyncio.Semaphore(max_active)
+
+
+    def try_admit(self):
+
+        if self.admitted >= self.max_admitted:
+            return False
+
+        self.admitted += 1
+
+        return True
+
+
+    def release(self):
+
+        self.admitted = max(0, self.admitted - 1)
+
+
+    @property
+    def queued(self):
+
+        return max(0, self.admitted - self.max_active)
+
+
+    async def __aenter__(self):
+
+        await self._slots.acquire()
+
+        return self
+
+
+    async def __aexit__(self, *exc):
+
+        self._slots.release()
+
+
+upload_gate = AdmissionGate(MAX_ACTIVE_UPLOADS, MAX_QUEUED_UPLOADS)
+
+# Jobs are accepted whatever the load (they wait in SQLite), so they take
+# slots of their own rather than the upload gate's
+job_slots = asyncio.Semaphore(MAX_ACTIVE_JOBS)
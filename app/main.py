@@ -1,14 +1,71 @@
+# First, so the startup report measures the whole app import
+from app.core import startup
+
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.api.upload import router
+from app.api.jobs import router as jobs_router, resume_jobs
+from app.api.batch import router as batch_router
+from app.api.metrics import router as metrics_router
+from app.api.outputs import router as outputs_router
+from app.api.statements import router as statements_router
+from app.core.upload_guard import UploadGuard
+from app.core.workers import shutdown_workers
+from app.services import janitor, job_store, result_store, statement_store
 
 import os
 
-app = FastAPI(title="AI Financial Research Tool")
+
+@asynccontextmanager
+async def lifespan(app):
+
+    job_store.init_db()
+    result_store.init_db()
+    statement_store.init_db()
+
+    # Results stored before the statement index (or its current schema)
+    # existed; runs once, not on every start
+    if not statement_store.index_ready():
+        statement_store.backfill(result_store.all_results())
+
+    resume_jobs()
+
+    # Retention / disk quota for uploads/ and outputs/
+    cleanup = asyncio.create_task(janitor.run_forever())
+
+    # Heavy stage imports happen in the background, not before the first byte
+    warmup = asyncio.create_task(startup.warmup())
+
+    startup.mark_ready()
+
+    yield
+
+    warmup.cancel()
+    cleanup.cancel()
+
+    shutdown_workers()
+
+
+app = FastAPI(title="AI Financial Research Tool", lifespan=lifespan)
+
+
+# Admission and size limits for uploads, before the body is read
+app.add_middleware(UploadGuard)
+
 
 app.include_router(router)
+app.include_router(jobs_router)
+app.include_router(batch_router)
+app.include_router(metrics_router)
+app.include_router(statements_router)
+
+# Before the static mount: missing statement workbooks are built on demand
+app.include_router(outputs_router)
 
 app.mount("/outputs", StaticFiles(directory="outputs"), name="outputs")
 
@@ -34,3 +91,5 @@ def home():
         print("ERROR:", e)
         return "<h1>ERROR LOADING HTML</h1>"
 
+
+startup.mark_imported()
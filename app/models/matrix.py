@@ -0,0 +1,209 @@
+import string
+
+import numpy as np
+
+
+MISSING = "MISSING"
+
+
+# Multiplier from a statement's unit to plain currency units
+UNIT_SCALE = {
+    "thousand": 1e3,
+    "lakh": 1e5,
+    "million": 1e6,
+    "crore": 1e7,
+    "billion": 1e9
+}
+
+
+# Currency symbols and ASCII letters are dropped from a cell ("₹1,234Cr")
+STRIP_CHARS = str.maketrans("", "", "₹$€" + string.ascii_letters)
+
+
+# ---------------- PARSING ----------------
+
+def unit_scale(unit):
+
+    unit = str(unit or "").lower()
+
+    return next((f for name, f in UNIT_SCALE.items() if name in unit), 1.0)
+
+
+def numeric(s):
+    """
+    Mask of cells that are plain numbers: -?digits(.digits)?
+    """
+
+    negative = np.char.startswith(s, "-")
+
+    unsigned = np.char.lstrip(s, "-")
+
+    return (
+        (np.char.count(s, "-") == negative)
+        & (np.char.count(s, ".") <= 1)
+        & ~np.char.startswith(unsigned, ".")
+        & ~np.char.endswith(s, ".")
+        & np.char.isdecimal(np.char.replace(unsigned, ".", ""))
+    )
+
+
+def parse_cells(cells):
+    """
+    Numbers from raw statement cells, all at once.
+    "1,234" -> 1234, "(56)" -> -56, "₹12.5" -> 12.5; dashes, blanks,
+    None and anything else that is not a plain number are missing. Only
+    symbols and letters are dropped, so "₹ 12.5" (space left after the
+    symbol) is missing too.
+    Returns (float64 values, bool missing mask, text): text is the cleaned
+    number as written ("1234.50", MISSING), so API output keeps every
+    digit whatever float64 can hold.
+    """
+
+    s = np.asarray(cells, dtype=str).reshape(-1)
+
+    if not s.size:
+        return np.zeros(0), np.zeros(0, dtype=bool), np.zeros(0, dtype=str)
+
+
+    s = np.char.replace(np.char.strip(s), ",", "")
+
+
+    # (1234) -> -1234
+    bracketed = np.char.startswith(s, "(") & np.char.endswith(s, ")")
+
+    if bracketed.any():
+        inner = np.char.rpartition(np.char.partition(s[bracketed], "(")[..., 2], ")")[..., 0]
+        s[bracketed] = np.char.add("-", inner)
+
+
+    valid = numeric(s)
+
+
+    # Currency symbols and words ("₹ 12", "12 Cr") only on the cells that
+    # need it: str.translate runs per cell
+    rest = ~valid & (s != "") & (s != MISSING)
+
+    if rest.any():
+
+        s[rest] = np.char.translate(s[rest], STRIP_CHARS)
+
+        valid[rest] = numeric(s[rest])
+
+
+    values = np.full(s.shape, np.nan)
+
+    values[valid] = s[valid].astype(np.float64)
+
+    text = np.where(valid, s, MISSING)
+
+    return values, ~valid, text
+
+
+# ---------------- STATEMENT ----------------
+
+class StatementMatrix:
+    """
+    One extracted statement: row names, period labels (years) and a
+    rows × periods float matrix with a mask of missing cells.
+    Values are in the statement's unit; scale converts them to plain
+    currency units. text holds each cell as written, for the API. Dict
+    rows with string values only exist at the edges: from_statement reads
+    them, to_rows writes them.
+    """
+
+    def __init__(self, currency, unit, names, years, values, missing, text):
+
+        self.currency = currency
+        self.unit = unit
+        self.names = names
+        self.years = years
+        self.values = values
+        self.missing = missing
+        self.text = text
+
+        self.scale = unit_scale(unit)
+
+
+    @classmethod
+    def from_statement(cls, raw):
+        """
+        From the {"currency", "unit", "years", "rows"} shape shared by the
+        extractors, the LLM and stored results. Values for periods outside
+        "years" are dropped; periods a row lacks are missing.
+        """
+
+        years = [str(y) for y in raw.get("years", [])]
+
+        rows = raw.get("rows", [])
+
+        names = [str(row["name"]) for row in rows]
+
+
+        cells = []
+
+        for row in rows:
+
+            found = {str(k): v for k, v in row.get("values", {}).items()}
+
+            cells += [found.get(y) for y in years]
+
+
+        values, missing, text = parse_cells(cells)
+
+        shape = (len(names), len(years))
+
+
+        return cls(
+            currency=str(raw.get("currency") or "UNKNOWN"),
+            unit=str(raw.get("unit") or "UNKNOWN"),
+            names=names,
+            years=years,
+            values=values.reshape(shape),
+            missing=missing.reshape(shape),
+            text=text.reshape(shape)
+        )
+
+
+    def __len__(self):
+
+        return len(self.names)
+
+
+    def row_index(self, name):
+
+        try:
+            return self.names.index(name)
+        except ValueError:
+            return None
+
+
+    def absolute(self):
+        """
+        Values in plain currency units (NaN where missing).
+        """
+
+        return self.values * self.scale
+
+
+    def cells(self, i):
+        """
+        Row i for a spreadsheet: ints for whole numbers, floats, MISSING.
+        """
+
+        return [
+            MISSING if gap else (int(v) if v.is_integer() else v)
+            for v, gap in zip(self.values[i].tolist(), self.missing[i].tolist())
+        ]
+
+
+    def to_rows(self):
+        """
+        [{"name", "values": {year: "1234" | "MISSING"}}], the API shape.
+        """
+
+        text = self.text.tolist()
+
+        return [
+            {"name": name, "values": dict(zip(self.years, row))}
+            for name, row in zip(self.names, text)
+        ]
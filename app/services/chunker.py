@@ -0,0 +1,158 @@
+from app.core.config import LLM_CHUNK_TOKENS
+from app.core.logger import logger
+from app.core.tokens import count_tokens
+
+from app.services.pdf_service import INCOME_HEADINGS, SECTION_BREAKS, _matches_any
+from app.services.rule_extractor import PERIOD_RE
+
+
+# Chunks smaller than this are folded into the previous one
+MIN_CHUNK_TOKENS = 60
+
+
+# ---------------- HELPERS ----------------
+
+def find_header(lines):
+    """
+    The period header row ("Particulars  2024  2023"), so every chunk can
+    repeat it. Period-only lines in a row are joined into one header.
+    """
+
+    run = []
+
+    for line in lines:
+
+        stripped = line.strip().strip('"')
+
+        if PERIOD_RE.fullmatch(stripped):
+            run.append(stripped)
+            continue
+
+        if len(run) >= 2:
+            return "  ".join(run)
+
+        run = []
+
+        if len(set(PERIOD_RE.findall(line))) >= 2 and len(line) < 120:
+            return line.strip()
+
+
+    if len(run) >= 2:
+        return "  ".join(run)
+
+    return None
+
+
+def is_section_start(line):
+
+    l = line.strip()
+
+    # Headings are short; long lines merely mention them
+    if not l or len(l) > 100:
+        return False
+
+    return _matches_any(l, INCOME_HEADINGS) or _matches_any(l, SECTION_BREAKS)
+
+
+def split_units(text, source):
+    """
+    Indivisible pieces: whole Camelot tables (blank-line separated CSV),
+    or single lines for native / OCR text.
+    """
+
+    if source == "tables":
+        return [b.strip("\n") for b in text.split("\n\n") if b.strip()]
+
+    return [l for l in text.split("\n") if l.strip()]
+
+
+# ---------------- CHUNKER ----------------
+
+def chunk_text(text, source="text", budget=None):
+    """
+    Pack whole lines (or whole tables) into chunks of at most `budget`
+    tokens, starting a new chunk at statement headings and repeating the
+    period header row at the top of each chunk.
+    """
+
+    budget = budget or LLM_CHUNK_TOKENS
+
+    units = split_units(text, source)
+
+    header = find_header(text.split("\n"))
+
+    header_tokens = count_tokens(header) + 1 if header else 0
+
+
+    chunks = []
+
+    current = []
+    used = 0
+
+
+    def flush():
+
+        nonlocal current, used
+
+        if not current:
+            return
+
+        if header:
+            current.insert(0, header)
+
+        chunks.append("\n".join(current))
+
+        current = []
+        used = 0
+
+
+    for unit in units:
+
+        # A table bigger than the budget is packed line by line instead
+        if source == "tables" and count_tokens(unit) + header_tokens > budget:
+            pieces = unit.split("\n")
+        else:
+            pieces = [unit]
+
+
+        for piece in pieces:
+
+            # The header is added to every chunk by flush()
+            if header and piece.strip() == header:
+                continue
+
+            size = count_tokens(piece) + 1
+
+            new_section = (
+                source != "tables"
+                and used > MIN_CHUNK_TOKENS
+                and is_section_start(piece)
+            )
+
+            if current and (used + size + header_tokens > budget or new_section):
+                flush()
+
+            current.append(piece)
+            used += size
+
+
+    flush()
+
+
+    # Fold a tiny trailing chunk into the one before it
+    if len(chunks) > 1 and count_tokens(chunks[-1]) < MIN_CHUNK_TOKENS + header_tokens:
+
+        tail = chunks.pop()
+
+        if header:
+            tail = tail.replace(header + "\n", "", 1)
+
+        chunks[-1] += "\n" + tail
+
+
+    logger.info(
+        f"Split into {len(chunks)} LLM chunks "
+        f"(budget {budget} tokens, header {'repeated' if header else 'not found'})"
+    )
+
+    return chunks
@@ -0,0 +1,153 @@
+import csv
+import re
+
+from app.core.logger import logger
+
+from app.services.rule_extractor import NUMBER_RE, PERIOD_RE, split_cells
+
+
+# Below this many numeric rows the raw text is safer to send as-is
+MIN_COMPACT_ROWS = 3
+
+# Day / month in a header date: "31" (31 March 2024), "31.03" (31.03.2024)
+DATE_PART_RE = re.compile(r"\d{1,2}(?:[./]\d{1,2})?")
+
+
+# ---------------- HELPERS ----------------
+
+def split_row(line):
+    """
+    Label + numbers for a line that may be Camelot CSV or plain text.
+    CSV is only trusted when label cells are followed by clean numbers only,
+    so the thousands separators in "Revenue 12,345 11,000" are not read
+    as cell boundaries.
+    """
+
+    if "," in line:
+
+        cells = [c.strip() for c in next(csv.reader([line]), []) if c.strip()]
+
+        first = next((i for i, c in enumerate(cells) if NUMBER_RE.fullmatch(c)), 0)
+
+        if first and not any(c[-1].isdigit() for c in cells[:first]) \
+           and all(NUMBER_RE.fullmatch(c) for c in cells[first:]):
+            return split_cells(line, csv_mode=True)
+
+    return split_cells(line)
+
+
+def is_header(nums, periods):
+    """
+    Numbers of a header or title line: periods only, or dates made of
+    day / month parts and the statement's periods. A row that merely has a
+    value equal to a period ("Interest 2024 1,500") is not one.
+    """
+
+    cells = [n.strip("()") for n in nums]
+
+    found = [c for c in cells if PERIOD_RE.fullmatch(c)]
+
+    if not found:
+        return False
+
+    if len(found) == len(cells):
+        return True
+
+    return all(c in periods for c in found) and all(
+        DATE_PART_RE.fullmatch(c) for c in cells if c not in found
+    )
+
+
+def find_periods(lines):
+
+    for line in lines:
+
+        found = list(dict.fromkeys(PERIOD_RE.findall(line)))
+
+        if len(found) >= 2 and len(line) < 120:
+            return found
+
+    return []
+
+
+# ---------------- COMPACTOR ----------------
+
+def compact_rows(text):
+    """
+    Dense "label | v1 | v2" form of a statement: one line per numeric row,
+    prose dropped, a single "Particulars | <periods>" header on top.
+    Returns None when too few rows were found to trust the result.
+    """
+
+    lines = [l for l in text.split("\n") if l.strip()]
+
+    periods = find_periods(lines)
+
+
+    rows = []
+
+    pending = None
+
+
+    for line in lines:
+
+        label, nums = split_row(line)
+
+
+        # Header rows are represented once, at the top; titles such as
+        # "for the year ended 31 March 2024" go with them
+        if nums and is_header(nums, periods):
+            continue
+
+
+        # Values printed on the line(s) after their label
+        if not label and nums:
+
+            if pending is not None:
+                pending[1].extend(nums)
+
+            continue
+
+
+        if pending is not None and pending[1]:
+            rows.append(pending)
+
+        pending = None
+
+
+        if not label:
+            continue
+
+        if nums:
+            rows.append((label, nums))
+        else:
+            pending = (label, [])
+
+
+    if pending is not None and pending[1]:
+        rows.append(pending)
+
+
+    if len(rows) < MIN_COMPACT_ROWS:
+        return None
+
+
+    out = []
+
+    if periods:
+        out.append(" | ".join(["Particulars"] + periods))
+
+    for label, nums in rows:
+
+        # Leading extras are usually note references
+        if periods and len(nums) > len(periods):
+            nums = nums[-len(periods):]
+
+        out.append(" | ".join([label] + nums))
+
+
+    compact = "\n".join(out)
+
+    logger.info(f"Compacted {len(text)} chars to {len(compact)} ({len(rows)} rows)")
+
+    return compact
@@ -0,0 +1,125 @@
+# app/services/document.py
+from collections import OrderedDict
+
+from app.core.logger import logger
+
+
+# Rendered pages are large (~9 MB at 300 dpi), so only keep a few
+MAX_CACHED_IMAGES = 4
+
+
+class PdfDocument:
+    """
+    One open PDF shared by every stage of a request.
+    Native page text, text-presence flags and rendered pages are computed
+    on first use and memoized, so no stage re-opens or re-parses the file.
+    """
+
+    def __init__(self, path):
+
+        self.path = path
+
+        self._doc = None
+        self._texts = {}
+        self._images = OrderedDict()
+
+
+    # ---------- Lifecycle ----------
+
+    @property
+    def doc(self):
+
+        if self._doc is None:
+
+            import fitz  # PyMuPDF, loaded with the first document
+
+            logger.info(f"Opening PDF {self.path}")
+
+            self._doc = fitz.open(self.path)
+
+        return self._doc
+
+
+    def close(self):
+
+        if self._doc is not None:
+            self._doc.close()
+
+        self._doc = None
+        self._images.clear()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+    def __len__(self):
+        return len(self.doc)
+
+
+    # ---------- Text ----------
+
+    def page_text(self, i):
+
+        if i not in self._texts:
+
+            try:
+                txt = self.doc[i].get_text()
+            except Exception:
+                txt = ""
+
+            self._texts[i] = txt or ""
+
+        return self._texts[i]
+
+
+    def page_texts(self):
+
+        return [self.page_text(i) for i in range(len(self))]
+
+
+    def has_text(self, i, min_chars=100):
+
+        return len(self.page_text(i).strip()) > min_chars
+
+
+    # ---------- Images ----------
+
+    def page_pixmap(self, i, dpi=300, gray=False, top=None):
+        """
+        Rendered page. top (0-1] renders only that upper fraction of the page.
+        """
+
+        key = (i, dpi, gray, top)
+
+        if key in self._images:
+
+            self._images.move_to_end(key)
+
+            return self._images[key]
+
+
+        import fitz
+
+        colorspace = fitz.csGRAY if gray else fitz.csRGB
+
+        page = self.doc[i]
+
+        clip = None
+
+        if top:
+            r = page.rect
+            clip = fitz.Rect(r.x0, r.y0, r.x1, r.y0 + r.height * top)
+
+        pix = page.get_pixmap(dpi=dpi, colorspace=colorspace, clip=clip)
+
+        self._images[key] = pix
+
+        if len(self._images) > MAX_CACHED_IMAGES:
+            self._images.popitem(last=False)
+
+        return pix
@@ -1,78 +1,139 @@
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
-from openpyxl.utils import get_column_letter
+import os
+import re
+from functools import lru_cache
 
 from app.core.config import OUTPUT_DIR
+from app.core.keywords import KeywordIndex
+from app.services.rule_extractor import match_canonical
 
 
-def export_excel(data, file_id):
+# ---------- Important Keywords ----------
 
-    wb = Workbook()
-    ws = wb.active
+IMPORTANT_KEYWORDS = [
+    "revenue",
+    "total",
+    "profit",
+    "ebitda",
+    "income",
+    "expense"
+]
 
-    ws.title = "Income Statement"
+IMPORTANT_INDEX = KeywordIndex({"important": IMPORTANT_KEYWORDS})
 
 
-    # ---------- Styles ----------
+HEADER_COLOR = "D9E1F2"
 
-    header_font = Font(bold=True)
-    header_fill = PatternFill("solid", fgColor="D9E1F2")
-    center_align = Alignment(horizontal="center")
 
-    highlight_font = Font(bold=True)
+@lru_cache(maxsize=None)
+def cell_styles():
+    """
+    Shared cell styles, built on the first export: openpyxl is only
+    imported by the processes that write workbooks.
+    """
 
+    from openpyxl.styles import Font, PatternFill, Alignment
 
-    # ---------- Header ----------
+    return {
+        "header": {
+            "font": Font(bold=True),
+            "fill": PatternFill("solid", fgColor=HEADER_COLOR),
+            "alignment": Alignment(horizontal="center")
+        },
+        "highlight": {
+            "font": Font(bold=True)
+        }
+    }
 
-    headers = ["Particulars"] + data.years
-    ws.append(headers)
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def export_excel(data, file_id):
+    """
+    Statement workbook for one document. Written to a temporary file and
+    renamed, so a half-written workbook is never served.
+    """
+
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+
+    write_statement(wb.create_sheet("Income Statement"), data)
+
+
+    # ---------- Save ----------
+
+    path = f"{OUTPUT_DIR}/{file_id}.xlsx"
+
+    save_atomic(wb, path)
+
+    return path
 
-    for col in range(1, len(headers) + 1):
 
-        cell = ws.cell(row=1, column=col)
+def save_atomic(wb, path):
 
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = center_align
+    tmp = f"{path}.{os.getpid()}.tmp"
 
+    wb.save(tmp)
 
-    # ---------- Important Keywords ----------
+    os.replace(tmp, path)
 
-    important_keywords = [
-        "revenue",
-        "total",
-        "profit",
-        "ebitda",
-        "income",
-        "expense"
-    ]
 
+def result_data(result):
+    """
+    StatementMatrix back from a stored /upload result.
+    """
 
-    # ---------- Data Rows ----------
+    from app.models.matrix import StatementMatrix
 
-    for row in data.rows:
+    return StatementMatrix.from_statement(result)
 
-        name = row.name
-        values = row.values
 
-        excel_row = [name]
+def write_statement(ws, data):
+    """
+    One statement (StatementMatrix) on one write-only worksheet. Values
+    are written as numbers.
+    """
 
-        for y in data.years:
-            excel_row.append(values.get(y, "MISSING"))
+    headers = ["Particulars"] + data.years
 
-        ws.append(excel_row)
+    rows = []
 
+    for i, name in enumerate(data.names):
 
         # Highlight important rows
-        lower_name = name.lower()
+        rows.append(([name] + data.cells(i), bool(IMPORTANT_INDEX.search(name.lower()))))
+
+
+    write_table(ws, headers, rows)
+
 
-        if any(k in lower_name for k in important_keywords):
+def write_table(ws, headers, rows):
+    """
+    Header plus (values, highlight) rows on a write-only worksheet.
+    Column widths are taken from the values as rows are prepared: a
+    write-only sheet needs them before its first row, and has no cells to
+    walk afterwards.
+    """
 
-            r = ws.max_row
+    from openpyxl.utils import get_column_letter
 
-            for c in range(1, len(headers) + 1):
+    widths = [0] * len(headers)
 
-                ws.cell(row=r, column=c).font = highlight_font
+    prepared = []
+
+    for values, highlight in [(headers, None)] + rows:
+
+        for i, value in enumerate(values):
+            if value:
+                widths[i] = max(widths[i], len(str(value)))
+
+        prepared.append((values, highlight))
+
+
+    # ---------- Auto Column Width ----------
+
+    for i, width in enumerate(widths, start=1):
+        ws.column_dimensions[get_column_letter(i)].width = width + 3
 
 
     # ---------- Freeze Header ----------
@@ -80,25 +141,142 @@ def export_excel(data, file_id):
     ws.freeze_panes = "A2"
 
 
-    # ---------- Auto Column Width ----------
+    # ---------- Rows ----------
 
-    for col in ws.columns:
+    for values, highlight in prepared:
 
-        max_length = 0
-        col_letter = get_column_letter(col[0].column)
+        if highlight is None:
+            ws.append([styled_cell(ws, v, "header") for v in values])
 
-        for cell in col:
+        elif highlight:
+            ws.append([styled_cell(ws, v, "highlight") for v in values])
 
-            if cell.value:
-                max_length = max(max_length, len(str(cell.value)))
+        else:
+            ws.append(values)
 
-        ws.column_dimensions[col_letter].width = max_length + 3
 
+def styled_cell(ws, value, style):
 
-    # ---------- Save ----------
+    from openpyxl.cell import WriteOnlyCell
 
-    path = f"{OUTPUT_DIR}/{file_id}.xlsx"
+    cell = WriteOnlyCell(ws, value=value)
+
+    for attr, v in cell_styles()[style].items():
+        setattr(cell, attr, v)
+
+    return cell
+
+
+# ---------- Batch Workbook ----------
+
+SHEET_NAME_MAX = 31
+
+SHEET_NAME_BAD = re.compile(r"[\[\]:*?/\\]")
+
+SUMMARY_HEADERS = [
+    "Company", "File", "Status", "Currency", "Unit",
+    "Periods", "Rows", "Revenue (latest)", "Net profit (latest)", "Note"
+]
+
+
+def sheet_name(title, taken):
+    """
+    Valid, unique worksheet name (31 chars, no []:*?/\\).
+    """
+
+    base = SHEET_NAME_BAD.sub(" ", title).strip(" '") or "Sheet"
+
+    name = base[:SHEET_NAME_MAX]
+
+    n = 2
+
+    while name.lower() in taken:
+
+        suffix = f" ({n})"
+
+        name = base[:SHEET_NAME_MAX - len(suffix)] + suffix
+
+        n += 1
+
+
+    taken.add(name.lower())
+
+    return name
+
+
+def latest_value(data, canonical):
+
+    if not data.years:
+        return ""
+
+    for i, name in enumerate(data.names):
+
+        if match_canonical(name)[0] == canonical:
+            return data.cells(i)[-1]
+
+    return ""
+
+
+def export_batch_excel(documents, batch_id):
+    """
+    One workbook for a batch: a summary sheet, then one sheet per company.
+    Sheets are write-only, so the workbook's cells are not kept in memory;
+    the statements themselves all are (the batch holds every result
+    anyway).
+
+    documents: dicts with company, filename, status, message and data
+    (StatementMatrix, or None when the document failed).
+    """
+
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+
+    summary = wb.create_sheet("Summary")
+
+
+    # Sheet names first: the summary lists them and is written before them
+    taken = {"summary"}
+
+    rows = []
+    sheets = []
+
+    for doc in documents:
+
+        data = doc.get("data")
+
+        if data is None:
+
+            rows.append(([
+                doc["company"], doc["filename"], doc["status"],
+                "", "", "", 0, "", "", doc.get("message", "")
+            ], False))
+
+            continue
+
+
+        name = sheet_name(doc["company"], taken)
+
+        sheets.append((name, data))
+
+        rows.append(([
+            name, doc["filename"], doc["status"],
+            data.currency, data.unit,
+            ", ".join(data.years), len(data),
+            latest_value(data, "revenue"),
+            latest_value(data, "net profit"),
+            doc.get("message", "")
+        ], False))
+
+
+    write_table(summary, SUMMARY_HEADERS, rows)
+
+    for name, data in sheets:
+        write_statement(wb.create_sheet(name), data)
+
+
+    path = f"{OUTPUT_DIR}/{batch_id}.xlsx"
 
-    wb.save(path)
+    save_atomic(wb, path)
 
     return path
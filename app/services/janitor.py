@@ -0,0 +1,232 @@
+import asyncio
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from app.core.config import (
+    UPLOAD_DIR,
+    OUTPUT_DIR,
+    UPLOAD_TTL_HOURS,
+    OUTPUT_TTL_HOURS,
+    STORAGE_QUOTA_MB,
+    RETENTION_GRACE_MINUTES,
+    JANITOR_INTERVAL_SECONDS
+)
+from app.core.logger import logger
+from app.core.metrics import STORAGE_RECLAIMED, STORAGE_REMOVED
+from app.core.workers import run_disk
+from app.services import job_store, result_store
+
+
+# Eviction order under the quota: finished uploads, then workbooks that
+# can be rebuilt from a stored result, then the rest (batch workbooks)
+TIER_UPLOAD = 0
+TIER_REBUILDABLE = 1
+TIER_OTHER = 2
+
+
+# Paths of requests in progress (upload / batch handlers), by refcount
+_held = Counter()
+
+# Bytes per directory after the last sweep, for /metrics
+usage = {"uploads": 0, "outputs": 0}
+
+
+# ---------------- IN-FLIGHT ----------------
+
+@contextmanager
+def hold(*paths):
+    """
+    Keep these files while a request still needs them.
+    """
+
+    paths = [os.path.abspath(p) for p in paths]
+
+    _held.update(paths)
+
+    try:
+        yield
+
+    finally:
+
+        _held.subtract(paths)
+
+        for p in paths:
+            if _held[p] <= 0:
+                del _held[p]
+
+
+def protected_paths(held=()):
+
+    paths = set(held)
+
+    # Queued / running jobs are resumed from their PDF after a restart
+    for _, pdf_path, _ in job_store.unfinished_jobs():
+        paths.add(os.path.abspath(pdf_path))
+
+    return paths
+
+
+# ---------------- SWEEP ----------------
+
+def scan(folder, label):
+
+    files = []
+
+    try:
+        entries = list(os.scandir(folder))
+    except FileNotFoundError:
+        return files
+
+    for entry in entries:
+
+        if not entry.is_file():
+            continue
+
+        st = entry.stat()
+
+        files.append({
+            "path": os.path.abspath(entry.path),
+            "name": entry.name,
+            "dir": label,
+            "size": st.st_size,
+            # Downloads touch the workbook (app/api/outputs.py)
+            "last_used": max(st.st_mtime, st.st_atime)
+        })
+
+    return files
+
+
+def remove(f, reason):
+
+    try:
+        os.remove(f["path"])
+
+    except FileNotFoundError:
+        return 0
+
+    except OSError as e:
+        logger.warning(f"Could not remove {f['path']}: {e}")
+        return 0
+
+
+    STORAGE_RECLAIMED.inc(f["size"], dir=f["dir"], reason=reason)
+    STORAGE_REMOVED.inc(dir=f["dir"], reason=reason)
+
+    return f["size"]
+
+
+def sweep(held=(), now=None):
+    """
+    One pass over uploads/ and outputs/: drop files past their TTL, then
+    least recently used files until under the quota. Held files, PDFs of
+    unfinished jobs and files younger than the grace period are kept.
+    Returns bytes reclaimed.
+    """
+
+    now = now or time.time()
+
+    protected = protected_paths(held)
+
+    grace = RETENTION_GRACE_MINUTES * 60
+
+    ttl = {
+        "uploads": UPLOAD_TTL_HOURS * 3600,
+        "outputs": OUTPUT_TTL_HOURS * 3600
+    }
+
+
+    files = scan(UPLOAD_DIR, "uploads") + scan(OUTPUT_DIR, "outputs")
+
+    candidates = [
+        f for f in files
+        if f["path"] not in protected and now - f["last_used"] > grace
+    ]
+
+    reclaimed = 0
+
+    removed = set()
+
+
+    # ---------- TTL ----------
+
+    for f in candidates:
+
+        if now - f["last_used"] > ttl[f["dir"]]:
+
+            reclaimed += remove(f, "ttl")
+
+            removed.add(f["path"])
+
+
+    # ---------- Quota ----------
+
+    quota = STORAGE_QUOTA_MB * 1024 * 1024
+
+    total = sum(f["size"] for f in files if f["path"] not in removed)
+
+    if total > quota:
+
+        rebuildable = result_store.file_ids()
+
+        def tier(f):
+
+            if f["dir"] == "uploads":
+                return TIER_UPLOAD
+
+            file_id = f["name"].split(".")[0]
+
+            return TIER_REBUILDABLE if file_id in rebuildable else TIER_OTHER
+
+
+        lru = sorted(
+            (f for f in candidates if f["path"] not in removed),
+            key=lambda f: (tier(f), f["last_used"])
+        )
+
+        for f in lru:
+
+            if total <= quota:
+                break
+
+            freed = remove(f, "quota")
+
+            total -= freed
+            reclaimed += freed
+
+            removed.add(f["path"])
+
+
+        if total > quota:
+            logger.warning(f"Storage still over quota after sweep: {total / 1024 / 1024:.0f} MB in use")
+
+
+    for label in usage:
+        usage[label] = sum(
+            f["size"] for f in files
+            if f["dir"] == label and f["path"] not in removed
+        )
+
+
+    if removed:
+        logger.info(f"Janitor removed {len(removed)} files, {reclaimed / 1024 / 1024:.1f} MB")
+
+    return reclaimed
+
+
+async def run_forever():
+    """
+    Background task started with the app (see main.lifespan).
+    """
+
+    while True:
+
+        try:
+            # Snapshot of the held paths taken on the event loop
+            await run_disk(sweep, set(_held))
+
+        except Exception:
+            logger.exception("Janitor sweep failed")
+
+        await asyncio.sleep(JANITOR_INTERVAL_SECONDS)
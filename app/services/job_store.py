@@ -0,0 +1,172 @@
+import json
+import time
+
+from app.core.config import JOBS_DB
+from app.core.db import connect as db_connect
+
+
+# Stage names reported by the pipeline, with human-readable labels
+STAGE_LABELS = {
+    "queued": "Queued",
+    "table_extraction": "Table extraction",
+    "text_extraction": "Text extraction",
+    "ocr_scan": "OCR heading scan page",
+    "ocr": "OCR page",
+    "rules": "Rule-based extraction",
+    "llm": "LLM chunk",
+    "validation": "Validation",
+    "done": "Done",
+    "error": "Failed"
+}
+
+
+# ---------------- DB ----------------
+
+def connect():
+
+    return db_connect(JOBS_DB)
+
+
+def init_db():
+
+    with connect() as conn:
+
+        # WAL lets the pool processes write progress while the API reads
+        conn.execute("PRAGMA journal_mode=WAL")
+
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                filename TEXT,
+                company TEXT,
+                pdf_path TEXT NOT NULL,
+                status TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                current INTEGER,
+                total INTEGER,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+
+        # Databases created before the company field
+        columns = {r["name"] for r in conn.execute("PRAGMA table_info(jobs)")}
+
+        if "company" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN company TEXT")
+
+
+# ---------------- WRITES ----------------
+
+def create_job(job_id, filename, pdf_path, company=None):
+
+    now = time.time()
+
+    with connect() as conn:
+
+        conn.execute(
+            "INSERT INTO jobs (id, filename, company, pdf_path, status, stage, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, 'queued', 'queued', ?, ?)",
+            (job_id, filename, company, pdf_path, now, now)
+        )
+
+
+def set_stage(job_id, stage, current=None, total=None):
+    """
+    Progress callback for the pipeline. Safe to call from pool processes
+    and threads; a count landing after a higher one for the same stage
+    (concurrent LLM chunks) is ignored.
+    """
+
+    with connect() as conn:
+
+        conn.execute(
+            "UPDATE jobs SET status = 'running', stage = ?, current = ?, total = ?, updated_at = ? "
+            "WHERE id = ? AND NOT (stage IS ? AND COALESCE(current > ?, 0))",
+            (stage, current, total, time.time(), job_id, stage, current)
+        )
+
+
+def finish_job(job_id, result):
+
+    with connect() as conn:
+
+        conn.execute(
+            "UPDATE jobs SET status = 'done', stage = 'done', current = NULL, total = NULL, "
+            "result = ?, updated_at = ? WHERE id = ?",
+            (json.dumps(result), time.time(), job_id)
+        )
+
+
+def fail_job(job_id, message):
+
+    with connect() as conn:
+
+        conn.execute(
+            "UPDATE jobs SET status = 'error', stage = 'error', error = ?, updated_at = ? "
+            "WHERE id = ?",
+            (message, time.time(), job_id)
+        )
+
+
+# ---------------- READS ----------------
+
+def describe(row):
+
+    stage = row["stage"]
+
+    progress = STAGE_LABELS.get(stage, stage)
+
+    if row["current"] is not None and row["total"]:
+        progress += f" {row['current']}/{row['total']}"
+
+    return {
+        "job_id": row["id"],
+        "filename": row["filename"],
+        "status": row["status"],
+        "stage": stage,
+        "current": row["current"],
+        "total": row["total"],
+        "progress": progress,
+        "error": row["error"],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"]
+    }
+
+
+def get_job(job_id):
+
+    with connect() as conn:
+
+        row = conn.execute(
+            "SELECT * FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+
+    return row
+
+
+def get_result(job_id):
+
+    row = get_job(job_id)
+
+    if row is None or row["result"] is None:
+        return None
+
+    return json.loads(row["result"])
+
+
+def unfinished_jobs():
+    """
+    Jobs that were queued or running when the worker last stopped.
+    """
+
+    with connect() as conn:
+
+        rows = conn.execute(
+            "SELECT id, pdf_path, filename, company FROM jobs WHERE status IN ('queued', 'running') "
+            "ORDER BY created_at"
+        ).fetchall()
+
+    return [(r["id"], r["pdf_path"], r["filename"], r["company"]) for r in rows]
@@ -0,0 +1,365 @@
+import hashlib
+import json
+import os
+import threading
+from types import SimpleNamespace
+
+from app.core.config import (
+    GROQ_KEY,
+    LLM_BACKEND,
+    LLM_BASE_URL,
+    LLM_API_KEY,
+    LLM_MODEL,
+    LLM_STUB_FILE,
+    LLM_RECORD
+)
+from app.core.logger import logger
+
+
+# Answer of the stub for prompts it has no recording for
+EMPTY_STATEMENT = json.dumps({
+    "currency": "UNKNOWN",
+    "unit": "UNKNOWN",
+    "years": [],
+    "rows": []
+})
+
+STUB_PIECE_CHARS = 16
+
+
+class RateLimited(Exception):
+    """
+    Provider answered 429. Every backend raises this so call_llm can back
+    off the same way regardless of where requests go.
+    """
+
+    def __init__(self, retry_after=None):
+
+        super().__init__("rate limited")
+
+        self.retry_after = retry_after
+
+
+# ---------------- HELPERS ----------------
+
+def to_obj(value):
+    """
+    JSON -> attribute access, so raw HTTP responses read like SDK objects
+    (res.choices[0].message.content).
+    """
+
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: to_obj(v) for k, v in value.items()})
+
+    if isinstance(value, list):
+        return [to_obj(v) for v in value]
+
+    return value
+
+
+def parse_retry_after(value):
+
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def prompt_key(messages):
+
+    return hashlib.sha256(
+        json.dumps(messages, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def delta_content(chunk):
+    """
+    Text of one streamed chunk. The first and last chunks of an
+    OpenAI-style stream often carry no content ({"role": ...} or {}),
+    and a usage-only chunk has no choices.
+    """
+
+    if not getattr(chunk, "choices", None):
+        return None
+
+    return getattr(getattr(chunk.choices[0], "delta", None), "content", None)
+
+
+def message_content(res):
+
+    return getattr(res.choices[0].message, "content", None) or ""
+
+
+def message_response(content):
+
+    return to_obj({
+        "choices": [{"message": {"content": content}}],
+        "usage": None
+    })
+
+
+def delta_chunk(content):
+
+    return to_obj({
+        "choices": [{"delta": {"content": content}}],
+        "usage": None
+    })
+
+
+# ---------------- BACKENDS ----------------
+
+class GroqBackend:
+
+    name = "groq"
+
+    # Groq's JSON mode rejects stream=True; JSON-mode calls go unstreamed
+    streams_json = False
+
+    def __init__(self, api_key):
+
+        from groq import Groq, RateLimitError
+
+        # Retries are handled by call_llm so they go through the limiter
+        self.client = Groq(api_key=api_key, max_retries=0)
+
+        self.rate_limit_error = RateLimitError
+
+
+    def create(self, **request):
+
+        try:
+            return self.client.chat.completions.create(**request)
+
+        except self.rate_limit_error as e:
+            raise RateLimited(parse_retry_after(e.response.headers.get("retry-after"))) from e
+
+
+class OpenAICompatibleBackend:
+    """
+    Any server exposing /chat/completions the OpenAI way (llama.cpp,
+    vLLM, Ollama, LM Studio ...).
+    """
+
+    name = "openai"
+
+    streams_json = True
+
+    def __init__(self, base_url, api_key=None, timeout=300):
+
+        import httpx
+
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+
+        self.http = httpx.Client(
+            base_url=base_url.rstrip("/") + "/",
+            headers=headers,
+            timeout=timeout
+        )
+
+
+    def create(self, stream=False, **request):
+
+        req = self.http.build_request(
+            "POST", "chat/completions",
+            json={**request, "stream": stream}
+        )
+
+        # Sent now (not on first iteration) so a 429 reaches call_llm's retry
+        res = self.http.send(req, stream=stream)
+
+        if res.status_code >= 400:
+
+            res.read()
+            res.close()
+
+            if res.status_code == 429:
+                raise RateLimited(parse_retry_after(res.headers.get("retry-after")))
+
+            res.raise_for_status()
+
+
+        if not stream:
+            return to_obj(res.json())
+
+        return self._events(res)
+
+
+    def _events(self, res):
+
+        try:
+
+            for line in res.iter_lines():
+
+                if not line.startswith("data:"):
+                    continue
+
+                data = line[5:].strip()
+
+                if data == "[DONE]":
+                    break
+
+                yield to_obj(json.loads(data))
+
+        finally:
+            res.close()
+
+
+class StubBackend:
+    """
+    Replays recorded answers, keyed by the exact messages sent, so the
+    whole pipeline runs offline and deterministically. Unknown prompts get
+    an empty statement.
+    """
+
+    name = "stub"
+
+    streams_json = True
+
+    def __init__(self, path):
+
+        self.path = path
+
+        self.responses = {}
+
+        try:
+
+            with open(path, encoding="utf-8") as f:
+
+                for line in f:
+
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.responses[entry["key"]] = entry["content"]
+
+        except FileNotFoundError:
+            logger.warning(f"No LLM recordings at {path}; stub answers will be empty")
+
+
+        logger.info(f"Stub LLM loaded {len(self.responses)} recorded responses")
+
+
+    def create(self, messages, stream=False, **request):
+
+        content = self.responses.get(prompt_key(messages))
+
+        if content is None:
+            content = EMPTY_STATEMENT
+
+
+        if not stream:
+            return message_response(content)
+
+        return iter([
+            delta_chunk(content[i:i + STUB_PIECE_CHARS])
+            for i in range(0, len(content), STUB_PIECE_CHARS)
+        ])
+
+
+class RecordingBackend:
+    """
+    Wraps a real backend and appends every answer to the stub file.
+    """
+
+    def __init__(self, inner, path):
+
+        self.inner = inner
+        self.name = inner.name
+        self.streams_json = inner.streams_json
+        self.path = path
+
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+
+    def create(self, messages, stream=False, **request):
+
+        res = self.inner.create(messages=messages, stream=stream, **request)
+
+        if not stream:
+            self.record(messages, message_content(res))
+            return res
+
+        return self._tee(messages, res)
+
+
+    def _tee(self, messages, chunks):
+
+        pieces = []
+
+        for chunk in chunks:
+
+            piece = delta_content(chunk)
+
+            if piece:
+                pieces.append(piece)
+
+            yield chunk
+
+        self.record(messages, "".join(pieces))
+
+
+    def record(self, messages, content):
+
+        line = json.dumps({"key": prompt_key(messages), "content": content})
+
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+# ---------------- SELECTION ----------------
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def make_backend(kind=None):
+
+    kind = kind or LLM_BACKEND
+
+    if kind == "groq":
+        return GroqBackend(GROQ_KEY)
+
+    if kind == "openai":
+        return OpenAICompatibleBackend(LLM_BASE_URL, LLM_API_KEY)
+
+    if kind == "stub":
+        return StubBackend(LLM_STUB_FILE)
+
+    raise ValueError(f"Unknown LLM_BACKEND: {kind}")
+
+
+def get_backend():
+    """
+    Configured backend, built on first use (not at import).
+    """
+
+    global _backend
+
+    with _backend_lock:
+
+        if _backend is None:
+
+            backend = make_backend()
+
+            if LLM_RECORD and backend.name != "stub":
+                backend = RecordingBackend(backend, LLM_STUB_FILE)
+
+            logger.info(f"LLM backend: {backend.name} ({LLM_MODEL})")
+
+            _backend = backend
+
+        return _backend
+
+
+def model_id():
+    """
+    Backend + model, for cache keys: a stub or local answer must never be
+    served as if Groq had produced it.
+    """
+
+    if LLM_BACKEND == "groq":
+        return LLM_MODEL
+
+    return f"{LLM_BACKEND}:{LLM_MODEL}"
@@ -0,0 +1,210 @@
+import hashlib
+import json
+import threading
+import time
+
+from app.core.config import LLM_CACHE_DB, LLM_CACHE_TTL_DAYS, LLM_CACHE_MAX_MB
+from app.core.db import connect as db_connect
+from app.core.logger import logger
+from app.core.metrics import LLM_CACHE
+
+
+# Run eviction every N writes rather than on each one
+EVICT_EVERY = 50
+
+
+_stats = {"hits": 0, "misses": 0, "writes": 0}
+_stats_lock = threading.Lock()
+
+_ready = False
+
+
+# ---------------- DB ----------------
+
+def connect():
+
+    return db_connect(LLM_CACHE_DB)
+
+
+def init_cache():
+
+    global _ready
+
+    if _ready:
+        return
+
+    with connect() as conn:
+
+        conn.execute("PRAGMA journal_mode=WAL")
+
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache (last_used)"
+        )
+
+    _ready = True
+
+
+def _count(name):
+
+    with _stats_lock:
+        _stats[name] += 1
+
+        return _stats[name]
+
+
+# ---------------- KEY ----------------
+
+def cache_key(model, prompt_version, cleaned_text, periods):
+    """
+    Content address for one LLM call: same model, prompt and input -> same answer
+    (we call with temperature=0).
+    """
+
+    payload = json.dumps(
+        [model, prompt_version, cleaned_text, sorted(str(p) for p in periods)],
+        ensure_ascii=False
+    )
+
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ---------------- GET / PUT ----------------
+
+def get(key):
+
+    init_cache()
+
+    now = time.time()
+    min_created = now - LLM_CACHE_TTL_DAYS * 86400
+
+    with connect() as conn:
+
+        row = conn.execute(
+            "SELECT value FROM llm_cache WHERE key = ? AND created_at >= ?",
+            (key, min_created)
+        ).fetchone()
+
+        if row is not None:
+
+            conn.execute(
+                "UPDATE llm_cache SET hits = hits + 1, last_used = ? WHERE key = ?",
+                (now, key)
+            )
+
+
+    if row is None:
+
+        _count("misses")
+        LLM_CACHE.inc(result="miss")
+
+        return None
+
+
+    _count("hits")
+    LLM_CACHE.inc(result="hit")
+
+    logger.info("LLM cache hit")
+
+    return json.loads(row["value"])
+
+
+def put(key, value):
+
+    init_cache()
+
+    now = time.time()
+
+    data = json.dumps(value, ensure_ascii=False)
+
+    with connect() as conn:
+
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, value, size, hits, created_at, last_used) "
+            "VALUES (?, ?, ?, 0, ?, ?)",
+            (key, data, len(data), now, now)
+        )
+
+
+    if _count("writes") % EVICT_EVERY == 0:
+        evict()
+
+
+# ---------------- EVICTION ----------------
+
+def evict():
+    """
+    Drop expired entries, then least-recently-used ones until under the size cap.
+    """
+
+    init_cache()
+
+    now = time.time()
+
+    max_bytes = LLM_CACHE_MAX_MB * 1024 * 1024
+
+    with connect() as conn:
+
+        expired = conn.execute(
+            "DELETE FROM llm_cache WHERE created_at < ?",
+            (now - LLM_CACHE_TTL_DAYS * 86400,)
+        ).rowcount
+
+
+        total = conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM llm_cache"
+        ).fetchone()[0]
+
+        dropped = 0
+
+        if total > max_bytes:
+
+            for row in conn.execute(
+                "SELECT key, size FROM llm_cache ORDER BY last_used"
+            ).fetchall():
+
+                if total <= max_bytes:
+                    break
+
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (row["key"],))
+
+                total -= row["size"]
+                dropped += 1
+
+
+    if expired or dropped:
+        logger.info(f"LLM cache evicted {expired} expired, {dropped} LRU entries")
+
+
+def stats():
+
+    init_cache()
+
+    with connect() as conn:
+
+        entries, size = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+        ).fetchone()
+
+
+    with _stats_lock:
+        counters = dict(_stats)
+
+    lookups = counters["hits"] + counters["misses"]
+
+    return {
+        **counters,
+        "hit_rate": round(counters["hits"] / lookups, 3) if lookups else 0.0,
+        "entries": entries,
+        "bytes": size
+    }
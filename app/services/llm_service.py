@@ -1,12 +1,42 @@
-from groq import Groq
-import json
+import random
 import re
 
-from app.core.config import GROQ_KEY, MAX_TEXT_LENGTH
+from app.core.config import (
+    LLM_BACKEND,
+    LLM_MODEL,
+    LLM_OUTPUT_MODE,
+    LLM_STREAM,
+    MAX_TEXT_LENGTH,
+    LLM_RPM,
+    LLM_TPM,
+    LLM_OUTPUT_TOKENS,
+    LLM_MAX_RETRIES,
+    LLM_BACKOFF_SECONDS
+)
+from app.core.json_stream import IncrementalJSONParser
+from app.core.keywords import KeywordIndex
 from app.core.logger import logger
+from app.core.metrics import LLM_CALLS, LLM_RETRIES, LLM_TOKENS
+from app.core.rate_limit import RateLimiter
+from app.core.timing import timed
+from app.core.tokens import count_tokens
+from app.models.schema import FinancialData
+from app.services import llm_cache
+from app.services.llm_backends import (
+    RateLimited,
+    delta_content,
+    get_backend,
+    message_content,
+    model_id
+)
+from app.services.compactor import compact_rows
 
 
-client = Groq(api_key=GROQ_KEY)
+limiter = RateLimiter(LLM_RPM, LLM_TPM)
+
+
+# Bump whenever the prompt below changes so cached answers are not reused
+PROMPT_VERSION = 3
 
 
 # ---------------- CLEANER ----------------
@@ -17,24 +47,32 @@ def detect_periods(text):
 
     dates = re.findall(r"\d{2}/\d{2}/\d{4}", text)
 
-    periods = list(set(years + dates))
+    # first-seen order keeps the prompt (and cache key) stable across runs
+    periods = list(dict.fromkeys(years + dates))
 
     return periods[:8]
 
 
+FINANCIAL_KEYWORDS = [
+    "revenue", "income", "expense", "profit", "tax",
+    "ebitda", "total", "cost", "depreciation",
+    "amortisation", "finance", "asset", "liability",
+    "equity", "inventory", "cash", "debt", "eps"
+]
+
+# compiled once; one regex scan per line instead of 18 substring checks
+FINANCIAL_INDEX = KeywordIndex({"financial": FINANCIAL_KEYWORDS})
+
+# six or more digits anywhere in the line
+NUMERIC_ROW_RE = re.compile(r"(?:\D*\d){6}")
+
+
 def filter_financial_lines(text):
 
     lines = text.split("\n")
 
     keep = []
 
-    keywords = [
-        "revenue", "income", "expense", "profit", "tax",
-        "ebitda", "total", "cost", "depreciation",
-        "amortisation", "finance", "asset", "liability",
-        "equity", "inventory", "cash", "debt", "eps"
-    ]
-
 
     for line in lines:
 
@@ -45,11 +83,11 @@ def filter_financial_lines(text):
 
 
         # Keep keyword lines
-        if any(k in l for k in keywords):
+        if FINANCIAL_INDEX.search(l):
             keep.append(line)
 
         # Keep numeric-heavy rows
-        elif sum(c.isdigit() for c in line) >= 6:
+        elif NUMERIC_ROW_RE.match(line):
             keep.append(line)
 
 
@@ -64,16 +102,7 @@ def filter_financial_lines(text):
     return "\n".join(cleaned)
 
 
-# ---------------- JSON Extractor ----------------
-
-def extract_json(text):
-
-    match = re.search(r"\{.*\}", text, re.DOTALL)
-
-    if match:
-        return match.group()
-
-    return None
+# ---------------- Income Section ----------------
 
 def extract_income_section(text):
 
@@ -119,14 +148,221 @@ def extract_income_section(text):
 
     return text
 
+# ---------------- Rate-Limited Call ----------------
+
+def response_format():
+    """
+    Provider-side output constraint for LLM_OUTPUT_MODE.
+    """
+
+    if LLM_OUTPUT_MODE == "json_schema":
+
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "FinancialData",
+                "schema": FinancialData.model_json_schema()
+            }
+        }
+
+    if LLM_OUTPUT_MODE == "json_object":
+        return {"type": "json_object"}
+
+    return None
+
+
+def charge(usage, reserved):
+
+    # Charge any usage above what we reserved
+    if usage and getattr(usage, "total_tokens", None):
+        limiter.consume(usage.total_tokens - reserved)
+
+
+def stream_usage(chunk):
+
+    # OpenAI-style final chunk, or Groq's x_groq extension
+    usage = getattr(chunk, "usage", None)
+
+    if usage is None:
+        usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+
+    return usage
+
+
+def call_llm(messages, stream=False):
+    """
+    Send one chat completion under the shared RPM/TPM budget,
+    backing off and retrying when the provider answers 429.
+    With stream=True the raw chunk iterator is returned.
+    """
+
+    reserved = reserved_tokens(messages)
+
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+
+        # Time spent waiting for budget, including 429 backoff
+        with timed("llm_wait"):
+            limiter.acquire(reserved)
+
+        options = {"stream": True} if stream else {}
+
+        fmt = response_format()
+
+        if fmt:
+            options["response_format"] = fmt
+
+
+        try:
+
+            res = get_backend().create(
+
+                model=LLM_MODEL,
+
+                messages=messages,
+
+                temperature=0,
+
+                **options
+            )
+
+        except RateLimited as e:
+
+            LLM_CALLS.inc(outcome="rate_limited")
+
+            if attempt == LLM_MAX_RETRIES:
+                raise
+
+            LLM_RETRIES.inc(reason="rate_limit")
+
+            delay = e.retry_after or LLM_BACKOFF_SECONDS * (2 ** attempt)
+            delay += random.uniform(0, 1)
+
+            logger.warning(f"LLM rate limited (429). Backing off {delay:.1f}s")
+
+            limiter.pause(delay)
+
+            continue
+
+
+        if stream:
+            return res
+
+        charge(getattr(res, "usage", None), reserved)
+
+        return res
+
+
+def streaming():
+    """
+    Whether to stream: Groq's JSON mode does not support it, so those calls
+    fall back to a single response. Backends that do not say can stream.
+    """
+
+    return LLM_STREAM and (
+        response_format() is None or getattr(get_backend(), "streams_json", True)
+    )
+
+
+def complete(messages, parser, on_row=None):
+    """
+    Run one completion into `parser`. Streamed rows go to on_row(pos, row)
+    as soon as each one closes. Returns (content, usage).
+    """
+
+    if not streaming():
+
+        res = call_llm(messages)
+
+        content = message_content(res)
+
+        for pos, row in parser.feed(content):
+            if on_row:
+                on_row(pos, row)
+
+        return content, getattr(res, "usage", None)
+
+
+    usage = None
+
+    for chunk in call_llm(messages, stream=True):
+
+        usage = stream_usage(chunk) or usage
+
+        piece = delta_content(chunk)
+
+        if not piece:
+            continue
+
+        for pos, row in parser.feed(piece):
+            if on_row:
+                on_row(pos, row)
+
+
+    charge(usage, reserved_tokens(messages))
+
+    return parser.text, usage
+
+
+def reserved_tokens(messages):
+
+    return prompt_estimate(messages) + LLM_OUTPUT_TOKENS
+
+
+def prompt_estimate(messages):
+
+    return sum(count_tokens(m["content"]) + 4 for m in messages)
+
+
+def call_usage(usage, messages):
+    """
+    Prompt / completion token counts for one call. Provider numbers when the
+    response has them, our own estimate otherwise.
+    """
+
+    estimate = prompt_estimate(messages)
+
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None) or estimate,
+        "completion_tokens": getattr(usage, "completion_tokens", None) or 0,
+        "estimated_prompt_tokens": estimate,
+        "cached": False
+    }
+
+
 # ---------------- LLM Parser ----------------
 
-def parse_with_llm(text, retry=True):
+SYSTEM_PROMPT = "You extract income statements from financial text. Output strict valid JSON only."
+
+
+PROMPT = """Extract ONLY income statement rows for periods {periods}.
+Use only numbers present in the text; never invent or guess. Missing value -> "MISSING".
+Skip balance sheet, cash flow, ratios and notes. No markdown, no comments.
+Schema: {{"currency":"","unit":"","years":[],"rows":[{{"name":"","values":{{"<period>":""}}}}]}}
+
+Text:
+{text}"""
+
+
+def discard(on_discard):
+
+    if on_discard:
+        on_discard()
+
+
+def parse_with_llm(text, retry=True, usage=None, on_row=None, on_discard=None):
+    """
+    Parse one chunk. When `usage` is a list, token counts for every call
+    (cache hits included) are appended to it. on_row(pos, row) receives
+    rows as the response streams in; when an attempt then fails (no JSON,
+    or an error), on_discard() takes back what it streamed before the
+    retry.
+    """
 
     logger.info("Cleaning chunk before sending to LLM")
 
     income_text = extract_income_section(text)
-    # ✅ FIX: DEFINE cleaned_text
+
     cleaned_text = filter_financial_lines(income_text)
 
 
@@ -137,98 +373,102 @@ def parse_with_llm(text, retry=True):
         return None
 
 
+    # Numeric rows only, one line each; keep the filtered text when the
+    # chunk does not look like a table
+    cleaned_text = compact_rows(cleaned_text) or cleaned_text
+
     periods = detect_periods(text)
 
 
-    logger.info("Sending cleaned chunk to Groq LLM")
+    # ---------- Cache ----------
 
+    key = llm_cache.cache_key(model_id(), PROMPT_VERSION, cleaned_text, periods)
 
-    prompt = f"""
-You are a professional financial analyst.
+    if retry:
 
-Your task:
-Extract ONLY Income Statement data.
+        cached = llm_cache.get(key)
 
-Detected periods:
-{periods}
+        if cached is not None:
 
-Rules:
-- DO NOT invent numbers
-- DO NOT guess
-- Use only provided text
-- If value missing → "MISSING"
-- No balance sheet
-- No cashflow
-- No ratios
-- No notes
-- No explanations
+            LLM_CALLS.inc(outcome="cached")
 
-Return ONLY valid JSON.
-No markdown.
-No comments.
+            if usage is not None:
+                usage.append({"prompt_tokens": 0, "completion_tokens": 0, "cached": True})
 
-Schema:
-{{
- "currency":"",
- "unit":"",
- "years":[],
- "rows":[
-   {{
-     "name":"",
-     "values":{{}}
-   }}
- ]
-}}
+            return cached
 
-Text:
-{cleaned_text[:MAX_TEXT_LENGTH]}
-"""
 
+    logger.info(f"Sending cleaned chunk to {LLM_BACKEND} LLM")
 
-    res = client.chat.completions.create(
 
-        model="llama-3.1-8b-instant",
+    messages = [
+        {
+            "role": "system",
+            "content": SYSTEM_PROMPT
+        },
+        {
+            "role": "user",
+            "content": PROMPT.format(
+                periods=periods,
+                text=cleaned_text[:MAX_TEXT_LENGTH]
+            )
+        }
+    ]
 
-        messages=[
-            {
-                "role": "system",
-                "content": "You output strict valid JSON only."
-            },
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ],
+    parser = IncrementalJSONParser()
 
-        temperature=0
-    )
+    try:
+
+        with timed("llm_call"):
+            content, res_usage = complete(messages, parser, on_row)
+
+    except RateLimited:
+        discard(on_discard)
+        raise   # counted by call_llm
+
+    except Exception:
+        discard(on_discard)
+        LLM_CALLS.inc(outcome="error")
+        raise
 
 
-    content = res.choices[0].message.content.strip()
+    LLM_CALLS.inc(outcome="ok")
+
+    tokens = call_usage(res_usage, messages)
+
+    LLM_TOKENS.inc(tokens["prompt_tokens"], kind="prompt")
+    LLM_TOKENS.inc(tokens["completion_tokens"], kind="completion")
+
+    logger.info(
+        f"LLM call: {tokens['prompt_tokens']} prompt tokens, "
+        f"{tokens['completion_tokens']} completion tokens"
+    )
+
+    if usage is not None:
+        usage.append(tokens)
 
 
     logger.info("Raw LLM output (first 300 chars):")
-    logger.info(content[:300])
+    logger.info(content.strip()[:300])
 
 
     # ---------- Parse JSON ----------
 
-    try:
-        return json.loads(content)
+    # A truncated / garbled tail is cut back to the last complete value
+    parsed = parser.result()
 
-    except Exception:
-
-        logger.warning("Direct JSON parse failed. Trying extraction...")
+    if parsed is not None:
 
-        extracted = extract_json(content)
+        if parser.repaired:
+            logger.warning("LLM output was malformed; repaired in place")
+        else:
+            llm_cache.put(key, parsed)
 
-        if extracted:
+        return parsed
 
-            try:
-                return json.loads(extracted)
 
-            except Exception:
-                pass
+    # What streamed was not an answer; the retry starts from nothing
+    discard(on_discard)
 
 
     # ---------- Retry Once ----------
@@ -237,7 +477,12 @@ Text:
 
         logger.warning("Retrying this chunk once...")
 
-        return parse_with_llm(text, retry=False)
+        LLM_RETRIES.inc(reason="parse")
+
+        return parse_with_llm(
+            text, retry=False, usage=usage,
+            on_row=on_row, on_discard=on_discard
+        )
 
 
     logger.error("LLM failed on this chunk")
@@ -1,15 +1,13 @@
 # app/services/pdf_service.py
-import fitz  # PyMuPDF
 import re
-import tempfile
-import os
-import cv2
-from PIL import Image
-import pytesseract
+from functools import lru_cache
+from app.core.config import TESSERACT_CMD
 from app.core.logger import logger
+from app.core.timing import timed
+from app.services.document import PdfDocument
 
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
-# you likely already set pytesseract.pytesseract.tesseract_cmd elsewhere
+# cv2, numpy, PIL and pytesseract are imported on first OCR, not with the
+# web process (see app/core/startup.py for the background warmup)
 
 INCOME_HEADINGS = [
     r"statement of profit and loss",
@@ -31,37 +29,45 @@ SECTION_BREAKS = [
     r"notes to the financial statements"
 ]
 
+@lru_cache(maxsize=None)
+def _compile_any(patterns):
+    # all patterns as one alternation, compiled once per list
+    return re.compile("|".join(f"(?:{p})" for p in patterns))
+
 def _matches_any(text, patterns):
-    t = text.lower()
-    for p in patterns:
-        if re.search(p, t):
-            return True
-    return False
+    return _compile_any(tuple(patterns)).search(text.lower()) is not None
 
-def extract_income_section_text(path, max_pages_context=2):
+def find_income_pages(doc):
+    """
+    Native-text heading scan: 0-based pages whose text (first 4000 chars)
+    carries an income-statement heading. Page text is memoized on doc.
+    """
+    return [
+        i for i, txt in enumerate(doc.page_texts())
+        if _matches_any(txt[:4000], INCOME_HEADINGS)
+    ]
+
+def section_end(doc, pg, last):
+    """Last page of the section starting at pg: stops before the next section break."""
+    for j in range(pg + 1, last + 1):
+        if _matches_any(doc.page_text(j), SECTION_BREAKS):
+            return j - 1
+    return last
+
+def extract_income_section_text(doc, max_pages_context=2):
     """
     Try to find the "Profit & Loss / Income Statement" section in the PDF and
     return the text for only that section (or nearby pages).
+    doc is a PdfDocument; its native page text is memoized for later stages.
     If nothing found, return None so caller can fallback to full OCR.
     """
     logger.info("Searching for income-statement section in PDF")
-    doc = fitz.open(path)
 
     # gather page-level text (native) first (fast)
-    page_texts = []
-    for p in doc:
-        try:
-            txt = p.get_text()
-        except Exception:
-            txt = ""
-        page_texts.append(txt or "")
+    page_texts = doc.page_texts()
 
     # find candidate page indices where heading appears
-    candidate_pages = []
-    for i, txt in enumerate(page_texts):
-        snippet = txt[:4000].lower()
-        if _matches_any(snippet, INCOME_HEADINGS):
-            candidate_pages.append(i)
+    candidate_pages = find_income_pages(doc)
 
     # If found, collect a few pages around each candidate until we hit SECTION_BREAKS
     if candidate_pages:
@@ -69,12 +75,8 @@ def extract_income_section_text(path, max_pages_context=2):
         for pg in candidate_pages:
             start = max(0, pg - max_pages_context)
             # collect until next section break or +max_pages_context*3
-            end = min(len(doc)-1, pg + max_pages_context + 3)
             # but if a page contains section break heading, stop earlier
-            for j in range(pg+1, end+1):
-                if _matches_any(page_texts[j] if j < len(page_texts) else "", SECTION_BREAKS):
-                    end = j-1
-                    break
+            end = section_end(doc, pg, min(len(doc)-1, pg + max_pages_context + 3))
             # join native text for these pages
             block_txt = "\n\n".join(page_texts[start:end+1])
             blocks.append(block_txt)
@@ -87,77 +89,109 @@ def extract_income_section_text(path, max_pages_context=2):
     return None
 
 
-# keep your OCR function but make it able to process only a few pages (for robustness)
-def ocr_pages_from_pdf(path, page_indices=None, dpi=300):
+OCR_CONFIG = r"--oem 3 --psm 6 -c preserve_interword_spaces=1"
+
+# heading scan for scanned PDFs: low dpi, top third of the page
+SCOUT_DPI = 100
+SCOUT_TOP = 0.35
+# if the targeted pages cover more than this share of the doc, just OCR everything
+TARGETED_MAX_SHARE = 0.6
+
+
+def _tesseract():
+    import pytesseract
+    pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+    return pytesseract
+
+
+def pixmap_to_gray(pix):
+    """Pixmap samples -> 2-D uint8 array, no PNG round-trip."""
+    import cv2
+    import numpy as np
+    img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+    if pix.n == 1:
+        return img[:, :, 0]
+    return cv2.cvtColor(img[:, :, :3], cv2.COLOR_RGB2GRAY)
+
+
+def ocr_image(img):
+    import cv2
+    from PIL import Image
+    # quick preprocessing
+    img = cv2.equalizeHist(img)
+    img = cv2.medianBlur(img, 3)
+    # adaptive threshold (improves table OCR often)
+    thresh = cv2.adaptiveThreshold(img, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                   cv2.THRESH_BINARY, 31, 2)
+    processed = Image.fromarray(thresh)
+    return _tesseract().image_to_string(processed, lang="eng", config=OCR_CONFIG)
+
+
+def ocr_page(doc, i, dpi=300, top=None):
+    pix = doc.page_pixmap(i, dpi=dpi, gray=True, top=top)
+    return ocr_image(pixmap_to_gray(pix))
+
+
+def ocr_page_text(path, i, dpi=300, top=None, stage="ocr"):
     """
-    Convert the provided page_indices to images and OCR them.
-    If page_indices is None -> OCR entire doc.
-    Returns list of page texts.
+    OCR one page of the PDF at path. Module-level so each page can be its
+    own CPU pool task; the document is opened per page (cheap next to OCR)
+    so no handle outlives the call.
     """
-    logger.info("Running OCR on selected pages")
-    doc = fitz.open(path)
-    texts = []
-
-    with tempfile.TemporaryDirectory() as tmpdir:
-        pages = range(len(doc)) if page_indices is None else page_indices
-        for i in pages:
-            page = doc[i]
-            pix = page.get_pixmap(dpi=dpi)
-            img_path = os.path.join(tmpdir, f"page_{i}.png")
-            pix.save(img_path)
-
-            img = cv2.imread(img_path, cv2.IMREAD_GRAYSCALE)
-            if img is None:
-                texts.append("")
-                continue
-
-            # quick preprocessing
-            img = cv2.equalizeHist(img)
-            img = cv2.medianBlur(img, 3)
-            # adaptive threshold (improves table OCR often)
-            thresh = cv2.adaptiveThreshold(img, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                                           cv2.THRESH_BINARY, 31, 2)
-            processed = Image.fromarray(thresh)
-
-            conf = r"--oem 3 --psm 6 -c preserve_interword_spaces=1"
-            txt = pytesseract.image_to_string(processed, lang="eng", config=conf)
-            texts.append(txt)
-
-    return texts
-
-
-def extract_text(path):
+    with timed(f"{stage}_page"):
+        with PdfDocument(path) as doc:
+            return ocr_page(doc, i, dpi, top)
+
+
+def income_pages_from_heads(heads):
+    """
+    Pages whose low-dpi header OCR (SCOUT_DPI, SCOUT_TOP) carries an
+    income-statement heading. 0-based.
+    """
+    hits = [i for i, txt in enumerate(heads) if _matches_any(txt, INCOME_HEADINGS)]
+    logger.info(f"Income headings found by OCR on pages {hits}")
+    return hits
+
+
+def targeted_pages(hits, n_pages, before=1, after=2):
+    """Heading pages plus their neighbours (statements often run onto the next page)."""
+    pages = set()
+    for pg in hits:
+        pages.update(range(max(0, pg - before), min(n_pages, pg + after + 1)))
+    return sorted(pages)
+
+
+def ocr_plan(hits, n_pages):
     """
-    Hybrid extractor:
-    - try to detect income section natively
-    - if found, return that block (as single-element list)
-    - else fall back to full native extraction; if native fails, do full OCR
+    Pages to OCR in full after the heading scan: the statement's pages,
+    or every page when the scan found nothing useful.
     """
-    logger.info("Starting hybrid extraction (income-aware)")
+    pages = targeted_pages(hits, n_pages)
+    if pages and len(pages) < n_pages * TARGETED_MAX_SHARE:
+        logger.info(f"Targeted OCR on pages {pages}")
+        return pages
+    logger.info("Falling back to full OCR")
+    return list(range(n_pages))
 
+
+def native_text(doc):
+    """
+    Text-based PDFs, no OCR:
+    - the income section if one is found (as a single-element list)
+    - else the native text of every page that has some
+    Returns [] for scanned PDFs, which need OCR (see pipeline.extract_document).
+    doc is a PdfDocument; its page text is memoized for later stages.
+    """
     # 1) try to find income section using native text
-    income_block = extract_income_section_text(path)
+    with timed("native_text"):
+        income_block = extract_income_section_text(doc)
 
     if income_block and len(income_block.strip()) > 100:
         logger.info("Returning income block (native)")
         return [income_block]
 
-    # 2) fallback: try native extract of each page
-    doc = fitz.open(path)
-    native_pages = []
-    for i, page in enumerate(doc):
-        try:
-            t = page.get_text()
-        except Exception:
-            t = ""
-        native_pages.append(t or "")
-
-    # if many pages have text, return them
-    nonempty = [p for p in native_pages if p and len(p.strip()) > 50]
+    # 2) fallback: native text of each page (already memoized by step 1)
+    nonempty = [p for p in doc.page_texts() if p and len(p.strip()) > 50]
     if nonempty:
         logger.info("Returning native-extracted pages")
-        return nonempty
-
-    # 3) Final fallback: full OCR (slow)
-    logger.info("Falling back to full OCR")
-    return ocr_pages_from_pdf(path)
+    return nonempty
@@ -0,0 +1,721 @@
+import asyncio
+import re
+import threading
+
+from app.core.config import RULES_MIN_CONFIDENCE
+from app.core.keywords import KeywordIndex
+from app.core.logger import logger
+from app.core.metrics import DOCUMENTS
+from app.core import timing
+from app.core.workers import map_cpu, run_cpu, run_disk, run_io
+
+from app.services.chunker import chunk_text
+from app.services.document import PdfDocument
+from app.services.pdf_service import (
+    SCOUT_DPI,
+    SCOUT_TOP,
+    income_pages_from_heads,
+    native_text,
+    ocr_page_text,
+    ocr_plan
+)
+from app.services.table_service import read_page_tables, table_flavors
+from app.services.llm_backends import model_id
+from app.services.llm_service import PROMPT_VERSION, parse_with_llm
+from app.services.rule_extractor import extract_statement, remaining_text
+from app.services.validator import validate_data
+
+
+# ---------------- FILTER CONFIG ----------------
+
+CORE_KEYWORDS = [
+    "revenue",
+    "income",
+    "expense",
+    "cost",
+    "depreciation",
+    "amortisation",
+    "finance",
+    "interest",
+    "ebitda",
+    "profit",
+    "tax",
+    "eps",
+    "earning",
+    "margin"
+]
+
+
+CASHFLOW_WORDS = [
+    "repayment",
+    "lease liability",
+    "cash equivalent",
+    "interest paid",
+    "dividend paid",
+    "net cash",
+    "operating activities",
+    "investing activities",
+    "financing activities"
+]
+
+
+JUNK_WORDS = [
+    "gate", "sofa", "pna", "sss", "atom", "reofsiutian"
+]
+
+
+# Footnotes / adjustments
+BLOCK_WORDS = [
+    "allowance",
+    "gain on",
+    "loss on",
+    "merger",
+    "disposal",
+    "exceptional",
+    "adjustment",
+    "share of",
+    "non controlling",
+    "minority",
+    "segment",
+    "reclassified",
+    "write down",
+    "impairment",
+    "provision",
+    "fair value",
+    "derivative",
+    "lease charge",
+    "one time",
+    "extraordinary"
+]
+
+
+BALANCE_SHEET_WORDS = [
+    "asset",
+    "liability",
+    "equity",
+    "borrowings",
+    "receivable",
+    "payable",
+    "inventory",
+    "capital",
+    "goodwill"
+]
+
+
+# All row-name vocabularies, compiled once; classify() checks them in one scan
+ROW_INDEX = KeywordIndex({
+    "core": CORE_KEYWORDS,
+    "block": BLOCK_WORDS,
+    "balance_sheet": BALANCE_SHEET_WORDS,
+    "cashflow": CASHFLOW_WORDS
+})
+
+
+# Bump when extraction / aggregation changes so stored results are not reused
+PIPELINE_VERSION = 5
+
+
+# ---------------- HELPERS ----------------
+
+def is_valid_year(y: str) -> bool:
+
+    y = y.strip()
+
+    # 2024
+    if re.match(r"^20\d{2}$", y):
+        return True
+
+    # 31/12/2025
+    if re.match(r"^\d{2}/\d{2}/20\d{2}$", y):
+        return True
+
+    return False
+
+
+def sort_year(y):
+
+    if y.isdigit():
+        return int(y)
+
+    if "/" in y:
+        return int(y.split("/")[-1])
+
+    return 0
+
+
+def is_useful_row(name: str, tags=None) -> bool:
+    """
+    tags: ROW_INDEX.classify(name.lower()) if the caller already has it.
+    """
+
+    if not name:
+        return False
+
+
+    n = name.lower().strip()
+
+
+    # Too short = OCR junk
+    if len(n) < 5:
+        return False
+
+
+    if tags is None:
+        tags = ROW_INDEX.classify(n)
+
+
+    # ---------- Must contain core keyword ----------
+
+    if "core" not in tags:
+        return False
+
+
+    # ---------- Remove footnotes / adjustments ----------
+
+    if "block" in tags:
+        return False
+
+
+    # ---------- Remove balance-sheet items ----------
+
+    if "balance_sheet" in tags:
+        return False
+
+
+    return True
+
+
+def pipeline_version():
+    """
+    Everything that changes the output for identical input bytes.
+    """
+
+    return f"{PIPELINE_VERSION}:{model_id()}:{PROMPT_VERSION}"
+
+
+# ---------------- STAGES ----------------
+
+async def report_async(progress, stage, current=None, total=None):
+    """
+    report from the event loop: the callback (a SQLite write for jobs)
+    runs on the disk threads.
+    """
+
+    if progress:
+        await run_disk(progress, stage, current, total)
+
+
+def plan_document(pdf_path):
+    """
+    CPU-bound look at the PDF before any per-page work: page count, the
+    Camelot pages and their flavors, and the native text.
+    Module-level so it can be shipped to the process pool.
+    """
+
+    # One open document shared by the Camelot pre-checks and native text
+    with PdfDocument(pdf_path) as doc:
+
+        flavors = table_flavors(doc)
+
+        return {
+            "pages": len(doc),
+            "flavors": flavors,
+            "native": [] if flavors else native_text(doc)
+        }
+
+
+async def ocr_pages(pdf_path, pages, progress=None, dpi=300, top=None, stage="ocr"):
+    """
+    OCR the given pages, one CPU pool task per page (see workers.map_cpu).
+    Returns the page texts in page order.
+    """
+
+    async def done(current, total):
+        await report_async(progress, stage, current, total)
+
+    return await map_cpu(
+        ocr_page_text,
+        [(pdf_path, i, dpi, top, stage) for i in pages],
+        on_done=done
+    )
+
+
+async def extract_document(pdf_path, progress=None):
+    """
+    Extraction stage (Camelot, then native text / OCR fallback), driven from
+    the event loop so the pages of one document spread over the CPU pool.
+    Returns (text, source) where source is "tables" (Camelot CSV) or "text".
+    """
+
+    plan = await run_cpu(plan_document, pdf_path)
+
+    flavors = plan["flavors"]
+
+
+    # ---------- Try Table Extraction ----------
+
+    await report_async(progress, "table_extraction")
+
+    tables = []
+
+    if flavors:
+
+        with timing.timed("camelot"):
+            found = await map_cpu(read_page_tables, [(pdf_path, i, f) for i, f in flavors.items()])
+
+        tables = [csv for page in found for csv in page]
+
+        logger.info(f"Camelot found {len(tables)} tables" if tables else "Camelot found no tables")
+
+
+    if tables:
+
+        logger.info("Using Camelot extracted tables")
+
+        return "".join(csv + "\n\n" for csv in tables), "tables"
+
+
+    # ---------- OCR / Native Fallback ----------
+
+    logger.info("No tables found. Using OCR/Text extraction")
+
+    await report_async(progress, "text_extraction")
+
+    # Camelot pages mean the PDF has native text; it was not read up front
+    chunks = plan["native"] if not flavors else await run_cpu(_native_text, pdf_path)
+
+
+    if not chunks:
+
+        # Scanned: locate the statement cheaply, then OCR only those pages
+        logger.info("Scanning page headers for income-statement headings (low-dpi OCR)")
+
+        heads = await ocr_pages(
+            pdf_path, range(plan["pages"]), progress,
+            stage="ocr_scan", dpi=SCOUT_DPI, top=SCOUT_TOP
+        )
+
+        pages = ocr_plan(income_pages_from_heads(heads), plan["pages"])
+
+        chunks = await ocr_pages(pdf_path, pages, progress)
+
+
+    return "\n\n".join(chunks), "text"
+
+
+def _native_text(pdf_path):
+
+    with PdfDocument(pdf_path) as doc:
+        return native_text(doc)
+
+
+class StatementAggregator:
+    """
+    Merges LLM rows into the raw statement dict that validate_data expects.
+
+    Rows can arrive from several chunks at once while responses stream in.
+    Each is kept under its (chunk, position) and folded in that order when
+    read, so the outcome is the same as folding whole results in chunk
+    order: first name seen wins, later chunks overwrite values. Re-adding
+    a row is harmless, and discard(chunk) takes back the rows of a failed
+    attempt.
+
+    Rule-extractor rows (add_rules) are keyed by their canonical row and
+    skip the LLM row filter: they are matched against the canonical
+    vocabulary already, and their lines are kept from the LLM.
+    """
+
+    def __init__(self):
+
+        self.lock = threading.Lock()
+
+        self.meta = {}      # field -> (chunk, value)
+        self.years = set()
+        self.entries = {}   # (chunk, pos) -> (key, name, values)
+        self.rule_rows = []
+
+
+    def add_result(self, result, chunk):
+
+        if not result:
+            return
+
+        with self.lock:
+
+            # -------- Metadata --------
+
+            for field in ("currency", "unit"):
+
+                if field in result and chunk >= self.meta.get(field, (-1, None))[0]:
+                    self.meta[field] = (chunk, result[field])
+
+
+            # -------- Years --------
+
+            for y in result.get("years", []):
+
+                y = str(y).strip()
+
+                if is_valid_year(y):
+                    self.years.add(y)
+
+
+        for pos, r in enumerate(result.get("rows", [])):
+            self.add_row(r, chunk, pos)
+
+
+    def add_rules(self, result):
+        """
+        The rule extractor's result, as chunk 0.
+        """
+
+        self.add_result({k: result[k] for k in ("currency", "unit", "years")}, 0)
+
+        for pos, (canonical, r) in enumerate(zip(result["covered"], result["rows"])):
+
+            self.rule_rows.append(canonical)
+
+            self.add_row(r, 0, pos, key=canonical)
+
+
+    def covered_rules(self):
+        """
+        Canonical rows from the rules that have values in the statement.
+        """
+
+        rows = self.fold()
+
+        return [c for c in self.rule_rows if rows.get(c, {}).get("values")]
+
+
+    def add_row(self, r, chunk, pos, key=None):
+
+        name = str(r.get("name") or "").strip()
+
+        if not name:
+            return
+
+
+        if key is None:
+
+            key = name.lower()
+
+            tags = ROW_INDEX.classify(key)
+
+
+            # Remove cashflow rows
+            if "cashflow" in tags:
+                return
+
+
+            # Keep only income-statement rows
+            if not is_useful_row(name, tags):
+                return
+
+
+        values = {}
+
+        for year, val in (r.get("values") or {}).items():
+
+            year = str(year).strip()
+
+            if is_valid_year(year):
+                values[year] = val
+
+
+        with self.lock:
+            self.entries[(chunk, pos)] = (key, name, values)
+
+
+    def discard(self, chunk):
+        """
+        Drop the rows streamed for a chunk, e.g. by an attempt that failed.
+        """
+
+        with self.lock:
+            for order in [o for o in self.entries if o[0] == chunk]:
+                del self.entries[order]
+
+
+    def fold(self):
+        """
+        key -> {"name", "values"} in first-seen order: the first row of a
+        name gives it its place and spelling, later rows overwrite values.
+        """
+
+        with self.lock:
+            entries = sorted(self.entries.items())
+
+        rows = {}
+
+        for _, (key, name, values) in entries:
+            rows.setdefault(key, {"name": name, "values": {}})["values"].update(values)
+
+        return rows
+
+
+    def raw(self):
+
+        row_map = self.fold()
+
+        with self.lock:
+
+            return build_statement(
+                row_map,
+                set(self.years),
+                self.meta.get("currency", (0, "UNKNOWN"))[1],
+                self.meta.get("unit", (0, "UNKNOWN"))[1]
+            )
+
+
+def merge_llm_results(results):
+    """
+    Fold per-chunk LLM results (in chunk order) into the raw statement dict
+    that validate_data expects.
+    """
+
+    agg = StatementAggregator()
+
+    for i, result in enumerate(results):
+        agg.add_result(result, i)
+
+    return agg.raw()
+
+
+def build_statement(row_map, all_years, currency, unit):
+
+    # ---------- Limit to Last 7 Years ----------
+
+    sorted_years = sorted(list(all_years), key=sort_year)
+
+    if len(sorted_years) > 7:
+        sorted_years = sorted_years[-7:]
+
+
+    logger.info(f"Final years used: {sorted_years}")
+
+
+    # ---------- Filter Row Values ----------
+
+    for row in row_map.values():
+
+        filtered = {}
+
+        for y in sorted_years:
+            filtered[y] = row["values"].get(y, "MISSING")
+
+        row["values"] = filtered
+
+
+    all_years = set(sorted_years)
+
+
+    # ---------- Remove Empty Rows ----------
+
+    cleaned_rows = []
+
+    for row in row_map.values():
+
+        if any(v != "MISSING" for v in row["values"].values()):
+            cleaned_rows.append(row)
+
+
+    row_map = {
+        r["name"].lower(): r for r in cleaned_rows
+    }
+
+
+    # ---------- Final Object ----------
+
+    return {
+        "currency": currency,
+        "unit": unit,
+        "years": sorted(list(all_years), key=sort_year),
+        "rows": list(row_map.values())
+    }
+
+
+# ---------------- PIPELINE ----------------
+
+async def run_pipeline(pdf_path, file_id, progress=None):
+    """
+    Full extraction for a saved PDF. Returns the response payload shared by
+    POST /upload and the job API, with a per-stage timing breakdown.
+    """
+
+    with timing.collect() as timer:
+
+        try:
+            result = await _run_pipeline(pdf_path, file_id, progress)
+
+        except Exception:
+            DOCUMENTS.inc(status="error")
+            raise
+
+
+        DOCUMENTS.inc(status=result.get("status", "error"))
+
+        if result.get("status") == "success":
+            result["timings"] = timer.summary()
+
+        return result
+
+
+async def _run_pipeline(pdf_path, file_id, progress=None):
+
+    # ---------- Tables / OCR / Native Text ----------
+
+    with timing.timed("extraction"):
+        text, source = await extract_document(pdf_path, progress)
+
+
+    if not text.strip():
+
+        logger.error("No usable text extracted")
+
+        return {
+            "status": "error",
+            "message": "Could not extract content from PDF"
+        }
+
+
+    logger.info(f"Total extracted text length: {len(text)}")
+
+
+    # ---------- Rule-Based First Pass ----------
+
+    await report_async(progress, "rules")
+
+    with timing.timed("rules"):
+        rules = await run_cpu(extract_statement, text, csv_mode=(source == "tables"))
+
+    agg = StatementAggregator()
+
+    agg.add_rules(rules)
+
+    usage = []
+
+
+    if rules["confidence"] >= RULES_MIN_CONFIDENCE:
+
+        logger.info("Rules cover the statement. Skipping LLM")
+
+    else:
+
+        # Only what the rules did not cover goes to the LLM
+        if rules["rows"]:
+            text = remaining_text(text, rules, agg.covered_rules())
+
+        with timing.timed("llm"):
+            await run_llm(text, source, progress, usage, agg)
+
+
+    # ---------- Aggregate Results ----------
+
+    raw = agg.raw()
+
+
+    logger.info("Validating extracted data")
+
+    await report_async(progress, "validation")
+
+    with timing.timed("validation"):
+        data = await run_cpu(validated_statement, raw)
+
+
+    # The workbook is built on first download (app/api/outputs.py)
+
+    return {
+        "status": "success",
+        "file_id": file_id,
+        **data,
+        "download": f"/outputs/{file_id}.xlsx",
+        "rules_confidence": rules["confidence"],
+        "llm_usage": summarize_usage(usage)
+    }
+
+
+async def run_llm(text, source="text", progress=None, usage=None, agg=None):
+    """
+    Parse the text chunk by chunk. Rows are added to `agg` as each chunk's
+    response parses (chunk i is merged as chunk i + 1, after the rules pass).
+    Returns the per-chunk results in chunk order.
+    """
+
+    agg = agg or StatementAggregator()
+
+    # ---------- Chunk for LLM ----------
+
+    chunks = await run_cpu(chunk_text, text, source)
+
+
+    # ---------- LLM (concurrent, rate limited) ----------
+
+    # No size floor: the chunker folds small tails into the chunk before,
+    # so a short chunk is a short text, e.g. the few lines the rules left
+    todo = [(i, chunk) for i, chunk in enumerate(chunks) if chunk.strip()]
+
+    done = 0
+
+    await report_async(progress, "llm", 0, len(todo))
+
+
+    async def dispatch(i, chunk):
+
+        nonlocal done
+
+        logger.info(f"Processing LLM chunk {i+1}/{len(chunks)}")
+
+        result = await run_io(
+            parse_with_llm, chunk,
+            usage=usage,
+            on_row=lambda pos, row: agg.add_row(row, i + 1, pos),
+            on_discard=lambda: agg.discard(i + 1)
+        )
+
+        # Rows the stream did not deliver (cache hits, repaired tails)
+        agg.add_result(result, i + 1)
+
+        done += 1
+
+        await report_async(progress, "llm", done, len(todo))
+
+        return result
+
+
+    # Merge order comes from the chunk index, not completion order
+    return list(await asyncio.gather(
+        *(dispatch(i, chunk) for i, chunk in todo)
+    ))
+
+
+def validated_statement(raw):
+    """
+    validate_data for a CPU worker: the statement fields of the response.
+    """
+
+    data = validate_data(raw)
+
+    return {
+        "currency": data.currency,
+        "unit": data.unit,
+        "years": data.years,
+        "rows": data.to_rows()
+    }
+
+
+def summarize_usage(usage):
+    """
+    Per-call prompt token counts for the response, so prompt size can be
+    tracked document by document.
+    """
+
+    calls = [u for u in usage if not u["cached"]]
+
+    return {
+        "calls": len(calls),
+        "cache_hits": len(usage) - len(calls),
+        "prompt_tokens": sum(u["prompt_tokens"] for u in calls),
+        "completion_tokens": sum(u["completion_tokens"] for u in calls),
+        "prompt_tokens_per_call": [u["prompt_tokens"] for u in calls]
+    }
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import time
+
+from app.core.config import RESULTS_DB
+from app.core.db import connect as db_connect
+from app.core.logger import logger
+from app.services import statement_store
+
+
+HASH_CHUNK = 1024 * 1024
+
+
+# ---------------- DB ----------------
+
+def connect():
+
+    return db_connect(RESULTS_DB)
+
+
+def init_db():
+
+    with connect() as conn:
+
+        conn.execute("PRAGMA journal_mode=WAL")
+
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                content_hash TEXT NOT NULL,
+                version TEXT NOT NULL,
+                file_id TEXT NOT NULL,
+                filename TEXT,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (content_hash, version)
+            )
+        """)
+
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_documents_file_id ON documents (file_id)"
+        )
+
+
+# ---------------- API ----------------
+
+def save_result(content_hash, version, file_id, filename, result):
+    """
+    Remember a successful result, and index its statement for queries.
+    """
+
+    with connect() as conn:
+
+        conn.execute(
+            "INSERT OR REPLACE INTO documents "
+            "(content_hash, version, file_id, filename, result, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (content_hash, version, file_id, filename, json.dumps(result), time.time())
+        )
+
+
+    try:
+        statement_store.save_statement(file_id, filename, content_hash, result)
+
+    except Exception:
+        # The result itself is stored; the index can be backfilled later
+        logger.exception(f"Could not index statement {file_id}")
+
+
+def hash_file(path):
+    """
+    Content hash results are stored under (SHA-256 of the file's bytes).
+    """
+
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as f:
+
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def find_result(content_hash, version):
+    """
+    Prior result for byte-identical content processed by the same pipeline,
+    or None.
+    """
+
+    with connect() as conn:
+
+        row = conn.execute(
+            "SELECT result FROM documents WHERE content_hash = ? AND version = ?",
+            (content_hash, version)
+        ).fetchone()
+
+
+    if row is None:
+        return None
+
+    return json.loads(row["result"])
+
+
+def find_by_file_id(file_id):
+    """
+    Stored result behind /outputs/{file_id}.xlsx, or None.
+    """
+
+    with connect() as conn:
+
+        row = conn.execute(
+            "SELECT result FROM documents WHERE file_id = ? ORDER BY created_at DESC LIMIT 1",
+            (file_id,)
+        ).fetchone()
+
+
+    if row is None:
+        return None
+
+    return json.loads(row["result"])
+
+
+def file_ids():
+    """
+    Every file_id with a stored result (its workbook can be rebuilt).
+    """
+
+    with connect() as conn:
+        return {r["file_id"] for r in conn.execute("SELECT file_id FROM documents")}
+
+
+def all_results():
+    """
+    (file_id, filename, content_hash, result) for every stored result.
+    """
+
+    with connect() as conn:
+
+        rows = conn.execute(
+            "SELECT file_id, filename, content_hash, result FROM documents ORDER BY created_at"
+        ).fetchall()
+
+
+    for r in rows:
+        yield r["file_id"], r["filename"], r["content_hash"], json.loads(r["result"])
@@ -1,41 +1,376 @@
+import csv
 import re
+
+from app.core.keywords import KeywordIndex
 from app.core.logger import logger
+from app.core.mapping import CANONICAL_ROWS
 
 
-# Canonical financial rows we care about
-CORE_ROWS = {
-    "revenue from operations": ["revenue", "revenue from operations"],
-    "total income": ["total income"],
-    "total expenses": ["total expenses", "total expenditure"],
-    "profit before tax": ["profit before tax", "pbt"],
-    "profit after tax": ["profit after tax", "pat", "net profit"],
-    "tax expense": ["tax expense", "income tax"]
-}
+# Rows a usable income statement must have; weighted double in confidence
+REQUIRED_ROWS = [
+    "revenue",
+    "total expenses",
+    "profit before tax",
+    "tax expense",
+    "net profit"
+]
 
 
-def extract_core_rows(text):
+PERIOD_RE = re.compile(r"\b(\d{2}/\d{2}/20\d{2}|20\d{2})\b")
 
-    lines = text.split("\n")
+NUMBER_RE = re.compile(r"\(?-?\d[\d,]*(?:\.\d+)?\)?")
+
+# A column with nothing in it: "-", "—", "–" or "nil" on its own
+PLACEHOLDER = r"(?:[-—–]|nil)"
+
+PLACEHOLDER_RE = re.compile(PLACEHOLDER, re.IGNORECASE)
+
+CELL_RE = re.compile(
+    rf"\(?-?\d[\d,]*(?:\.\d+)?\)?|(?<!\S){PLACEHOLDER}(?!\S)",
+    re.IGNORECASE
+)
+
+# Placeholders between the label and the first number (or ending the line)
+LEADING_PLACEHOLDERS_RE = re.compile(
+    rf"(?:(?<!\S){PLACEHOLDER}(?:\s+|$))+$",
+    re.IGNORECASE
+)
+
+# "Profit before exceptional items and tax": a subtotal, not tax expense
+BEFORE_RE = re.compile(r"\bbefore\b")
+
+# Row numbering ahead of a label: "V.", "(a)", "3)"
+ENUMERATION_RE = re.compile(r"^\(?(?:[ivxlc]+|\d+|[a-z])[.)]\s+")
+
+
+CURRENCY_HINTS = [
+    (re.compile(r"₹|\brs\.?\s|\binr\b|rupee"), "INR"),
+    (re.compile(r"\$|\busd\b"), "USD"),
+    (re.compile(r"€|\beur\b"), "EUR"),
+    (re.compile(r"£|\bgbp\b"), "GBP")
+]
+
+UNIT_HINTS = [
+    (re.compile(r"\bcrores?\b|\bcr\.?\b"), "crore"),
+    (re.compile(r"\blakhs?\b|\blacs?\b"), "lakh"),
+    (re.compile(r"\bmillions?\b|\bmn\b"), "million"),
+    (re.compile(r"\bbillions?\b|\bbn\b"), "billion"),
+    (re.compile(r"\bthousands?\b|'000"), "thousand")
+]
+
+
+# Every variant of every canonical row in one word-bounded pattern
+VARIANT_INDEX = KeywordIndex(CANONICAL_ROWS, word_boundary=True)
+
+VARIANT_ROW = {}
+
+for canonical, variants in CANONICAL_ROWS.items():
+    for v in variants:
+        VARIANT_ROW.setdefault(v, canonical)
+
+
+# ---------------- HELPERS ----------------
+
+def split_cells(line, csv_mode=False):
+    """
+    Label + value cells for one line, numbers and placeholders ("-", "nil")
+    alike, so each value stays in its own period column.
+    Camelot output is CSV; native/OCR text is whitespace separated.
+    """
+
+    if csv_mode:
+
+        cells = [c.strip() for c in next(csv.reader([line]), [])]
+
+        label_cells = []
+        nums = []
+
+        for c in cells:
+
+            if NUMBER_RE.fullmatch(c.replace(" ", "")):
+                nums.append(c.replace(" ", ""))
+
+            elif PLACEHOLDER_RE.fullmatch(c):
+                nums.append(c)
+
+            elif c and not nums:
+                label_cells.append(c)
+
+        return " ".join(label_cells), nums
+
+
+    m = NUMBER_RE.search(line)
+
+    end = m.start() if m else len(line)
 
-    results = {}
+    blank = LEADING_PLACEHOLDERS_RE.search(line[:end])
+
+    if blank:
+        end = blank.start()
+
+    if end == len(line):
+        return line.strip(), []
+
+    label = line[:end].strip()
+
+    nums = CELL_RE.findall(line[end:])
+
+    return label, nums
+
+
+def match_canonical(label, head=False):
+    """
+    (canonical row, match size) for a label, or (None, 0).
+    head: the variant must open the label (after any numbering or a
+    leading "total"), so "Current tax" is not tax expense. For labels of
+    a finished statement, where there is no later line to correct a loose
+    match.
+    """
+
+    text = label.lower().strip()
+
+    if head:
+        text = ENUMERATION_RE.sub("", text)
+        variant = _head_variant(text)
+
+        if variant is None and text.startswith("total "):
+            variant = _head_variant(text[len("total "):])
+
+    else:
+        # Most specific (longest) variant wins: "profit before tax" over "tax"
+        variant = VARIANT_INDEX.longest(text)
+
+    if variant is None:
+        return None, 0
+
+    canonical = VARIANT_ROW[variant]
+
+    # "Profit before exceptional items and tax" names tax, but is a profit line
+    if canonical == "tax expense" and BEFORE_RE.search(text[:text.find(variant)]):
+        return None, 0
+
+    return canonical, len(variant)
+
+
+def _head_variant(text):
+
+    return max(
+        (v for v in VARIANT_INDEX.findall(text) if re.match(rf"{re.escape(v)}\b", text)),
+        key=len, default=None
+    )
+
+
+def detect_periods(lines):
+    """
+    Period columns from the first header-like line (two or more periods on a
+    short line), or from consecutive period-only lines as native PDF text
+    often puts each column header on its own line.
+    Falls back to a single period if that is all there is.
+    """
+
+    single = None
+
+    run = []
 
     for line in lines:
 
-        l = line.lower().strip()
+        stripped = line.strip().strip('"')
+
+        if PERIOD_RE.fullmatch(stripped):
+            run.append(stripped)
+            continue
+
+        if len(run) >= 2:
+            return list(dict.fromkeys(run))
+
+        run = []
+
+
+        found = list(dict.fromkeys(PERIOD_RE.findall(line)))
+
+        if len(found) >= 2 and len(line) < 120:
+            return found
+
+        if found and single is None:
+            single = found[:1]
+
 
-        for canonical, variants in CORE_ROWS.items():
+    if len(run) >= 2:
+        return list(dict.fromkeys(run))
 
-            if any(v in l for v in variants):
+    return single or []
 
-                # Extract numbers (incl negative/decimal)
-                nums = re.findall(r"-?\d[\d,]*\.?\d*", line)
 
-                if nums:
+def detect_meta(text):
 
-                    clean = [n.replace(",", "") for n in nums]
+    head = text[:5000].lower()
 
-                    results[canonical] = clean
+    currency = next((c for p, c in CURRENCY_HINTS if p.search(head)), "UNKNOWN")
+    unit = next((u for p, u in UNIT_HINTS if p.search(head)), "UNKNOWN")
+
+    return currency, unit
+
+
+# ---------------- EXTRACTOR ----------------
+
+def extract_statement(text, csv_mode=False):
+    """
+    Deterministic first pass over statement text.
+
+    Returns the same shape as parse_with_llm plus:
+      confidence - 0..1, how fully the core rows were recovered
+      covered    - canonical rows found
+      row_lines  - canonical row -> line indices it came from (can be dropped
+                   before the LLM)
+    """
+
+    lines = text.split("\n")
+
+    periods = detect_periods(lines)
+
+    currency, unit = detect_meta(text)
+
+
+    found = {}
+
+    pending = None
+
+
+    for idx, line in enumerate(lines):
+
+        if not line.strip():
+            continue
+
+        label, nums = split_cells(line, csv_mode)
+
+
+        # Numbers on their own lines belong to the label above
+        if not label and nums and pending:
+
+            canonical, size, name, p_idx, acc = pending
+
+            acc.extend(nums)
+
+            if len(acc) >= len(periods):
+                _keep(found, canonical, size, name, acc, [p_idx, idx], periods)
+                pending = None
+
+            continue
+
+
+        canonical, size = match_canonical(label)
+
+        if not canonical:
+            pending = None
+            continue
+
+
+        if nums:
+            _keep(found, canonical, size, label, nums, [idx], periods)
+            pending = None
+
+        else:
+            pending = (canonical, size, label, idx, [])
+
+
+    confidence = score(found, periods)
+
+    # Short or ambiguous rows go to the LLM with their lines
+    usable = {c: r for c, r in found.items() if r["complete"] and not r["ambiguous"]}
+
+
+    logger.info(
+        f"Rule extractor: {len(usable)}/{len(CANONICAL_ROWS)} rows "
+        f"({len(found) - len(usable)} left to the LLM), "
+        f"periods {periods}, confidence {confidence}"
+    )
+
+
+    return {
+        "currency": currency,
+        "unit": unit,
+        "years": periods,
+        "rows": [{"name": r["name"], "values": r["values"]} for r in usable.values()],
+        "confidence": confidence,
+        "covered": list(usable.keys()),
+        "row_lines": {c: r["lines"] for c, r in usable.items()}
+    }
+
+
+def _keep(found, canonical, size, name, nums, line_ids, periods):
+
+    if not periods:
+        return
+
+    # Leading extras are usually note references
+    vals = nums[-len(periods):]
+
+    # Later, less specific matches never replace a better one; an equally
+    # specific one under another label ("Current tax" / "Deferred tax")
+    # means the rules cannot tell which line is the row
+    prev = found.get(canonical)
+
+    if prev and prev["size"] > size:
+        return
+
+    if prev and prev["size"] == size:
+        prev["ambiguous"] |= prev["name"] != (name or canonical)
+        return
+
+    found[canonical] = {
+        "name": name or canonical,
+        "size": size,
+        "values": dict(zip(periods, vals)),
+        "complete": len(vals) == len(periods),
+        "ambiguous": False,
+        "lines": line_ids
+    }
+
+
+def score(found, periods):
+
+    if not periods or not found:
+        return 0.0
+
+    weight = {c: (2 if c in REQUIRED_ROWS else 1) for c in CANONICAL_ROWS}
+
+    # Only rows the rules are sure of count as covered
+    sure = {c for c, r in found.items() if r["complete"] and not r["ambiguous"]}
+
+    coverage = sum(weight[c] for c in sure) / sum(weight.values())
+
+    complete = len(sure) / len(found)
+
+    # Required rows are a hard floor for skipping the LLM
+    if not all(c in sure for c in REQUIRED_ROWS):
+        coverage = min(coverage, 0.5)
+
+    return round(coverage * complete, 2)
+
+
+def remaining_text(text, result, rows=None):
+    """
+    Text with rule-covered lines removed, for the LLM to fill the gaps.
+    rows: the canonical rows whose lines may go (default: all covered);
+    lines of rows that did not make it into the statement stay.
+    """
+
+    if rows is None:
+        rows = result["covered"]
+
+    used = {i for c in rows for i in result["row_lines"][c]}
+
+    return "\n".join(
+        line for i, line in enumerate(text.split("\n"))
+        if i not in used
+    )
+
+
+def extract_core_rows(text):
 
-                    logger.info(f"Rule hit: {canonical} -> {clean}")
+    result = extract_statement(text)
 
-    return results
+    return {
+        canonical: [v.replace(",", "") for v in row["values"].values()]
+        for canonical, row in zip(result["covered"], result["rows"])
+    }
@@ -0,0 +1,345 @@
+import os
+import re
+import time
+
+from app.core.config import STATEMENTS_DB
+from app.core.db import connect as db_connect
+from app.core.logger import logger
+from app.core.mapping import CANONICAL_ROWS
+from app.services.rule_extractor import match_canonical
+
+
+YEAR_RE = re.compile(r"20\d{2}")
+
+
+# Bump when the tables or the row matching change. The index is derived
+# from the result store, so an older one is dropped and rebuilt by backfill
+SCHEMA_VERSION = 3
+
+
+# ---------------- DB ----------------
+
+def connect():
+
+    return db_connect(STATEMENTS_DB)
+
+
+def init_db():
+
+    with connect() as conn:
+
+        conn.execute("PRAGMA journal_mode=WAL")
+
+        if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            conn.execute("DROP TABLE IF EXISTS facts")
+            conn.execute("DROP TABLE IF EXISTS reports")
+
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS reports (
+                file_id TEXT PRIMARY KEY,
+                company TEXT NOT NULL,
+                company_key TEXT NOT NULL,
+                filename TEXT,
+                content_hash TEXT,
+                currency TEXT,
+                unit TEXT,
+                scale REAL NOT NULL DEFAULT 1,
+                latest_year INTEGER,
+                created_at REAL NOT NULL
+            )
+        """)
+
+        # One value per report, canonical row and period
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS facts (
+                file_id TEXT NOT NULL,
+                company_key TEXT NOT NULL,
+                canonical TEXT NOT NULL,
+                period TEXT NOT NULL,
+                year INTEGER,
+                label TEXT NOT NULL,
+                value REAL,
+                base_value REAL,
+                PRIMARY KEY (file_id, canonical, period)
+            )
+        """)
+
+        # Time series: one company, one row, ordered by year
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_facts_series "
+            "ON facts (company_key, canonical, year)"
+        )
+
+        # Cross-section: one row, one year, every company
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_facts_section "
+            "ON facts (canonical, year, company_key)"
+        )
+
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_reports_hash ON reports (content_hash)"
+        )
+
+
+# ---------------- HELPERS ----------------
+
+def company_name(filename):
+
+    stem = os.path.splitext(os.path.basename(filename or ""))[0]
+
+    return stem.replace("_", " ").strip() or "Document"
+
+
+def company_key(company):
+
+    return " ".join(company.lower().split())
+
+
+def period_year(period):
+
+    years = YEAR_RE.findall(str(period))
+
+    return int(years[-1]) if years else None
+
+
+def statement_facts(result):
+    """
+    (canonical, period, year, label, value, base_value) for every row of a
+    result that maps to a canonical row. value is in the report's unit,
+    base_value in plain currency units (lakh, crore, million ... applied);
+    both None when missing. A row's label must open with the canonical
+    name ("Current tax" is not tax expense), and the first such row wins,
+    as in the statement itself.
+    """
+
+    from app.models.matrix import StatementMatrix
+
+    data = StatementMatrix.from_statement(result)
+
+    years = [period_year(p) for p in data.years]
+
+    # MISSING -> NULL
+    values = data.values.astype(object)
+    values[data.missing] = None
+
+    base = data.absolute().astype(object)
+    base[data.missing] = None
+
+    seen = set()
+
+    facts = []
+
+    for i, name in enumerate(data.names):
+
+        canonical = match_canonical(name, head=True)[0]
+
+        if canonical is None or canonical in seen:
+            continue
+
+        seen.add(canonical)
+
+        facts += zip(
+            [canonical] * len(years), data.years, years,
+            [name] * len(years), values[i].tolist(), base[i].tolist()
+        )
+
+
+    return facts
+
+
+# ---------------- WRITES ----------------
+
+def save_statement(file_id, filename, content_hash, result, company=None):
+    """
+    Index one successful result. A forced re-run of the same bytes
+    replaces the earlier report. The company is the one given at upload
+    (kept in the result), else taken from the file name.
+    """
+
+    from app.models.matrix import unit_scale
+
+    company = company or result.get("company") or company_name(filename)
+
+    key = company_key(company)
+
+    facts = statement_facts(result)
+
+    years = [f[2] for f in facts if f[2] is not None]
+
+
+    with connect() as conn:
+
+        old = [
+            r["file_id"] for r in conn.execute(
+                "SELECT file_id FROM reports WHERE content_hash = ? OR file_id = ?",
+                (content_hash, file_id)
+            )
+        ]
+
+        for fid in old:
+            conn.execute("DELETE FROM facts WHERE file_id = ?", (fid,))
+            conn.execute("DELETE FROM reports WHERE file_id = ?", (fid,))
+
+
+        conn.execute(
+            "INSERT INTO reports "
+            "(file_id, company, company_key, filename, content_hash, currency, unit, scale, latest_year, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                file_id, company, key, filename, content_hash,
+                result.get("currency"), result.get("unit"), unit_scale(result.get("unit")),
+                max(years) if years else None, time.time()
+            )
+        )
+
+        conn.executemany(
+            "INSERT INTO facts (file_id, company_key, canonical, period, year, label, value, base_value) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(file_id, key) + f for f in facts]
+        )
+
+
+    logger.info(f"Indexed {len(facts)} values for {company} ({file_id})")
+
+
+def index_ready():
+    """
+    False until backfill has run against the current schema.
+    """
+
+    with connect() as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+
+
+def backfill(documents):
+    """
+    Index stored results that predate this store (or its schema), then
+    mark the index as current so later startups skip this.
+    documents: (file_id, filename, content_hash, result) tuples.
+    """
+
+    with connect() as conn:
+        known = {r["file_id"] for r in conn.execute("SELECT file_id FROM reports")}
+
+    for file_id, filename, content_hash, result in documents:
+
+        if file_id not in known and result.get("status") == "success":
+            save_statement(file_id, filename, content_hash, result)
+
+
+    with connect() as conn:
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+# ---------------- QUERIES ----------------
+
+# Per company, period and row the value from the newest report wins: a
+# restated comparative in next year's report replaces the original
+LATEST_FACTS = """
+    SELECT f.company_key, f.canonical, f.period, f.year, f.label, f.value, f.base_value,
+           r.company, r.currency, r.unit, r.scale, r.file_id,
+           ROW_NUMBER() OVER (
+               PARTITION BY f.company_key, f.canonical, f.year
+               ORDER BY r.latest_year DESC, r.created_at DESC
+           ) AS rank
+    FROM facts f JOIN reports r ON r.file_id = f.file_id
+"""
+
+
+def list_companies():
+
+    with connect() as conn:
+
+        rows = conn.execute("""
+            SELECT r.company_key, MAX(r.company) AS company, COUNT(DISTINCT r.file_id) AS reports,
+                   MIN(f.year) AS first_year, MAX(f.year) AS last_year
+            FROM reports r LEFT JOIN facts f ON f.file_id = r.file_id
+            GROUP BY r.company_key
+            ORDER BY r.company_key
+        """).fetchall()
+
+    return [dict(r) for r in rows]
+
+
+def time_series(company, rows):
+    """
+    {canonical: [{period, year, value, base_value, label, unit, currency,
+    file_id}]}, oldest year first.
+    """
+
+    placeholders = ",".join("?" * len(rows))
+
+    with connect() as conn:
+
+        found = conn.execute(
+            f"SELECT * FROM ({LATEST_FACTS} WHERE f.company_key = ? AND f.canonical IN ({placeholders})) "
+            "WHERE rank = 1 ORDER BY canonical, year",
+            [company_key(company)] + list(rows)
+        ).fetchall()
+
+
+    series = {r: [] for r in rows}
+
+    for r in found:
+
+        series[r["canonical"]].append({
+            "period": r["period"],
+            "year": r["year"],
+            "value": r["value"],
+            "base_value": r["base_value"],
+            "label": r["label"],
+            "unit": r["unit"],
+            "currency": r["currency"],
+            "file_id": r["file_id"]
+        })
+
+    return series
+
+
+def cross_section(row, year=None):
+    """
+    One canonical row across companies for a year (each company's latest
+    year when year is None), largest first by base_value, so reports in
+    lakh, crore or million rank on the same scale.
+    """
+
+    with connect() as conn:
+
+        if year is None:
+
+            found = conn.execute(
+                f"SELECT * FROM ({LATEST_FACTS} WHERE f.canonical = ?) AS x "
+                "WHERE rank = 1 AND year = ("
+                "    SELECT MAX(year) FROM facts WHERE company_key = x.company_key AND canonical = x.canonical"
+                ") ORDER BY base_value IS NULL, base_value DESC",
+                (row,)
+            ).fetchall()
+
+        else:
+
+            found = conn.execute(
+                f"SELECT * FROM ({LATEST_FACTS} WHERE f.canonical = ? AND f.year = ?) "
+                "WHERE rank = 1 ORDER BY base_value IS NULL, base_value DESC",
+                (row, year)
+            ).fetchall()
+
+
+    return [
+        {
+            "company": r["company"],
+            "period": r["period"],
+            "year": r["year"],
+            "value": r["value"],
+            "base_value": r["base_value"],
+            "label": r["label"],
+            "unit": r["unit"],
+            "currency": r["currency"],
+            "file_id": r["file_id"]
+        }
+        for r in found
+    ]
+
+
+def known_row(row):
+
+    return row in CANONICAL_ROWS
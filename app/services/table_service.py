@@ -1,64 +1,152 @@
-import camelot
-import fitz
+import re
 
+from app.core.config import TABLE_MAX_PAGES
 from app.core.logger import logger
+from app.core.timing import timed
+from app.services.pdf_service import find_income_pages, section_end
 
 
-# ---------------- Quick Text Check ----------------
+# A page is read as a grid (lattice) when it has at least this many long
+# horizontal and vertical rules; otherwise by whitespace (stream)
+MIN_HORIZONTAL_RULES = 3
+MIN_VERTICAL_RULES = 2
 
-def has_text_first_pages(path, max_pages=2):
+# Rules shorter than this share of the page are underlines, not cell borders
+MIN_RULE_SHARE = 0.15
 
-    doc = fitz.open(path)
+# Thicker than this is a filled box, not a rule
+MAX_RULE_WIDTH = 3
 
-    pages = min(len(doc), max_pages)
+NUMBER_RE = re.compile(r"\d[\d,]*\.?\d*")
 
-    for i in range(pages):
 
-        txt = doc[i].get_text().strip()
+# ---------------- Page Selection ----------------
 
-        if len(txt) > 100:
-            return True
+def table_pages(doc, max_pages=TABLE_MAX_PAGES):
+    """
+    Pages worth giving to Camelot: each income-statement heading page and
+    the page after it, unless a new section starts there. When there are
+    more than max_pages, the most numeric pages win. 0-based, sorted.
+    """
 
-    return False
+    pages = set()
 
+    for pg in find_income_pages(doc):
+        pages.update(range(pg, section_end(doc, pg, min(len(doc) - 1, pg + 1)) + 1))
 
-# ---------------- Table Extractor ----------------
 
-def extract_tables(pdf_path):
+    if len(pages) > max_pages:
 
-    # Quick reject: no text → skip Camelot
-    if not has_text_first_pages(pdf_path):
+        ranked = sorted(pages, key=lambda i: -len(NUMBER_RE.findall(doc.page_text(i))))
 
-        logger.info("PDF likely scanned. Skipping Camelot.")
+        pages = ranked[:max_pages]
 
-        return []
 
+    return sorted(pages)
 
-    logger.info("Trying Camelot table extraction")
 
-    try:
+def count_rules(page):
+    """
+    (horizontal, vertical) ruling lines drawn on the page, from its vector
+    drawings: line segments and thin rectangles.
+    """
+
+    width, height = page.rect.width, page.rect.height
+
+    horizontal = vertical = 0
+
+    for path in page.get_drawings():
+
+        for item in path["items"]:
+
+            if item[0] == "l":
+                p, q = item[1], item[2]
+                dx, dy = abs(q.x - p.x), abs(q.y - p.y)
+
+            elif item[0] == "re":
+                dx, dy = item[1].width, item[1].height
+
+            else:
+                continue
 
-        # Only try first 3 pages
-        tables = camelot.read_pdf(
-            pdf_path,
-            pages="1-3",
-            flavor="stream"
-        )
 
-        if tables.n == 0:
+            if dy <= MAX_RULE_WIDTH and dx >= width * MIN_RULE_SHARE:
+                horizontal += 1
 
-            logger.info("Camelot found no tables")
+            elif dx <= MAX_RULE_WIDTH and dy >= height * MIN_RULE_SHARE:
+                vertical += 1
 
-            return []
 
+    return horizontal, vertical
 
-        logger.info(f"Camelot found {tables.n} tables")
 
-        return [t.df for t in tables]
+def page_flavor(doc, i):
 
+    try:
+        horizontal, vertical = count_rules(doc.doc[i])
 
     except Exception as e:
+        logger.warning(f"Ruling-line check failed on page {i + 1}: {e}")
+        return "stream"
+
+    if horizontal >= MIN_HORIZONTAL_RULES and vertical >= MIN_VERTICAL_RULES:
+        return "lattice"
+
+    return "stream"
+
+
+def table_flavors(doc):
+    """
+    {page: flavor} for the pages worth giving to Camelot, in page order.
+    Empty when there is no native income-statement heading (scanned, or no
+    P&L at all).
+    """
+
+    pages = table_pages(doc)
+
+    if not pages:
+
+        logger.info("No income-statement pages in native text. Skipping Camelot.")
+
+        return {}
+
+
+    flavors = {i: page_flavor(doc, i) for i in pages}
+
+    logger.info(
+        "Trying Camelot on pages "
+        + ", ".join(f"{i + 1} ({f})" for i, f in flavors.items())
+    )
+
+    return flavors
+
+
+# ---------------- Camelot ----------------
+
+def read_page_tables(path, i, flavor):
+    """
+    Camelot on one page (0-based). A lattice page that yields nothing is
+    retried as stream. Module-level so each page can be its own CPU pool
+    task; returns the tables as CSV text so pandas stays in the worker.
+    """
+
+    import camelot   # pulls in pandas; only needed once a PDF has tables
+
+    tables = []
+
+    with timed("camelot_page"):
+
+        for f in (flavor, "stream") if flavor == "lattice" else (flavor,):
+
+            try:
+                tables = camelot.read_pdf(path, pages=str(i + 1), flavor=f)
+
+            except Exception as e:
+                logger.warning(f"Camelot ({f}) failed on page {i + 1}: {e}")
+                continue
+
+            if tables.n:
+                break
 
-        logger.warning(f"Camelot failed: {e}")
 
-        return []
+        return [t.df.to_csv(index=False) for t in tables]
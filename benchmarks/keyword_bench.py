@@ -0,0 +1,187 @@
+"""
+Micro-benchmark for the keyword filters (app.core.keywords).
+
+Generates the text of a synthetic 300-page annual report and measures
+lines/sec for the line filter fed to the LLM and for row classification,
+the previous substring loops vs the compiled index. Results are checked
+for equality before anything is timed.
+
+    python -m benchmarks.keyword_bench [--pages 300] [--repeat 5]
+"""
+import argparse
+import random
+import time
+
+from app.services.llm_service import FINANCIAL_KEYWORDS, filter_financial_lines
+from app.services.pipeline import (
+    CORE_KEYWORDS,
+    BLOCK_WORDS,
+    BALANCE_SHEET_WORDS,
+    CASHFLOW_WORDS,
+    ROW_INDEX,
+    is_useful_row
+)
+
+
+LINES_PER_PAGE = 60
+
+
+NARRATIVE = [
+    "The Board of Directors is pleased to present the Annual Report",
+    "Our people remain at the heart of everything we do this year",
+    "The Company continued to invest in digital capabilities and growth",
+    "Management discussion and analysis of the operating environment",
+    "Corporate governance report and statutory disclosures follow below",
+    "During the year the company expanded into 3 new markets (FY 2024)"
+]
+
+ROW_LABELS = [
+    "Revenue from operations", "Other income", "Total income",
+    "Cost of materials consumed", "Employee benefits expense",
+    "Finance costs", "Depreciation and amortisation expense",
+    "Other expenses", "Total expenses", "Profit before tax",
+    "Current tax", "Deferred tax", "Profit for the year",
+    "Basic earnings per share", "Net cash from operating activities",
+    "Trade receivables", "Impairment of goodwill", "Share of profit of associates",
+    "Lease liability repayment", "Total equity", "Note 21", "Segment A"
+]
+
+
+# ---------------- SYNTHETIC TEXT ----------------
+
+def synthetic_report(pages, seed=7):
+
+    rnd = random.Random(seed)
+
+    lines = []
+
+    for _ in range(pages):
+
+        for _ in range(LINES_PER_PAGE):
+
+            if rnd.random() < 0.7:
+                lines.append(rnd.choice(NARRATIVE))
+
+            else:
+                nums = "  ".join(f"{rnd.randint(100, 99999):,}" for _ in range(2))
+                lines.append(f"{rnd.choice(ROW_LABELS)}  {nums}")
+
+    return lines
+
+
+# ---------------- BASELINES (pre-index code) ----------------
+
+def legacy_filter_financial_lines(text):
+
+    keep = []
+
+    for line in text.split("\n"):
+
+        l = line.lower().strip()
+
+        if len(l) < 5:
+            continue
+
+        if any(k in l for k in FINANCIAL_KEYWORDS):
+            keep.append(line)
+
+        elif sum(c.isdigit() for c in line) >= 6:
+            keep.append(line)
+
+    return "\n".join(" ".join(l.split()) for l in keep)
+
+
+def legacy_keep_row(name):
+
+    n = name.lower().strip()
+
+    if any(w in n for w in CASHFLOW_WORDS):
+        return False
+
+    if len(n) < 5:
+        return False
+
+    # is_useful_row used to rebuild these lists on every call
+    core = list(CORE_KEYWORDS)
+    block = list(BLOCK_WORDS)
+    balance = list(BALANCE_SHEET_WORDS)
+
+    if not any(k in n for k in core):
+        return False
+
+    if any(b in n for b in block):
+        return False
+
+    return not any(b in n for b in balance)
+
+
+def indexed_keep_row(name):
+
+    tags = ROW_INDEX.classify(name.lower())
+
+    return "cashflow" not in tags and is_useful_row(name, tags)
+
+
+# ---------------- RUN ----------------
+
+def measure(fn, n_lines, repeat):
+
+    best = float("inf")
+
+    for _ in range(repeat):
+
+        start = time.perf_counter()
+
+        fn()
+
+        best = min(best, time.perf_counter() - start)
+
+    return n_lines / best
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    lines = synthetic_report(args.pages)
+
+    text = "\n".join(lines)
+
+
+    # Same answers before timing anything
+    assert legacy_filter_financial_lines(text) == filter_financial_lines(text)
+
+    for l in lines:
+        assert legacy_keep_row(l) == indexed_keep_row(l), l
+
+
+    cases = [
+        (
+            "filter_financial_lines",
+            lambda: legacy_filter_financial_lines(text),
+            lambda: filter_financial_lines(text)
+        ),
+        (
+            "row classification",
+            lambda: [legacy_keep_row(l) for l in lines],
+            lambda: [indexed_keep_row(l) for l in lines]
+        )
+    ]
+
+
+    print(f"{len(lines)} lines ({args.pages} pages), best of {args.repeat}\n")
+    print(f"{'filter':<24}{'legacy lines/s':>16}{'indexed lines/s':>18}{'speedup':>10}")
+
+    for name, old, new in cases:
+
+        a = measure(old, len(lines), args.repeat)
+        b = measure(new, len(lines), args.repeat)
+
+        print(f"{name:<24}{a:>16,.0f}{b:>18,.0f}{b / a:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
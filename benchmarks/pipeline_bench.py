@@ -0,0 +1,713 @@
+"""
+End-to-end benchmark of the upload pipeline on synthetic financial PDFs.
+
+Generates income-statement reports (text, scanned, multi-year) at several
+page counts, posts each one to /upload in a fresh worker process with a
+stub LLM answering the document's own statement, and reports throughput
+plus p50 / p95 latency and peak RSS per stage.
+
+    python -m benchmarks.pipeline_bench [--kinds text,multiyear,scanned]
+                                        [--pages 4,40,120] [--repeat 3]
+                                        [--llm-latency 0.3] [--json out.json]
+
+    python -m benchmarks.pipeline_bench --compare HEAD~3 HEAD
+
+--compare checks each revision out into a temporary git worktree and runs
+the same corpus against it, this file being the harness for both.
+Revisions whose results carry no per-stage timings only report the
+end-to-end numbers.
+
+Peak RSS is the worker's high-water mark when the stage finished (CPU
+stages run inline, OCR with one process), so the stage where it jumps is
+the one that allocated. Scanned PDFs need tesseract (TESSERACT_CMD) and
+are skipped without it.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(HERE)
+
+KINDS = ("text", "multiyear", "scanned")
+
+YEARS = {"text": 2, "multiyear": 5, "scanned": 2}
+
+SCAN_DPI = 150
+
+FONT_SIZE = 9
+LINE_HEIGHT = 13
+LINES_PER_PAGE = 55
+
+
+NARRATIVE = [
+    "The Board of Directors is pleased to present the Annual Report of the Company.",
+    "Our people remain at the heart of everything we do and engagement scores improved.",
+    "The Company continued to invest in digital capabilities and new capacity.",
+    "Management discussion and analysis of the operating environment follows.",
+    "Corporate governance report and statutory disclosures are set out below.",
+    "During the year the Company expanded into three new markets across the region.",
+    "The Audit Committee met five times and reviewed the internal control framework.",
+    "Sustainability initiatives reduced water intensity across all manufacturing sites."
+]
+
+# label, typical size (lakhs); totals are computed
+STATEMENT_ROWS = [
+    ("Revenue from operations", 90000),
+    ("Other income", 2500),
+    ("Total income", None),
+    ("Cost of materials consumed", 38000),
+    ("Employee benefits expense", 11000),
+    ("Finance costs", 1800),
+    ("Depreciation and amortisation expense", 3200),
+    ("Other expenses", 16000),
+    ("Total expenses", None),
+    ("Profit before tax", None),
+    ("Current tax", 4800),
+    ("Deferred tax", 600),
+    ("Profit for the year", None)
+]
+
+
+# ---------------- SYNTHETIC REPORTS ----------------
+
+def make_statement(rnd, n_years, latest=2024):
+    """
+    FinancialData-shaped statement with consistent totals, which is also
+    what the stub LLM answers for this document.
+    """
+
+    years = [str(latest - i) for i in range(n_years)]
+
+    columns = {}
+
+    for year in years:
+
+        v = {}
+
+        for label, base in STATEMENT_ROWS:
+            if base:
+                v[label] = round(base * rnd.uniform(0.7, 1.3))
+
+        v["Total income"] = v["Revenue from operations"] + v["Other income"]
+
+        v["Total expenses"] = sum(
+            v[label] for label in (
+                "Cost of materials consumed", "Employee benefits expense",
+                "Finance costs", "Depreciation and amortisation expense",
+                "Other expenses"
+            )
+        )
+
+        v["Profit before tax"] = v["Total income"] - v["Total expenses"]
+        v["Profit for the year"] = v["Profit before tax"] - v["Current tax"] - v["Deferred tax"]
+
+        columns[year] = v
+
+
+    return {
+        "currency": "INR",
+        "unit": "Lakhs",
+        "years": years,
+        "rows": [
+            {
+                "name": label,
+                "values": {y: f"{columns[y][label]:,}" for y in years}
+            }
+            for label, _ in STATEMENT_ROWS
+        ]
+    }
+
+
+def report_pages(rnd, statement, n_pages):
+    """
+    Lines per page: narrative everywhere, the statement about two thirds
+    in, where annual reports put their financials.
+    """
+
+    at = min(n_pages - 1, (n_pages * 2) // 3)
+
+    pages = []
+
+    for p in range(n_pages):
+
+        if p == at:
+            pages.append(statement_lines(statement))
+            continue
+
+        pages.append([
+            (rnd.choice(NARRATIVE), [])
+            for _ in range(LINES_PER_PAGE)
+        ])
+
+    return pages
+
+
+def statement_lines(statement):
+
+    years = statement["years"]
+
+    return [
+        ("Statement of Profit and Loss for the year ended 31 March " + years[0], []),
+        ("(All amounts in Rs. Lakhs)", []),
+        ("", []),
+        ("Particulars", years)
+    ] + [
+        (row["name"], [row["values"][y] for y in years])
+        for row in statement["rows"]
+    ]
+
+
+def write_pdf(path, pages, scanned=False):
+
+    import fitz
+
+    doc = fitz.open()
+
+    for lines in pages:
+
+        page = doc.new_page()
+
+        y = 60
+
+        for label, cells in lines:
+
+            page.insert_text((60, y), label, fontsize=FONT_SIZE)
+
+            # Right-aligned numeric columns, like a typeset statement
+            for i, cell in enumerate(cells):
+
+                right = 330 + (i + 1) * 48
+
+                x = right - fitz.get_text_length(cell, fontsize=FONT_SIZE)
+
+                page.insert_text((x, y), cell, fontsize=FONT_SIZE)
+
+            y += LINE_HEIGHT
+
+
+    if scanned:
+
+        raster = fitz.open()
+
+        for page in doc:
+
+            pix = page.get_pixmap(dpi=SCAN_DPI, colorspace=fitz.csGRAY)
+
+            out = raster.new_page(width=page.rect.width, height=page.rect.height)
+
+            out.insert_image(out.rect, pixmap=pix)
+
+        doc.close()
+
+        doc = raster
+
+
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+
+
+def build_corpus(folder, kinds, page_counts, seed=7):
+    """
+    Writes the PDFs plus corpus.json (file -> kind, pages, statement).
+    """
+
+    os.makedirs(folder, exist_ok=True)
+
+    rnd = random.Random(seed)
+
+    corpus = []
+
+    for kind in kinds:
+
+        for n_pages in page_counts:
+
+            statement = make_statement(rnd, YEARS[kind])
+
+            path = os.path.join(folder, f"{kind}_{n_pages}p.pdf")
+
+            write_pdf(path, report_pages(rnd, statement, n_pages), scanned=(kind == "scanned"))
+
+            corpus.append({
+                "file": path,
+                "kind": kind,
+                "pages": n_pages,
+                "statement": statement
+            })
+
+
+    # Small document run first in every worker so imports and first-call
+    # setup are not charged to the measured one; other values so the LLM
+    # cache cannot answer the real run
+    statement = make_statement(random.Random(seed + 1), 2, latest=2019)
+
+    warmup = os.path.join(folder, "warmup.pdf")
+
+    write_pdf(warmup, report_pages(rnd, statement, 2))
+
+
+    with open(os.path.join(folder, "corpus.json"), "w", encoding="utf-8") as f:
+        json.dump({"documents": corpus, "warmup": {"file": warmup, "statement": statement}}, f)
+
+    return corpus
+
+
+# ---------------- STUB LLM ----------------
+
+class BenchLLM:
+    """
+    Answers every prompt with the statement of the document being run,
+    after a fixed latency. Shaped like the Groq client as well, for
+    revisions that predate app.services.llm_backends.
+    """
+
+    name = "stub"
+
+    streams_json = True
+
+    def __init__(self, latency):
+
+        self.latency = latency
+
+        self.answer = "{}"
+
+        self.chat = SimpleNamespace(completions=self)
+
+
+    def create(self, messages=None, stream=False, **request):
+
+        time.sleep(self.latency)
+
+        usage = SimpleNamespace(
+            prompt_tokens=sum(len(m["content"]) for m in messages) // 4,
+            completion_tokens=len(self.answer) // 4
+        )
+
+        if not stream:
+
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content=self.answer))],
+                usage=usage
+            )
+
+        pieces = [
+            SimpleNamespace(
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=self.answer[i:i + 64]))],
+                usage=None
+            )
+            for i in range(0, len(self.answer), 64)
+        ]
+
+        pieces.append(SimpleNamespace(choices=[], usage=usage))
+
+        return iter(pieces)
+
+
+def install_llm(llm):
+
+    try:
+        from app.services import llm_backends
+        llm_backends._backend = llm
+
+    except ImportError:
+        from app.services import llm_service
+        llm_service.client = llm
+
+
+# ---------------- WORKER ----------------
+
+_llm = None
+
+_stage_rss = {}
+
+
+def peak_rss_mb():
+
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def watch_rss():
+    """
+    Note the process high-water mark every time a stage is recorded.
+    """
+
+    try:
+        from app.core import timing
+    except ImportError:
+        return
+
+    add = timing.StageTimer.add
+
+    def add_with_rss(self, stage, seconds):
+
+        add(self, stage, seconds)
+
+        _stage_rss[stage] = max(_stage_rss.get(stage, 0), peak_rss_mb())
+
+    timing.StageTimer.add = add_with_rss
+
+
+def init_worker(tree, workdir, llm_latency):
+
+    global _llm
+
+    # Per-document lines only; the app's own logging would drown them
+    logging.disable(logging.WARNING)
+    warnings.simplefilter("ignore")
+
+    os.chdir(workdir)
+
+    sys.path.insert(0, tree)
+
+    _llm = BenchLLM(llm_latency)
+
+
+def post_pdf(client, path, statement):
+
+    _llm.answer = json.dumps(statement)
+
+    with open(path, "rb") as f:
+
+        start = time.perf_counter()
+
+        res = client.post(
+            "/upload?force=true",
+            files={"file": (os.path.basename(path), f, "application/pdf")}
+        )
+
+        seconds = time.perf_counter() - start
+
+    return res.json(), seconds
+
+
+def run_document(doc, warmup):
+    """
+    One measured document in a fresh process (see main: one task per child).
+    """
+
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    install_llm(_llm)
+
+    watch_rss()
+
+
+    with TestClient(app) as client:
+
+        post_pdf(client, warmup["file"], warmup["statement"])
+
+        _stage_rss.clear()
+
+        baseline = peak_rss_mb()
+
+        body, seconds = post_pdf(client, doc["file"], doc["statement"])
+
+
+    stages = {
+        name: entry["seconds"]
+        for name, entry in body.get("timings", {}).get("stages", {}).items()
+    }
+
+    return {
+        "file": os.path.basename(doc["file"]),
+        "kind": doc["kind"],
+        "pages": doc["pages"],
+        "status": body.get("status", "error"),
+        "message": body.get("message"),
+        "rows": len(body.get("rows", [])),
+        "seconds": seconds,
+        "stages": stages,
+        "stage_rss_mb": dict(_stage_rss),
+        "baseline_rss_mb": baseline,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+def worker_env(workdir):
+
+    return {
+        "LLM_BACKEND": "stub",
+        "GROQ_API_KEY": os.environ.get("GROQ_API_KEY", "bench"),
+        "DATA_DIR": os.path.join(workdir, "data"),
+        "LLM_CACHE_TTL_DAYS": "0",
+        "LLM_RPM": "1000000",
+        "LLM_TPM": "1000000000",
+        "INLINE_CPU": "1"
+    }
+
+
+def run_corpus(corpus_dir, tree, repeat, llm_latency, workers=1):
+
+    with open(os.path.join(corpus_dir, "corpus.json"), encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    workdir = tempfile.mkdtemp(prefix="pipeline_bench_")
+
+    os.environ.update(worker_env(workdir))
+
+
+    results = []
+
+    started = time.perf_counter()
+
+    try:
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=1,
+            initializer=init_worker,
+            initargs=(tree, workdir, llm_latency)
+        ) as pool:
+
+            futures = [
+                pool.submit(run_document, doc, corpus["warmup"])
+                for doc in corpus["documents"]
+                for _ in range(repeat)
+            ]
+
+            for future in futures:
+
+                r = future.result()
+
+                results.append(r)
+
+                print(
+                    f"  {r['file']:<22}{r['status']:<9}{r['seconds']:>8.2f}s"
+                    f"{r['peak_rss_mb']:>8.0f} MB  {r['message'] or ''}",
+                    file=sys.stderr
+                )
+
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+    return {"wall_seconds": time.perf_counter() - started, "documents": results}
+
+
+# ---------------- REPORT ----------------
+
+def percentile(values, q):
+
+    values = sorted(values)
+
+    if not values:
+        return 0.0
+
+    k = (len(values) - 1) * q
+
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def summarize(run):
+
+    docs = [d for d in run["documents"] if d["status"] == "success"]
+
+    stages = {}
+
+    for d in docs:
+
+        stages.setdefault("end_to_end", {"seconds": [], "rss": []})
+
+        stages["end_to_end"]["seconds"].append(d["seconds"])
+        stages["end_to_end"]["rss"].append(d["peak_rss_mb"])
+
+        for name, seconds in d["stages"].items():
+
+            entry = stages.setdefault(name, {"seconds": [], "rss": []})
+
+            entry["seconds"].append(seconds)
+
+            if name in d["stage_rss_mb"]:
+                entry["rss"].append(d["stage_rss_mb"][name])
+
+
+    busy = sum(d["seconds"] for d in docs)
+
+    return {
+        "documents": len(run["documents"]),
+        "failed": len(run["documents"]) - len(docs),
+        "docs_per_min": len(docs) / busy * 60 if busy else 0.0,
+        "pages_per_sec": sum(d["pages"] for d in docs) / busy if busy else 0.0,
+        "stages": {
+            name: {
+                "n": len(e["seconds"]),
+                "p50": percentile(e["seconds"], 0.5),
+                "p95": percentile(e["seconds"], 0.95),
+                "peak_rss_mb": max(e["rss"]) if e["rss"] else None
+            }
+            for name, e in stages.items()
+        }
+    }
+
+
+def print_summary(label, s):
+
+    print(f"\n{label}: {s['documents']} runs, {s['failed']} failed, "
+          f"{s['docs_per_min']:.1f} docs/min, {s['pages_per_sec']:.1f} pages/s\n")
+
+    print(f"{'stage':<18}{'n':>5}{'p50 ms':>11}{'p95 ms':>11}{'peak RSS MB':>13}")
+
+    for name, e in sorted(s["stages"].items(), key=lambda kv: -kv[1]["p95"]):
+
+        rss = f"{e['peak_rss_mb']:.0f}" if e["peak_rss_mb"] is not None else "-"
+
+        print(f"{name:<18}{e['n']:>5}{e['p50'] * 1000:>11.1f}{e['p95'] * 1000:>11.1f}{rss:>13}")
+
+
+def print_comparison(a_label, a, b_label, b):
+
+    print(f"\n{a_label} -> {b_label}")
+    print(f"  docs/min  {a['docs_per_min']:>9.1f} -> {b['docs_per_min']:>9.1f}")
+    print(f"  pages/s   {a['pages_per_sec']:>9.1f} -> {b['pages_per_sec']:>9.1f}\n")
+
+    print(f"{'stage':<18}{'p50 ms':>20}{'p95 ms':>20}{'change p95':>12}")
+
+    for name in sorted(set(a["stages"]) | set(b["stages"])):
+
+        x = a["stages"].get(name)
+        y = b["stages"].get(name)
+
+        def cell(e, key):
+            return f"{e[key] * 1000:.1f}" if e else "-"
+
+        change = ""
+
+        if x and y and x["p95"]:
+            change = f"{(y['p95'] / x['p95'] - 1) * 100:+.0f}%"
+
+        print(
+            f"{name:<18}"
+            f"{cell(x, 'p50') + ' -> ' + cell(y, 'p50'):>20}"
+            f"{cell(x, 'p95') + ' -> ' + cell(y, 'p95'):>20}"
+            f"{change:>12}"
+        )
+
+
+# ---------------- COMPARE ----------------
+
+def run_revision(rev, corpus_dir, args):
+    """
+    Benchmark another revision: check it out into a temporary worktree
+    and run this harness against it in a subprocess.
+    """
+
+    tree = tempfile.mkdtemp(prefix="bench_rev_")
+
+    out = os.path.join(tree, "bench.json")
+
+    subprocess.run(
+        ["git", "worktree", "add", "--detach", tree, rev],
+        cwd=REPO, check=True, capture_output=True
+    )
+
+    try:
+
+        subprocess.run(
+            [
+                sys.executable, os.path.abspath(__file__),
+                "--corpus", corpus_dir, "--tree", tree,
+                "--repeat", str(args.repeat),
+                "--llm-latency", str(args.llm_latency),
+                "--workers", str(args.workers),
+                "--json", out, "--quiet"
+            ],
+            check=True
+        )
+
+        with open(out, encoding="utf-8") as f:
+            return json.load(f)
+
+    finally:
+        subprocess.run(
+            ["git", "worktree", "remove", "--force", tree],
+            cwd=REPO, capture_output=True
+        )
+
+
+# ---------------- MAIN ----------------
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--kinds", default=",".join(KINDS))
+    parser.add_argument("--pages", default="4,40,120")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds per stub LLM call")
+    parser.add_argument("--workers", type=int, default=1, help="documents run side by side")
+    parser.add_argument("--corpus", help="reuse a corpus folder instead of generating one")
+    parser.add_argument("--tree", default=REPO, help="source tree to benchmark")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "HEAD"))
+    parser.add_argument("--json", help="write the summary here")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+
+    kinds = [k for k in args.kinds.split(",") if k]
+
+    # The binary the app will run (TESSERACT_CMD), not whatever is on PATH
+    from app.core.config import TESSERACT_CMD
+
+    if "scanned" in kinds and not shutil.which(TESSERACT_CMD):
+        print(f"tesseract not found ({TESSERACT_CMD}); skipping scanned PDFs", file=sys.stderr)
+        kinds.remove("scanned")
+
+
+    corpus_dir = args.corpus
+
+    if corpus_dir is None:
+
+        corpus_dir = tempfile.mkdtemp(prefix="bench_corpus_")
+
+        corpus = build_corpus(corpus_dir, kinds, [int(p) for p in args.pages.split(",")])
+
+        print(f"Generated {len(corpus)} PDFs in {corpus_dir}", file=sys.stderr)
+
+
+    if args.compare:
+
+        base, head = args.compare
+
+        a = run_revision(base, corpus_dir, args)
+        b = run_revision(head, corpus_dir, args)
+
+        print_summary(base, a)
+        print_summary(head, b)
+        print_comparison(base, a, head, b)
+
+        return
+
+
+    summary = summarize(run_corpus(
+        corpus_dir, os.path.abspath(args.tree), args.repeat, args.llm_latency, args.workers
+    ))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+    if not args.quiet:
+        print_summary(args.tree, summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+import os
+import sys
+import tempfile
+
+# Settings are read when app.core.config is imported, so they are set
+# before any test module imports the app
+STATE = tempfile.mkdtemp(prefix="finance-tests-")
+
+os.environ.setdefault("DATA_DIR", os.path.join(STATE, "data"))
+os.environ.setdefault("LLM_BACKEND", "stub")
+os.environ.setdefault("LLM_CACHE_TTL_DAYS", "0")
+os.environ.setdefault("INLINE_CPU", "1")
+os.environ.setdefault("WARMUP", "0")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,79 @@
+from app.core.tokens import count_tokens
+from app.services.chunker import MIN_CHUNK_TOKENS, chunk_text, find_header
+
+
+HEADER = "Particulars 2024 2023"
+
+
+def statement(rows):
+
+    lines = ["Statement of Profit and Loss", HEADER]
+
+    lines += [f"Expense line number {i} {1000 + i} {900 + i}" for i in range(rows)]
+
+    return "\n".join(lines)
+
+
+def test_chunks_fit_budget_and_repeat_header():
+
+    text = statement(200)
+
+    chunks = chunk_text(text, budget=300)
+
+    assert len(chunks) > 1
+
+    for chunk in chunks:
+        assert chunk.split("\n")[0] == HEADER
+
+    # The last one may have a small tail folded in
+    for chunk in chunks[:-1]:
+        assert count_tokens(chunk) <= 300
+
+
+def test_every_line_kept_once_in_order():
+
+    text = statement(200)
+
+    lines = [
+        l for chunk in chunk_text(text, budget=300)
+        for l in chunk.split("\n") if l != HEADER
+    ]
+
+    assert lines == [l for l in text.split("\n") if l != HEADER]
+
+
+def test_heading_starts_new_chunk():
+
+    text = statement(20) + "\nStatement of Cash Flows\n" + "\n".join(
+        f"Cash line {i} {100 + i} {90 + i}" for i in range(20)
+    )
+
+    chunks = chunk_text(text, budget=5000)
+
+    assert len(chunks) == 2
+    assert chunks[1].split("\n")[1] == "Statement of Cash Flows"
+
+
+def test_small_tail_folded_into_previous_chunk():
+
+    chunks = chunk_text(statement(200), budget=300)
+
+    assert count_tokens(chunks[-1]) >= MIN_CHUNK_TOKENS
+
+
+def test_tables_kept_whole():
+
+    table = "\n".join(f'"Row {i}","{i}","{i + 1}"' for i in range(5))
+
+    text = "\n\n".join([table] * 6)
+
+    chunks = chunk_text(text, source="tables", budget=10 * count_tokens(table))
+
+    for chunk in chunks:
+        assert chunk.count('"Row 0"') == chunk.count('"Row 4"')
+
+
+def test_find_header_joins_period_only_lines():
+
+    assert find_header(["Particulars", "2024", "2023", "Revenue 1 2"]) == "2024  2023"
+    assert find_header(["Revenue 1 2"]) is None
@@ -0,0 +1,36 @@
+import pytest
+
+from app.services.compactor import compact_rows, is_header
+
+
+STATEMENT = """Statement of Profit and Loss for the year ended 31 March 2024
+Particulars 31 March 2024 31 March 2023
+Revenue from operations 12,000 10,000
+Other income 2024 1,500
+Finance costs 300 2023
+Total expenses 9,000 8,000
+Profit for the year 3,024 2,500"""
+
+
+def test_values_equal_to_a_period_are_kept():
+
+    lines = compact_rows(STATEMENT).split("\n")
+
+    assert lines[0] == "Particulars | 2024 | 2023"
+    assert "Other income | 2024 | 1,500" in lines
+    assert "Finance costs | 300 | 2023" in lines
+    assert not any(l.startswith("Statement of") for l in lines)
+
+
+@pytest.mark.parametrize("nums, header", [
+    (["2024", "2023"], True),
+    (["31", "2024", "31", "2023"], True),
+    (["31.03", "2024", "31.03", "2023"], True),
+    (["31", "2024"], True),
+    (["2024", "1,500"], False),
+    (["300", "2023"], False),
+    (["12,000", "10,000"], False),
+])
+def test_is_header(nums, header):
+
+    assert is_header(nums, ["2024", "2023"]) is header
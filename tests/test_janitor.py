@@ -0,0 +1,120 @@
+import os
+import time
+
+import pytest
+
+from app.services import janitor, job_store, result_store
+
+
+SIZE = 1000
+
+HOUR = 3600
+
+
+@pytest.fixture
+def folders(tmp_path, monkeypatch):
+
+    uploads = tmp_path / "uploads"
+    outputs = tmp_path / "outputs"
+
+    uploads.mkdir()
+    outputs.mkdir()
+
+    monkeypatch.setattr(janitor, "UPLOAD_DIR", str(uploads))
+    monkeypatch.setattr(janitor, "OUTPUT_DIR", str(outputs))
+    monkeypatch.setattr(janitor, "UPLOAD_TTL_HOURS", 24)
+    monkeypatch.setattr(janitor, "OUTPUT_TTL_HOURS", 168)
+    monkeypatch.setattr(janitor, "RETENTION_GRACE_MINUTES", 10)
+    monkeypatch.setattr(janitor, "STORAGE_QUOTA_MB", 1024)
+
+    monkeypatch.setattr(job_store, "unfinished_jobs", lambda: [])
+    monkeypatch.setattr(result_store, "file_ids", lambda: {"rebuild"})
+
+    return uploads, outputs
+
+
+def make(folder, name, age, now):
+
+    path = folder / name
+
+    path.write_bytes(b"x" * SIZE)
+
+    os.utime(path, (now - age, now - age))
+
+    return str(path)
+
+
+def names(folder):
+
+    return sorted(os.listdir(folder))
+
+
+def test_quota_evicts_by_tier_then_lru(folders, monkeypatch):
+
+    uploads, outputs = folders
+
+    now = time.time()
+
+    make(uploads, "old.pdf", 5 * HOUR, now)
+    make(uploads, "recent.pdf", 1 * HOUR, now)
+    held = make(uploads, "held.pdf", 9 * HOUR, now)
+    make(uploads, "fresh.pdf", 60, now)
+    make(outputs, "rebuild.xlsx", 8 * HOUR, now)
+    make(outputs, "batch.xlsx", 10 * HOUR, now)
+
+    # Six files, room for three
+    monkeypatch.setattr(janitor, "STORAGE_QUOTA_MB", 3.5 * SIZE / 1024 / 1024)
+
+    reclaimed = janitor.sweep(held={os.path.abspath(held)}, now=now)
+
+    assert reclaimed == 3 * SIZE
+
+    # Uploads go first, then the rebuildable workbook; the batch workbook
+    # stays although it is the oldest
+    assert names(uploads) == ["fresh.pdf", "held.pdf"]
+    assert names(outputs) == ["batch.xlsx"]
+
+    assert janitor.usage == {"uploads": 2 * SIZE, "outputs": SIZE}
+
+
+def test_ttl_without_quota_pressure(folders):
+
+    uploads, outputs = folders
+
+    now = time.time()
+
+    make(uploads, "expired.pdf", 25 * HOUR, now)
+    make(uploads, "live.pdf", 23 * HOUR, now)
+    make(outputs, "stale.xlsx", 169 * HOUR, now)
+    make(outputs, "used.xlsx", 2 * HOUR, now)
+
+    assert janitor.sweep(now=now) == 2 * SIZE
+
+    assert names(uploads) == ["live.pdf"]
+    assert names(outputs) == ["used.xlsx"]
+
+
+def test_unfinished_job_pdf_is_kept(folders, monkeypatch):
+
+    uploads, outputs = folders
+
+    now = time.time()
+
+    queued = make(uploads, "queued.pdf", 30 * HOUR, now)
+
+    monkeypatch.setattr(job_store, "unfinished_jobs", lambda: [("job", queued, "report.pdf")])
+
+    assert janitor.sweep(now=now) == 0
+    assert names(uploads) == ["queued.pdf"]
+
+
+def test_hold_is_reference_counted():
+
+    with janitor.hold("a.pdf"):
+
+        with janitor.hold("a.pdf"):
+            pass
+
+        assert os.path.abspath("a.pdf") in janitor._held
+
+    assert os.path.abspath("a.pdf") not in janitor._held
@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import jobs
+from app.core.workers import upload_gate
+from app.services import job_store
+from app.services.pipeline import report_async
+
+
+@pytest.fixture
+def job_id():
+
+    job_store.init_db()
+
+    job_id = str(uuid.uuid4())
+
+    job_store.create_job(job_id, "report.pdf", "/tmp/report.pdf")
+
+    return job_id
+
+
+def test_late_count_does_not_move_progress_back(job_id):
+
+    job_store.set_stage(job_id, "llm", 4, 5)
+    job_store.set_stage(job_id, "llm", 3, 5)
+
+    assert job_store.describe(job_store.get_job(job_id))["progress"] == "LLM chunk 4/5"
+
+    job_store.set_stage(job_id, "validation")
+
+    assert job_store.describe(job_store.get_job(job_id))["progress"] == "Validation"
+
+
+def test_progress_written_off_the_event_loop():
+
+    threads = []
+
+    async def main():
+
+        await report_async(lambda *args: threads.append(threading.current_thread()), "rules")
+
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(main())
+
+    assert threads and threads[0] is not loop_thread
+
+
+def test_failed_job_result_is_not_a_server_error(job_id):
+
+    job_store.fail_job(job_id, "No financial data found")
+
+    app = FastAPI()
+    app.include_router(jobs.router)
+
+    res = TestClient(app).get(f"/jobs/{job_id}/result")
+
+    assert res.status_code == 200
+    assert res.json() == {"status": "error", "message": "No financial data found"}
+
+
+def test_running_jobs_leave_upload_slots_free(job_id, monkeypatch):
+
+    async def pipeline(pdf_path, file_id, progress=None):
+
+        # Every upload slot is still there to take while the job runs
+        for _ in range(upload_gate.max_active):
+            await asyncio.wait_for(upload_gate.__aenter__(), 1)
+
+        for _ in range(upload_gate.max_active):
+            await upload_gate.__aexit__()
+
+        return {"status": "error", "message": "No financial data found"}
+
+
+    monkeypatch.setattr(jobs, "run_pipeline", pipeline)
+
+    asyncio.run(jobs.run_job(job_id, "/tmp/report.pdf"))
+
+    assert job_store.get_job(job_id)["error"] == "No financial data found"
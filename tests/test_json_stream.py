@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from app.core.json_stream import IncrementalJSONParser
+
+
+ROWS = [
+    {"name": "Revenue", "values": {"2024": "1,000", "2023": "900"}},
+    {"name": "Tax [note 5]", "values": {"2024": "(10)", "2023": "MISSING"}},
+    {"name": "Profit \"after\" tax", "values": {"2024": "90", "2023": "80"}},
+]
+
+STATEMENT = {"currency": "INR", "unit": "crore", "years": ["2024", "2023"], "rows": ROWS}
+
+
+def feed(parser, text, size):
+
+    items = []
+
+    for i in range(0, len(text), size):
+        items += parser.feed(text[i:i + size])
+
+    return items
+
+
+@pytest.mark.parametrize("size", [1, 3, 17, 10000])
+def test_rows_stream_as_they_close(size):
+
+    text = json.dumps(STATEMENT)
+
+    parser = IncrementalJSONParser()
+
+    assert feed(parser, text, size) == list(enumerate(ROWS))
+    assert parser.result() == STATEMENT
+    assert not parser.repaired
+
+
+def test_prose_and_fences_around_object():
+
+    text = "Here is the JSON:\n```json\n" + json.dumps(STATEMENT) + "\n```\nDone."
+
+    parser = IncrementalJSONParser()
+
+    assert [r for _, r in feed(parser, text, 5)] == ROWS
+    assert parser.result() == STATEMENT
+
+
+def test_rows_key_only_at_top_level():
+
+    text = json.dumps({"meta": {"rows": [{"name": "nested"}]}, "rows": [ROWS[0]]})
+
+    parser = IncrementalJSONParser()
+
+    assert parser.feed(text) == [(0, ROWS[0])]
+
+
+def test_truncated_tail_repaired():
+
+    text = json.dumps(STATEMENT)
+
+    cut = text.index('"Profit')
+
+    parser = IncrementalJSONParser()
+
+    parser.feed(text[:cut + 8])
+
+    result = parser.result()
+
+    assert parser.repaired
+    assert result["rows"] == ROWS[:2]
+    assert result["currency"] == "INR"
+
+
+def test_mismatched_bracket_stops_parsing():
+
+    text = '{"rows": [' + json.dumps(ROWS[0]) + '}, ' + json.dumps(ROWS[1]) + "]}"
+
+    parser = IncrementalJSONParser()
+
+    assert parser.feed(text) == [(0, ROWS[0])]
+    assert parser.closed
+    assert parser.result() == {"rows": [ROWS[0]]}
+
+
+def test_nothing_usable():
+
+    parser = IncrementalJSONParser()
+
+    parser.feed("I could not find a statement.")
+
+    assert parser.result() is None
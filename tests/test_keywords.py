@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from app.core.keywords import KeywordIndex, trie_regex
+
+
+VOCABULARIES = {
+    "income": ["revenue", "income", "other income", "total income"],
+    "expense": ["cost", "costs", "cost of materials", "expense"],
+    "cashflow": ["net cash", "cash equivalent", "cash"],
+}
+
+
+def naive(vocabularies, line):
+
+    return {tag for tag, words in vocabularies.items() if any(w in line for w in words)}
+
+
+def test_trie_regex_factors_prefixes():
+
+    assert trie_regex(["cost", "costs", "cost of"]) == "cost(?:(?:\\ of|s))?"
+
+
+@pytest.mark.parametrize("line", [
+    "revenue from operations",
+    "total income",
+    "cost of materials consumed",
+    "net cash equivalent at year end",
+    "depreciation",
+    "",
+])
+def test_classify_matches_substring_search(line):
+
+    index = KeywordIndex(VOCABULARIES)
+
+    assert index.classify(line) == naive(VOCABULARIES, line)
+
+
+def test_classify_random_lines():
+
+    words = [w for ws in VOCABULARIES.values() for w in ws] + ["of", "net", "profit", "equivalents", "x"]
+
+    rng = random.Random(7)
+
+    index = KeywordIndex(VOCABULARIES)
+
+    for _ in range(500):
+
+        line = " ".join(rng.choice(words) for _ in range(rng.randint(1, 6)))
+
+        assert index.classify(line) == naive(VOCABULARIES, line), line
+
+
+def test_overlapping_keywords_both_found():
+
+    index = KeywordIndex(VOCABULARIES)
+
+    assert index.findall("net cash equivalent") == ["net cash", "cash equivalent"]
+
+
+def test_word_boundaries():
+
+    index = KeywordIndex({"tax": ["tax"], "cost": ["cost"]}, word_boundary=True)
+
+    assert index.classify("taxation costs") == set()
+    assert index.classify("tax on cost") == {"tax", "cost"}
+
+
+def test_longest():
+
+    index = KeywordIndex(VOCABULARIES)
+
+    assert index.longest("cost of materials consumed") == "cost of materials"
+    assert index.longest("profit") is None
@@ -0,0 +1,81 @@
+import json
+
+import httpx
+import pytest
+
+from app.core.json_stream import IncrementalJSONParser
+from app.services import llm_backends, llm_service
+from app.services.llm_backends import OpenAICompatibleBackend, RecordingBackend, prompt_key
+
+
+ANSWER = '{"currency":"INR","unit":"crore","years":["2024"],"rows":[{"name":"Revenue","values":{"2024":"100"}}]}'
+
+
+def sse_body(content, size=20):
+    """
+    A stream as llama.cpp / vLLM send it: a role-only first delta, the
+    content in pieces, an empty final delta with finish_reason, a
+    usage-only chunk, then [DONE].
+    """
+
+    events = [{"choices": [{"index": 0, "delta": {"role": "assistant"}, "finish_reason": None}]}]
+
+    for i in range(0, len(content), size):
+        events.append({"choices": [{"index": 0, "delta": {"content": content[i:i + size]}, "finish_reason": None}]})
+
+    events.append({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+    events.append({"choices": [], "usage": {"prompt_tokens": 50, "completion_tokens": 30, "total_tokens": 80}})
+
+    lines = [f"data: {json.dumps(e)}\n\n" for e in events] + ["data: [DONE]\n\n"]
+
+    return "".join(lines).encode("utf-8")
+
+
+@pytest.fixture
+def backend(monkeypatch):
+
+    def handler(request):
+
+        assert json.loads(request.content)["stream"] is True
+
+        return httpx.Response(200, content=sse_body(ANSWER), headers={"content-type": "text/event-stream"})
+
+
+    b = OpenAICompatibleBackend("http://llm.test/v1")
+
+    b.http = httpx.Client(base_url="http://llm.test/v1/", transport=httpx.MockTransport(handler))
+
+    monkeypatch.setattr(llm_backends, "_backend", b)
+
+    return b
+
+
+def test_stream_with_empty_final_delta(backend):
+
+    rows = []
+
+    messages = [{"role": "user", "content": "statement"}]
+
+    content, usage = llm_service.complete(messages, IncrementalJSONParser(), lambda pos, row: rows.append(row))
+
+    assert content == ANSWER
+    assert usage.total_tokens == 80
+    assert rows == [{"name": "Revenue", "values": {"2024": "100"}}]
+
+
+def test_recording_backend_tees_stream(backend, tmp_path):
+
+    path = str(tmp_path / "stub.jsonl")
+
+    recorder = RecordingBackend(backend, path)
+
+    messages = [{"role": "user", "content": "statement"}]
+
+    chunks = list(recorder.create(messages=messages, stream=True, model="m"))
+
+    assert llm_backends.delta_content(chunks[-1]) is None
+
+    with open(path, encoding="utf-8") as f:
+        entry = json.loads(f.readline())
+
+    assert entry == {"key": prompt_key(messages), "content": ANSWER}
@@ -0,0 +1,88 @@
+import pytest
+
+from app.core import metrics
+from app.services import llm_cache
+
+
+@pytest.fixture
+def cache(monkeypatch):
+
+    llm_cache.init_cache()
+
+    with llm_cache.connect() as conn:
+        conn.execute("DELETE FROM llm_cache")
+
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_TTL_DAYS", 1)
+
+    return llm_cache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+
+    now = [1_000_000.0]
+
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+
+    return now
+
+
+def test_key_is_stable_and_content_addressed():
+
+    key = llm_cache.cache_key("model", "v1", "Revenue 100 90", ["2024", "2023"])
+
+    assert key == llm_cache.cache_key("model", "v1", "Revenue 100 90", ["2023", "2024"])
+    assert key != llm_cache.cache_key("other", "v1", "Revenue 100 90", ["2024", "2023"])
+    assert key != llm_cache.cache_key("model", "v2", "Revenue 100 90", ["2024", "2023"])
+    assert key != llm_cache.cache_key("model", "v1", "Revenue 100 91", ["2024", "2023"])
+
+
+def test_entries_expire_after_ttl(cache, clock):
+
+    cache.put("k", {"rows": []})
+
+    clock[0] += 86400 - 1
+
+    assert cache.get("k") == {"rows": []}
+
+    clock[0] += 2
+
+    assert cache.get("k") is None
+
+
+def test_eviction_drops_least_recently_used(cache, clock, monkeypatch):
+
+    for key in ("a", "b", "c"):
+        cache.put(key, {"text": "x" * 100})
+        clock[0] += 1
+
+    # "a" used last, so "b" is the oldest
+    cache.get("a")
+
+    # room for two entries
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_MAX_MB", 250 / (1024 * 1024))
+
+    cache.evict()
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_hits_and_misses_are_counted(cache):
+
+    before = cache.stats()
+
+    cache.put("k", {"rows": []})
+    cache.get("k")
+    cache.get("missing")
+
+    after = cache.stats()
+
+    assert after["hits"] == before["hits"] + 1
+    assert after["misses"] == before["misses"] + 1
+
+    exported = metrics.render()
+
+    assert 'finance_llm_cache_lookups_total{result="hit"}' in exported
+    assert 'finance_llm_cache_lookups_total{result="miss"}' in exported
@@ -0,0 +1,147 @@
+import pytest
+
+from app.core.json_stream import IncrementalJSONParser
+from app.services import llm_backends, llm_service
+from app.services.llm_backends import delta_chunk, message_response
+
+
+TEXT = "Statement of profit and loss\nRevenue from operations 2024 1,234,567\nTotal income 2024 1,234,567\n"
+
+BOGUS = '{"currency":"INR","unit":"crore","years":["2024"],"rows":[{"name":"Bogus","values":{"2024":"1"}}]}'
+
+ANSWER = '{"currency":"INR","unit":"crore","years":["2024"],"rows":[{"name":"Revenue","values":{"2024":"100"}}]}'
+
+
+class FakeBackend:
+
+    name = "fake"
+
+    def __init__(self, answers, streams_json=True, fail_after=None):
+
+        self.answers = list(answers)
+        self.streams_json = streams_json
+        self.fail_after = fail_after
+        self.requests = []
+
+
+    def create(self, messages, stream=False, **request):
+
+        self.requests.append({"stream": stream, **request})
+
+        content = self.answers.pop(0)
+
+        if not stream:
+            return message_response(content)
+
+        return self._chunks(content)
+
+
+    def _chunks(self, content):
+
+        for i in range(0, len(content), 10):
+
+            if self.fail_after is not None and i >= self.fail_after:
+                raise ConnectionError("stream cut")
+
+            yield delta_chunk(content[i:i + 10])
+
+
+@pytest.fixture
+def use_backend(monkeypatch):
+
+    def use(backend):
+        monkeypatch.setattr(llm_backends, "_backend", backend)
+        return backend
+
+    return use
+
+
+def test_json_mode_not_streamed_when_backend_cannot(use_backend, monkeypatch):
+
+    monkeypatch.setattr(llm_service, "LLM_OUTPUT_MODE", "json_object")
+
+    backend = use_backend(FakeBackend([ANSWER], streams_json=False))
+
+    rows = []
+
+    parsed = llm_service.parse_with_llm(TEXT, on_row=lambda pos, row: rows.append(row))
+
+    assert backend.requests[0]["stream"] is False
+    assert backend.requests[0]["response_format"] == {"type": "json_object"}
+    assert parsed["rows"] == rows == [{"name": "Revenue", "values": {"2024": "100"}}]
+
+
+def test_json_mode_streamed_when_backend_can(use_backend, monkeypatch):
+
+    monkeypatch.setattr(llm_service, "LLM_OUTPUT_MODE", "json_object")
+
+    backend = use_backend(FakeBackend([ANSWER]))
+
+    llm_service.parse_with_llm(TEXT)
+
+    assert backend.requests[0]["stream"] is True
+
+
+class Sink:
+    """
+    Rows as a caller sees them: streamed in, taken back on discard.
+    """
+
+    def __init__(self):
+
+        self.rows = {}
+        self.seen = []
+
+
+    def add(self, pos, row):
+
+        self.rows[pos] = row
+        self.seen.append(row["name"])
+
+
+    def discard(self):
+
+        self.rows.clear()
+
+
+    def kwargs(self):
+
+        return {"on_row": self.add, "on_discard": self.discard}
+
+
+def test_rows_of_failed_attempt_are_taken_back(use_backend, monkeypatch):
+
+    use_backend(FakeBackend([BOGUS, ANSWER]))
+
+    attempts = []
+
+    class FirstAttemptFails(IncrementalJSONParser):
+
+        def result(self):
+
+            attempts.append(self)
+
+            return super().result() if len(attempts) > 1 else None
+
+    monkeypatch.setattr(llm_service, "IncrementalJSONParser", FirstAttemptFails)
+
+    sink = Sink()
+
+    parsed = llm_service.parse_with_llm(TEXT, **sink.kwargs())
+
+    # Streamed as they came, the failed attempt's rows included
+    assert sink.seen == ["Bogus", "Revenue"]
+    assert parsed["rows"] == list(sink.rows.values())
+
+
+def test_broken_stream_takes_its_rows_back(use_backend):
+
+    use_backend(FakeBackend([ANSWER], fail_after=100))
+
+    sink = Sink()
+
+    with pytest.raises(ConnectionError):
+        llm_service.parse_with_llm(TEXT, **sink.kwargs())
+
+    assert sink.seen == ["Revenue"]
+    assert sink.rows == {}
@@ -0,0 +1,124 @@
+import math
+import re
+
+import numpy as np
+import pytest
+
+from app.models.matrix import MISSING, StatementMatrix, parse_cells, unit_scale
+
+
+def clean_value(val):
+    """
+    The per-cell cleaner parse_cells replaced (validator.py before the
+    matrix), kept here as the reference.
+    """
+
+    if val is None:
+        return "MISSING"
+
+    v = str(val).strip()
+
+    v = v.replace(",", "")
+
+    if v.startswith("(") and v.endswith(")"):
+        v = "-" + v[1:-1]
+
+    v = re.sub(r"[₹$€]", "", v)
+
+    v = re.sub(r"[A-Za-z]", "", v)
+
+    if v in ["-", "—", "–", ""]:
+        return "MISSING"
+
+    if re.match(r"^-?\d+(\.\d+)?$", v):
+        return v
+
+    return "MISSING"
+
+
+CELLS = [
+    "1234", "1,234", " 1,234 ", "1234.50", "12.0", "0012", "-0", "-12.5",
+    "(56)", "(1,234.5)", "(₹12)", "₹(12)", "₹12.5", "₹ 12.5", "$1,000", "€7",
+    "12Cr", "12 Cr", "Rs.12", "Rs 12", "1.2.3", "1.", ".5", "-.5", "--12",
+    "1-2", "12-", "-", "—", "–", "", " ", "MISSING", "N/A", "nil", None,
+    "12345678901234567890", "9007199254740993", "123456789012.123456789",
+    "1e5", "١٢", "²",
+]
+
+
+@pytest.mark.parametrize("cell", CELLS)
+def test_matches_clean_value(cell):
+
+    values, missing, text = parse_cells([cell])
+
+    expected = clean_value(cell)
+
+    assert text[0] == expected
+    assert missing[0] == (expected == MISSING)
+
+    if expected != MISSING:
+        assert values[0] == float(expected)
+    else:
+        assert math.isnan(values[0])
+
+
+def test_all_cells_at_once_match_one_by_one():
+
+    values, missing, text = parse_cells(CELLS)
+
+    assert text.tolist() == [clean_value(c) for c in CELLS]
+
+
+def test_empty():
+
+    values, missing, text = parse_cells([])
+
+    assert values.shape == missing.shape == text.shape == (0,)
+
+
+STATEMENT = {
+    "currency": "INR",
+    "unit": "Rs. in lakh",
+    "years": ["2023", 2024],
+    "rows": [
+        {"name": "Revenue", "values": {"2023": "1,000", "2024": "1,200.50"}},
+        {"name": "Tax", "values": {"2024": "(30)", "2022": "99"}},
+    ]
+}
+
+
+def test_from_statement():
+
+    data = StatementMatrix.from_statement(STATEMENT)
+
+    assert data.years == ["2023", "2024"]
+    assert data.scale == 1e5
+    assert data.missing.tolist() == [[False, False], [True, False]]
+
+    np.testing.assert_array_equal(data.absolute()[0], [1e8, 1.2005e8])
+
+    assert data.cells(1) == [MISSING, -30]
+
+    assert data.to_rows() == [
+        {"name": "Revenue", "values": {"2023": "1000", "2024": "1200.50"}},
+        {"name": "Tax", "values": {"2023": MISSING, "2024": "-30"}},
+    ]
+
+
+def test_large_values_keep_every_digit():
+
+    data = StatementMatrix.from_statement({
+        "years": ["2024"],
+        "rows": [{"name": "Revenue", "values": {"2024": "12,345,678,901,234,567,890"}}]
+    })
+
+    assert data.to_rows()[0]["values"]["2024"] == "12345678901234567890"
+    assert data.values.dtype == np.float64
+
+
+@pytest.mark.parametrize("unit, scale", [
+    ("Crore", 1e7), ("₹ in millions", 1e6), ("thousands", 1e3), (None, 1.0), ("UNKNOWN", 1.0)
+])
+def test_unit_scale(unit, scale):
+
+    assert unit_scale(unit) == scale
@@ -0,0 +1,87 @@
+import asyncio
+
+import fitz
+import pytest
+
+from app.services import pdf_service, pipeline
+
+
+@pytest.fixture
+def pdf(tmp_path):
+
+    path = str(tmp_path / "report.pdf")
+
+    doc = fitz.open()
+
+    for n in range(3):
+        doc.new_page().insert_text((72, 72), f"Page {n + 1}")
+
+    doc.save(path)
+    doc.close()
+
+    return path
+
+
+def test_ocr_pages_in_page_order(monkeypatch, pdf):
+
+    monkeypatch.setattr(pdf_service, "ocr_page", lambda doc, i, dpi=300, top=None: doc.page_text(i).strip())
+
+    seen = []
+
+    texts = asyncio.run(pipeline.ocr_pages(pdf, [2, 0], progress=lambda stage, n, total: seen.append((stage, n, total))))
+
+    assert texts == ["Page 3", "Page 1"]
+    assert seen == [("ocr", 1, 2), ("ocr", 2, 2)]
+
+
+def test_scanned_pdf_scouts_then_ocrs_the_statement_pages(monkeypatch, tmp_path):
+
+    path = str(tmp_path / "scanned.pdf")
+
+    doc = fitz.open()
+
+    for _ in range(10):
+        doc.new_page()
+
+    doc.save(path)
+    doc.close()
+
+
+    calls = []
+
+    def fake_ocr(doc, i, dpi=300, top=None):
+        calls.append((i, dpi))
+        if dpi == pdf_service.SCOUT_DPI:
+            return "Statement of Profit and Loss" if i == 4 else ""
+        return f"page {i}"
+
+
+    monkeypatch.setattr(pdf_service, "ocr_page", fake_ocr)
+
+    text, source = asyncio.run(pipeline.extract_document(path))
+
+    assert source == "text"
+    assert [i for i, dpi in calls if dpi == pdf_service.SCOUT_DPI] == list(range(10))
+    assert text == "page 3\n\npage 4\n\npage 5\n\npage 6"
+
+
+def test_page_task_closes_the_document(monkeypatch, pdf):
+
+    opened = []
+
+    class Tracked(pdf_service.PdfDocument):
+
+        def close(self):
+            opened.remove(self)
+            super().close()
+
+        def __enter__(self):
+            opened.append(self)
+            return self
+
+
+    monkeypatch.setattr(pdf_service, "PdfDocument", Tracked)
+    monkeypatch.setattr(pdf_service, "ocr_page", lambda doc, i, dpi=300, top=None: doc.page_text(i))
+
+    assert "Page 2" in pdf_service.ocr_page_text(pdf, 1, 100)
+    assert opened == []
@@ -0,0 +1,110 @@
+import asyncio
+
+from app.services import pipeline
+from app.services.pipeline import StatementAggregator
+from app.services.rule_extractor import extract_statement, remaining_text
+
+
+# Short labels the LLM row filter rejects ("PAT", "Tax") or has no core
+# keyword for ("Net sales", "Employee benefits")
+STATEMENT = """Statement of Profit and Loss (Rs. in crore)
+Particulars 2024 2023
+Net sales 12,000 10,000
+Other income 300 200
+Total income 12,300 10,200
+Employee benefits 2,000 1,800
+Total expenses 9,000 8,000
+Profit before tax 3,300 2,200
+Tax 800 600
+PAT 2,500 1,600
+Exceptional items 10 5"""
+
+
+def test_rule_rows_survive_aggregation():
+
+    rules = extract_statement(STATEMENT)
+
+    agg = StatementAggregator()
+    agg.add_rules(rules)
+
+    rows = {r["name"]: r["values"] for r in agg.raw()["rows"]}
+
+    assert rows["Net sales"] == {"2023": "10,000", "2024": "12,000"}
+    assert rows["Employee benefits"] == {"2023": "1,800", "2024": "2,000"}
+    assert rows["Tax"] == {"2023": "600", "2024": "800"}
+    assert rows["PAT"] == {"2023": "1,600", "2024": "2,500"}
+    assert len(rows) == len(rules["covered"])
+
+
+def test_only_kept_rule_lines_are_removed_from_llm_text():
+
+    rules = extract_statement(STATEMENT)
+
+    agg = StatementAggregator()
+    agg.add_rules(rules)
+
+    text = remaining_text(STATEMENT, rules, agg.covered_rules())
+
+    assert "PAT" not in text
+    assert "Net sales" not in text
+    assert "Exceptional items 10 5" in text
+
+    # A rule row that did not make it into the statement keeps its line
+    text = remaining_text(STATEMENT, rules, ["revenue"])
+
+    assert "Net sales" not in text
+    assert "PAT 2,500 1,600" in text
+
+
+def test_llm_rows_still_filtered():
+
+    agg = StatementAggregator()
+
+    agg.add_result({
+        "years": ["2024"],
+        "rows": [
+            {"name": "PAT", "values": {"2024": "1"}},
+            {"name": "Net cash from operating activities", "values": {"2024": "2"}},
+            {"name": "Revenue from operations", "values": {"2024": "3"}}
+        ]
+    }, 1)
+
+    assert [r["name"] for r in agg.raw()["rows"]] == ["Revenue from operations"]
+
+
+def test_short_leftover_text_still_reaches_the_llm(monkeypatch):
+
+    sent = []
+
+    def fake_parse(chunk, usage=None, on_row=None, on_discard=None):
+        sent.append(chunk)
+        return {"years": ["2024"], "rows": [{"name": "Finance costs", "values": {"2024": "10"}}]}
+
+
+    monkeypatch.setattr(pipeline, "parse_with_llm", fake_parse)
+
+    agg = StatementAggregator()
+
+    asyncio.run(pipeline.run_llm("Particulars 2024 2023\nFinance costs 10 5", agg=agg))
+
+    assert len(sent) == 1
+    assert [r["name"] for r in agg.raw()["rows"]] == ["Finance costs"]
+
+
+def test_discarded_rows_leave_no_trace():
+
+    agg = StatementAggregator()
+
+    agg.add_result({"years": ["2023", "2024"], "rows": []}, 0)
+
+    agg.add_row({"name": "Revenue from operations", "values": {"2024": "1"}}, 0, 0)
+    agg.add_row({"name": "Revenue from operations", "values": {"2024": "999"}}, 1, 0)
+    agg.add_row({"name": "Finance costs", "values": {"2024": "5"}}, 1, 1)
+
+    agg.discard(1)
+
+    agg.add_row({"name": "Revenue from operations", "values": {"2023": "2"}}, 1, 0)
+
+    rows = {r["name"]: r["values"] for r in agg.raw()["rows"]}
+
+    assert rows == {"Revenue from operations": {"2023": "2", "2024": "1"}}
@@ -0,0 +1,115 @@
+import pytest
+
+from app.core import rate_limit
+from app.core.rate_limit import RateLimiter, TokenBucket
+
+
+class Clock:
+    """
+    Stands in for time.monotonic / time.sleep: sleeping advances it.
+    """
+
+    def __init__(self):
+
+        self.now = 1000.0
+        self.slept = []
+
+
+    def monotonic(self):
+
+        return self.now
+
+
+    def sleep(self, seconds):
+
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+
+    clock = Clock()
+
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(rate_limit.time, "sleep", clock.sleep)
+
+    return clock
+
+
+def test_bucket_refills_up_to_capacity(clock):
+
+    bucket = TokenBucket(60)
+
+    bucket.take(60)
+
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+
+    clock.now += 30
+    bucket.refill(clock.now)
+
+    assert bucket.level == pytest.approx(30)
+
+    clock.now += 600
+    bucket.refill(clock.now)
+
+    assert bucket.level == 60
+
+
+def test_requests_per_minute(clock):
+
+    limiter = RateLimiter(rpm=2, tpm=10 ** 6)
+
+    limiter.acquire()
+    limiter.acquire()
+
+    assert clock.slept == []
+
+    limiter.acquire()
+
+    # One request refills every 30 s
+    assert sum(clock.slept) == pytest.approx(30)
+
+
+def test_tokens_per_minute(clock):
+
+    limiter = RateLimiter(rpm=1000, tpm=600)
+
+    limiter.acquire(500)
+    limiter.acquire(200)
+
+    # 100 tokens missing at 10 per second
+    assert sum(clock.slept) == pytest.approx(10)
+
+
+def test_call_larger_than_bucket_is_admitted(clock):
+
+    limiter = RateLimiter(rpm=1000, tpm=100)
+
+    limiter.acquire(5000)
+
+    assert clock.slept == []
+
+
+def test_consume_charges_actual_usage(clock):
+
+    limiter = RateLimiter(rpm=1000, tpm=600)
+
+    limiter.acquire(100)
+    limiter.consume(500)
+
+    limiter.acquire(60)
+
+    assert sum(clock.slept) == pytest.approx(6)
+
+
+def test_pause_after_rate_limit(clock):
+
+    limiter = RateLimiter(rpm=1000, tpm=10 ** 6)
+
+    limiter.pause(12)
+    limiter.pause(3)    # a shorter pause does not cut the longer one
+
+    limiter.acquire()
+
+    assert sum(clock.slept) == pytest.approx(12)
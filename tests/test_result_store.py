@@ -0,0 +1,27 @@
+import hashlib
+import os
+import subprocess
+import sys
+
+from app.services import result_store
+
+
+def test_hash_file_matches_content_hash(tmp_path):
+
+    data = b"%PDF-1.4\n" + b"x" * (3 * result_store.HASH_CHUNK + 7)
+
+    path = tmp_path / "report.pdf"
+    path.write_bytes(data)
+
+    assert result_store.hash_file(str(path)) == hashlib.sha256(data).hexdigest()
+
+
+def test_cli_does_not_import_the_web_api():
+
+    code = "import sys, app.cli; print(any(m.startswith('app.api') for m in sys.modules))"
+
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    out = subprocess.run([sys.executable, "-c", code], cwd=repo, capture_output=True, text=True, check=True)
+
+    assert out.stdout.strip() == "False"
@@ -0,0 +1,154 @@
+import pytest
+
+from app.services.rule_extractor import extract_statement, match_canonical, remaining_text, split_cells
+
+
+STATEMENT = """Statement of Profit and Loss (Rs. in lakh)
+Particulars Note 2024 2023
+Revenue from operations 21 1,000 900
+Other income 50 40
+Total income 1,050 940
+Employee benefits expense 300 280
+Finance costs (20) 15
+Profit before tax 400 350
+Tax expense 100 90
+Profit for the year 300 260
+The directors report 2024 growth"""
+
+
+def test_statement_rows_periods_and_meta():
+
+    result = extract_statement(STATEMENT)
+
+    assert result["currency"] == "INR"
+    assert result["unit"] == "lakh"
+    assert result["years"] == ["2024", "2023"]
+
+    rows = {r["name"]: r["values"] for r in result["rows"]}
+
+    # Note reference ahead of the values is dropped
+    assert rows["Revenue from operations"] == {"2024": "1,000", "2023": "900"}
+    assert rows["Finance costs"] == {"2024": "(20)", "2023": "15"}
+    assert "net profit" in result["covered"]
+    assert 0 < result["confidence"] <= 1
+
+
+def test_remaining_text_strips_only_extracted_rows():
+
+    result = extract_statement(STATEMENT)
+
+    left = remaining_text(STATEMENT, result).split("\n")
+
+    assert "The directors report 2024 growth" in left
+    assert not any(l.startswith("Revenue from operations") for l in left)
+
+    some = remaining_text(STATEMENT, result, ["revenue"]).split("\n")
+
+    assert not any(l.startswith("Revenue from operations") for l in some)
+    assert "Tax expense 100 90" in some
+
+
+def test_camelot_csv():
+
+    text = (
+        '"Particulars","2024","2023"\n'
+        '"Revenue from operations","1,000","900"\n'
+        '"Profit for the year","300","260"'
+    )
+
+    rows = extract_statement(text, csv_mode=True)["rows"]
+
+    assert rows == [
+        {"name": "Revenue from operations", "values": {"2024": "1,000", "2023": "900"}},
+        {"name": "Profit for the year", "values": {"2024": "300", "2023": "260"}},
+    ]
+
+
+def test_no_periods_no_rows():
+
+    result = extract_statement("Revenue from operations 1,000 900\nTax 10 9")
+
+    assert result["rows"] == []
+    assert result["confidence"] == 0.0
+
+
+@pytest.mark.parametrize("label, canonical", [
+    ("Revenue from operations", "revenue"),
+    ("Total Income", "total income"),
+    ("Profit before tax", "profit before tax"),
+    ("Cost of materials consumed", "cost of materials consumed"),
+    ("Notes to accounts", None),
+])
+def test_match_canonical(label, canonical):
+
+    assert match_canonical(label)[0] == canonical
+
+
+def test_split_cells():
+
+    assert split_cells("Revenue 12,345 (11,000)") == ("Revenue", ["12,345", "(11,000)"])
+    assert split_cells('"Revenue, net","12,345","11,000"', csv_mode=True) == ("Revenue, net", ["12,345", "11,000"])
+    assert split_cells("Directors report") == ("Directors report", [])
+
+
+def test_placeholder_cells_keep_their_column():
+
+    assert split_cells("Finance costs - 90") == ("Finance costs", ["-", "90"])
+    assert split_cells("Exceptional items 50 —") == ("Exceptional items", ["50", "—"])
+    assert split_cells("Exceptional items Nil nil") == ("Exceptional items", ["Nil", "nil"])
+    assert split_cells("Revenue - domestic 100 90") == ("Revenue - domestic", ["100", "90"])
+    assert split_cells('"Finance costs","-","90"', csv_mode=True) == ("Finance costs", ["-", "90"])
+
+    rows = {r["name"]: r["values"] for r in extract_statement(STATEMENT.replace("(20) 15", "- 90"))["rows"]}
+
+    assert rows["Finance costs"] == {"2024": "-", "2023": "90"}
+
+
+def test_profit_before_other_items_is_not_tax():
+
+    assert match_canonical("Profit before exceptional items and tax") == (None, 0)
+    assert match_canonical("V. Profit before exceptional items and tax")[0] is None
+    assert match_canonical("Tax expense")[0] == "tax expense"
+
+
+TAX_SPLIT = """Statement of Profit and Loss
+Particulars 2024 2023
+Revenue from operations 5,000 4,500
+Total expenses 1,700 1,600
+Profit before exceptional items and tax 3,300 2,900
+Profit before tax 3,300 2,900
+Current tax 500 450
+Deferred tax 300 250
+Profit for the year 2,500 2,200"""
+
+
+def test_tax_components_leave_tax_expense_to_the_llm():
+
+    result = extract_statement(TAX_SPLIT)
+
+    rows = {r["name"]: r["values"] for r in result["rows"]}
+
+    # Neither component alone is the tax expense, and PBT is not either
+    assert "tax expense" not in result["covered"]
+    assert "Current tax" not in rows
+    assert result["confidence"] <= 0.5
+
+    left = remaining_text(TAX_SPLIT, result)
+
+    assert "Current tax 500 450" in left
+    assert "Deferred tax 300 250" in left
+
+    # A total line settles it
+    result = extract_statement(TAX_SPLIT + "\nTotal tax expense 800 700")
+
+    rows = {r["name"]: r["values"] for r in result["rows"]}
+
+    assert rows["Total tax expense"] == {"2024": "800", "2023": "700"}
+
+
+def test_short_rows_are_not_covered():
+
+    result = extract_statement("Particulars 2024 2023\nRevenue from operations 1,000\nProfit before tax 400 350")
+
+    assert result["covered"] == ["profit before tax"]
+    assert result["confidence"] <= 0.5
@@ -0,0 +1,101 @@
+import pytest
+
+from app.services import statement_store
+
+
+def result(unit, revenue, years=("2023", "2024")):
+
+    return {
+        "status": "success",
+        "currency": "INR",
+        "unit": unit,
+        "years": list(years),
+        "rows": [
+            {"name": "Revenue from operations", "values": dict(zip(years, revenue))},
+            {"name": "Profit for the year", "values": {y: "MISSING" for y in years}}
+        ]
+    }
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(statement_store, "STATEMENTS_DB", str(tmp_path / "statements.db"))
+
+    statement_store.init_db()
+
+
+def test_cross_section_ranks_on_base_unit():
+
+    statement_store.save_statement("a", "Alpha.pdf", "h1", result("crore", ["400", "500"]))
+    statement_store.save_statement("b", "Beta.pdf", "h2", result("lakh", ["9000", "10000"]))
+    statement_store.save_statement("c", "Gamma.pdf", "h3", result("million", ["2000", "3000"]))
+
+    ranked = statement_store.cross_section("revenue", 2024)
+
+    assert [r["company"] for r in ranked] == ["Alpha", "Gamma", "Beta"]
+    assert [r["value"] for r in ranked] == [500, 3000, 10000]
+    assert [r["base_value"] for r in ranked] == [5e9, 3e9, 1e9]
+
+
+def test_missing_values_are_null():
+
+    statement_store.save_statement("a", "Alpha.pdf", "h1", result("crore", ["400", "MISSING"]))
+
+    series = statement_store.time_series("Alpha", ["revenue", "net profit"])
+
+    assert [(p["year"], p["value"]) for p in series["revenue"]] == [(2023, 400), (2024, None)]
+    assert all(p["base_value"] is None for p in series["net profit"])
+
+
+def test_newer_report_wins_for_the_same_year():
+
+    statement_store.save_statement("old", "FY23.pdf", "h1", result("crore", ["100", "110"], ("2022", "2023")), company="Alpha")
+    statement_store.save_statement("new", "FY24.pdf", "h2", result("crore", ["120", "130"], ("2023", "2024")), company="Alpha")
+
+    series = statement_store.time_series("alpha", ["revenue"])["revenue"]
+
+    assert [(p["year"], p["value"], p["file_id"]) for p in series] == [
+        (2022, 100, "old"), (2023, 120, "new"), (2024, 130, "new")
+    ]
+
+
+def test_backfill_runs_once_per_schema():
+
+    assert not statement_store.index_ready()
+
+    statement_store.backfill([("a", "Alpha.pdf", "h1", result("crore", ["1", "2"]))])
+
+    assert statement_store.index_ready()
+
+
+    # An index from an older schema is dropped and must be rebuilt
+    with statement_store.connect() as conn:
+        conn.execute("PRAGMA user_version = 1")
+
+    statement_store.init_db()
+
+    assert not statement_store.index_ready()
+    assert statement_store.list_companies() == []
+
+
+def test_facts_match_rows_by_their_opening_words():
+
+    data = result("crore", ["400", "500"])
+
+    data["rows"] = [
+        {"name": "Profit before exceptional items and tax", "values": {"2023": "3300", "2024": "3500"}},
+        {"name": "Current tax", "values": {"2023": "500", "2024": "520"}},
+        {"name": "Total tax expense", "values": {"2023": "800", "2024": "820"}}
+    ]
+
+    facts = {(f[0], f[1]): f[4] for f in statement_store.statement_facts(data)}
+
+    assert facts == {("tax expense", "2023"): 800, ("tax expense", "2024"): 820}
+
+
+def test_company_given_at_upload_wins_over_file_name():
+
+    statement_store.save_statement("a", "annual_report_2024.pdf", "h1", {**result("crore", ["400", "500"]), "company": "Alpha Ltd"})
+
+    assert [c["company"] for c in statement_store.list_companies()] == ["Alpha Ltd"]
@@ -0,0 +1,79 @@
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core.upload_guard import MULTIPART_SLACK, UploadGuard
+from app.core.workers import upload_gate
+
+
+LIMIT = 1024
+
+BIG = b"x" * (LIMIT + MULTIPART_SLACK + 1)
+
+
+@pytest.fixture
+def seen():
+    return []
+
+
+@pytest.fixture
+def client(seen):
+
+    async def upload(request):
+
+        body = await request.body()
+
+        seen.append(len(body))
+
+        return JSONResponse({"status": "success", "bytes": len(body)})
+
+
+    inner = Starlette(routes=[Route("/upload", upload, methods=["POST"])])
+
+    guard = UploadGuard(inner, routes={"/upload": (LIMIT, 1, True)})
+
+    return TestClient(guard)
+
+
+def test_small_upload_passes_and_releases_slot(client, seen):
+
+    res = client.post("/upload", content=b"%PDF-1.4 small")
+
+    assert res.status_code == 200
+    assert seen == [14]
+    assert upload_gate.admitted == 0
+
+
+def test_declared_size_rejected_before_reading(client, seen):
+
+    res = client.post("/upload", content=BIG)
+
+    assert res.status_code == 413
+    assert res.json()["status"] == "error"
+    assert seen == []
+
+
+def test_chunked_body_cut_off_at_limit(client, seen):
+
+    def chunks():
+        yield BIG[:LIMIT]
+        yield BIG[LIMIT:]
+
+    res = client.post("/upload", content=chunks())
+
+    assert res.status_code == 413
+    assert seen == []
+    assert upload_gate.admitted == 0
+
+
+def test_saturated_server_answers_busy_without_body(client, seen, monkeypatch):
+
+    monkeypatch.setattr(upload_gate, "admitted", upload_gate.max_admitted)
+
+    res = client.post("/upload", content=b"%PDF-1.4 small")
+
+    assert res.status_code == 429
+    assert res.headers["retry-after"] == "30"
+    assert seen == []
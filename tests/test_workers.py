@@ -0,0 +1,91 @@
+import asyncio
+import os
+
+from app.core import timing
+from app.core.workers import AdmissionGate, get_cpu_pool, map_cpu, run_cpu, shutdown_workers
+
+
+def timed_pid():
+
+    timing.record("probe", 0.5)
+
+    return os.getpid()
+
+
+def test_admission_gate_bounds_active_and_queued():
+
+    gate = AdmissionGate(max_active=1, max_queued=1)
+
+    assert gate.try_admit()
+    assert gate.try_admit()
+    assert not gate.try_admit()
+    assert gate.queued == 1
+
+    gate.release()
+
+    assert gate.queued == 0
+    assert gate.try_admit()
+
+
+def test_cpu_pool_spawns_workers():
+
+    try:
+        assert get_cpu_pool()._mp_context.get_start_method() == "spawn"
+    finally:
+        shutdown_workers()
+
+
+def test_run_cpu_merges_worker_timings():
+
+    async def main():
+
+        with timing.collect() as timer:
+            pid = await run_cpu(timed_pid)
+
+        return pid, timer.summary()
+
+
+    pid, summary = asyncio.run(main())
+
+    assert pid == os.getpid()   # INLINE_CPU=1 in tests
+    assert "probe" in summary["stages"]
+
+
+def test_map_cpu_keeps_call_order_and_reports_each_call():
+
+    seen = []
+
+    async def done(finished, total):
+        seen.append((finished, total))
+
+
+    async def main():
+        return await map_cpu(pow, [(2, 3), (3, 2), (5, 1)], on_done=done)
+
+
+    assert asyncio.run(main()) == [8, 9, 5]
+    assert seen == [(1, 3), (2, 3), (3, 3)]
+
+
+def test_warmup_imports_only_in_the_cpu_pool(monkeypatch):
+
+    from app.core import startup, workers
+
+    calls = []
+
+    async def run_cpu(fn, *args, **kwargs):
+        calls.append(fn)
+        return {}
+
+
+    monkeypatch.setattr(workers, "run_cpu", run_cpu)
+    monkeypatch.setattr(startup, "WARMUP", True)
+    monkeypatch.setattr(startup, "WARMUP_DELAY_SECONDS", 0)
+    monkeypatch.setattr(startup, "INLINE_CPU", False)
+    monkeypatch.setattr(startup, "CPU_WORKERS", 3)
+
+    monkeypatch.setattr(startup, "warm_imports", lambda: calls.append("in process") or {})
+
+    asyncio.run(startup.warmup())
+
+    assert calls == [startup.worker_modules] * 3